@@ -0,0 +1,80 @@
+import numpy as np
+
+# The percentile list fio reports by default
+DEFAULT_PERCENTILES = (1, 5, 10, 20, 30, 40, 50, 60, 70, 80, 90, 95, 99, 99.5, 99.9, 99.95, 99.99)
+HEADLINE_PERCENTILES = (50, 95, 99, 99.9)
+
+def merge_histograms(stats, key='clat_ns'):
+    """Merge fio json+ latency bins across job entries; returns (bin values ns, counts) or None.
+
+    json+ reports each job's full latency histogram as {bin value: count}. Bin values
+    come from fio's fixed bucket layout, so summing counts per value is an exact merge.
+    """
+    bins = [s.get(key, {}).get('bins') for s in stats]
+    bins = [b for b in bins if b]
+    if not bins:
+        return None
+    values = np.fromiter((int(v) for b in bins for v in b), dtype=np.int64)
+    counts = np.fromiter((c for b in bins for c in b.values()), dtype=np.float64)
+    unique, inverse = np.unique(values, return_inverse=True)
+    return unique, np.bincount(inverse, weights=counts)
+
+def histogram_percentiles(values, counts, percentiles):
+    """Percentiles (same units as values) from a histogram, using fio's rank rule"""
+    cumulative = np.cumsum(counts)
+    if not len(cumulative) or cumulative[-1] == 0:
+        return np.zeros(len(percentiles))
+    ranks = np.asarray(percentiles, dtype=np.float64) / 100 * cumulative[-1]
+    index = np.searchsorted(cumulative, ranks, side='left')
+    return values[np.minimum(index, len(values) - 1)]
+
+def reported_percentiles(stats, percentiles, key='clat_ns'):
+    """Fallback for plain json output: the worst per-job value fio reported for each percentile"""
+    result = np.zeros(len(percentiles))
+    for s in stats:
+        reported = s.get(key, {}).get('percentile', {})
+        result = np.maximum(result, [reported.get(f'{p:.6f}', 0) for p in percentiles])
+    return result
+
+def latency_percentiles(stats, percentiles=HEADLINE_PERCENTILES, key='clat_ns'):
+    """Return ({percentile: latency µs}, exact) across job entries.
+
+    exact is False when no histogram bins were recorded (plain --output-format=json)
+    and the values are per-job maxima, an upper bound rather than the true percentile.
+    """
+    stats = [s for s in stats if s.get('total_ios', 0) or s.get(key, {}).get('bins')]
+    merged = merge_histograms(stats, key)
+    if merged is not None:
+        values, exact = histogram_percentiles(*merged, percentiles), True
+    else:
+        values, exact = reported_percentiles(stats, percentiles, key), len(stats) <= 1
+    return {p: v / 1000 for p, v in zip(percentiles, values.tolist())}, exact
+
+def weighted_mean(stats, key='lat_ns'):
+    """IO-count weighted mean latency (µs) across job entries"""
+    ios = np.array([s.get('total_ios', 0) for s in stats], dtype=np.float64)
+    means = np.array([s.get(key, {}).get('mean', 0) for s in stats], dtype=np.float64)
+    if not ios.sum():
+        return 0.0
+    return float(np.dot(ios, means) / ios.sum() / 1000)
+
+def direction_stats(fio_data, directions, percentiles=HEADLINE_PERCENTILES):
+    """Aggregate throughput and latency over every job (and host) for one or more directions"""
+    stats = [j.get(direction, {}) for j in fio_data.get('jobs', []) for direction in directions]
+    lat_percentiles, exact = latency_percentiles(stats, percentiles)
+    return {
+        'iops': sum(s.get('iops', 0) for s in stats),
+        'bw': sum(s.get('bw', 0) for s in stats) / 1024,
+        'ios': sum(s.get('total_ios', 0) for s in stats),
+        'lat_mean': weighted_mean(stats),
+        'percentiles': lat_percentiles,
+        'exact': exact,
+    }
+
+def analyze(fio_data, percentiles=HEADLINE_PERCENTILES):
+    """Read, write and combined statistics for a final fio document"""
+    return {
+        'read': direction_stats(fio_data, ('read',), percentiles),
+        'write': direction_stats(fio_data, ('write',), percentiles),
+        'total': direction_stats(fio_data, ('read', 'write'), percentiles),
+    }
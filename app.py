@@ -1,51 +1,109 @@
 import dash
-from dash import Input, Output, State, no_update
+from dash import Input, Output, State, ALL, MATCH, ctx, no_update
 import json
-import subprocess
 import os
 import yaml
 from datetime import datetime
-import threading, time, signal, psutil
 
 from display import (
     create_layout, 
     create_status_summary, 
     create_comprehensive_charts,
-    create_running_status,
-    create_error_status
+    create_error_status,
+    create_live_figure,
+    live_figure_extension,
+    create_command_display,
+    progress_label,
+    progress_bar_style,
+    POLL_INTERVAL_MS,
+    MAX_POLL_INTERVAL_MS,
+    history_rows,
+    create_steady_state_notice,
+    create_sweep_status,
+    create_sweep_charts,
+    create_queue_panel,
+    create_host_breakdown,
+    create_profile_breakdown,
+    create_latency_heatmap,
+    create_baseline_comparison,
+    create_detail_panels,
+    create_detail_section,
+    create_telemetry_chart,
+    create_engine_comparison,
+    create_precondition_chart,
+    create_repeat_summary
 )
-
-running_processes = {}
+from streaming import SAMPLE_BUFFER_SIZE, tail_file, run_progress, log_excerpt, read_samples
+import defaults
+import latency_logs
+import regression
+import telemetry
+import preconditioning
+import ioengines
+import targets
+import traces
+import profiles
+from sweep import FINISHED_STATUSES, PublishedSweep, SweepController, expand_sweep, request_sweep
+from push import register_push_routes
+from results_store import ResultsStore, compact_record, read_final_document
+from results_api import SECTIONS, register_compression, register_result_routes
+from scheduler import RunScheduler, claim_supervisor
+from run_state import RunStateStore
+from engine import DATA_DIR, preset_parameters
+import render_cache
+import metrics
+from distributed import per_host_summaries
 
 with open('fio_defaults.yaml', 'r') as f:
     config = yaml.safe_load(f)
 
+running_processes = {}
+results_store = ResultsStore()
+run_state = RunStateStore(results_store.path)
+cache_settings = defaults.section(config, 'render_cache')
+view_cache = render_cache.RenderCache(
+    cache_settings['max_entries'], f'{DATA_DIR}/render_cache' if cache_settings['disk'] else None,
+    cache_settings['max_disk_entries']
+)
+metrics_settings = defaults.section(config, 'metrics')
+# Under gunicorn the supervisor process owns the runs and serves /metrics itself
+external_supervisor = os.environ.get('FLOWFIO_SUPERVISOR') == 'external'
+metrics_state = (metrics.MetricsState(metrics_settings['quantiles'])
+                 if metrics_settings['enabled'] and not external_supervisor else None)
+scheduler = RunScheduler(
+    config, results_store, results_store.path, runs=running_processes,
+    max_per_device=defaults.section(config, 'scheduler')['max_runs_per_device'], metrics=metrics_state, shared=run_state
+)
+# Sweeps run next to the scheduler in the process that owns the run queue
+sweep_controller = SweepController(scheduler)
+supervisor_lock = None
+
 app = dash.Dash(__name__)
+server = app.server
 
 with open('app.html', 'r') as f:
     app.index_string = f.read()
 
 app.layout = create_layout()
 
+register_push_routes(app.server, scheduler.live_run, scheduler.queue_position)
+register_compression(app.server)
+if metrics_state is not None:
+    metrics_state.load_last_runs(results_store.latest_runs())
+    metrics.register_metrics_route(app.server, metrics_state)
+
+app.clientside_callback(
+    dash.ClientsideFunction(namespace='push', function_name='connect'),
+    Output('push-state-store', 'data'),
+    Input('active-run-store', 'data')
+)
+
 @app.callback(
     [Output('bs', 'value'), Output('iodepth', 'value'), Output('numjobs', 'value')],
     [Input('workload_preset', 'value'), Input('storage_type', 'value')]
 )
 def update_settings_from_preset(workload_preset, storage_type):
-    if workload_preset and workload_preset in config['workloads']:
-        workload = config['workloads'][workload_preset]
-        bs = workload.get('bs', '4k')
-        iodepth = str(workload.get('iodepth', 32))
-        numjobs = str(workload.get('numjobs', 4))
-        
-        if storage_type and storage_type in config['storage_types']:
-            storage = config['storage_types'][storage_type]
-            iodepth = str(storage.get('recommended_iodepth', iodepth))
-            numjobs = str(storage.get('recommended_numjobs', numjobs))
-            
-        return bs, iodepth, numjobs
-    
-    return '4k', '32', '4'
+    return preset_parameters(config, workload_preset, storage_type)
 
 @app.callback([Output('size', 'value')], [Input('scenario', 'value')])
 def update_size_from_scenario(scenario):
@@ -57,6 +115,14 @@ def update_size_from_scenario(scenario):
 def populate_workload_options(_):
     return [{'label': v['name'], 'value': k} for k, v in config['workloads'].items()]
 
+@app.callback(Output('history-workload', 'options'), Input('history-workload', 'id'))
+def populate_history_workload_options(_):
+    return [{'label': v['name'], 'value': k} for k, v in config['workloads'].items()]
+
+@app.callback(Output('history-storage', 'options'), Input('history-storage', 'id'))
+def populate_history_storage_options(_):
+    return [{'label': v['name'], 'value': k} for k, v in config['storage_types'].items()]
+
 @app.callback(Output('storage_type', 'options'), Input('storage_type', 'id'))
 def populate_storage_options(_):
     return [{'label': v['name'], 'value': k} for k, v in config['storage_types'].items()]
@@ -73,121 +139,498 @@ def populate_iodepth_options(_):
 def populate_numjobs_options(_):
     return [{'label': str(nj), 'value': str(nj)} for nj in config['job_counts']]
 
+@app.callback(Output('hosts', 'options'), Input('hosts', 'id'))
+def populate_host_options(_):
+    hosts = config.get('distributed', {}).get('hosts', {})
+    return [{'label': f"{label} ({address})", 'value': label} for label, address in hosts.items()]
+
+@app.callback(Output('target', 'options'), Input('target', 'id'))
+def populate_target_options(_):
+    return [{'label': v.get('name', k), 'value': k} for k, v in targets.configured_targets(config).items()]
+
+@app.callback(Output('profile', 'options'), Input('profile', 'id'))
+def populate_profile_options(_):
+    return [{'label': v.get('name', k), 'value': k} for k, v in config.get('profiles', {}).items()]
+
+@app.callback(Output('trace', 'options'), Input('trace', 'id'))
+def populate_trace_options(_):
+    return [{'label': name, 'value': name} for name in traces.list_traces(DATA_DIR)]
+
+def placement_params(target, confirm, cpus_allowed, numa_nodes):
+    """plan_run arguments for the target and CPU/NUMA pinning controls"""
+    return {
+        'target': target or None,
+        'confirm_destructive': bool(confirm),
+        'cpus_allowed': (cpus_allowed or '').strip() or None,
+        'numa_cpu_nodes': (numa_nodes or '').strip() or None,
+    }
+
+@app.callback(
+    [Output('ioengine', 'options'), Output('ioengine', 'value'), Output('compare-engines', 'options'),
+     Output('compare-engines', 'value')],
+    Input('ioengine', 'id')
+)
+def populate_ioengine_options(_):
+    options = [{'label': engine, 'value': engine} for engine in ioengines.configured_engines(config)]
+    return (options, ioengines.default_engine(config), options,
+            defaults.section(config, 'engine_comparison').get('engines', [option['value'] for option in options]))
+
+@app.callback(
+    [Output('sweep-bs', 'options'), Output('sweep-iodepth', 'options'), Output('sweep-numjobs', 'options')],
+    Input('sweep-bs', 'id')
+)
+def populate_sweep_options(_):
+    return (
+        [{'label': bs, 'value': bs} for bs in config['block_sizes']],
+        [{'label': str(qd), 'value': qd} for qd in config['queue_depths']],
+        [{'label': str(nj), 'value': nj} for nj in config['job_counts']]
+    )
+
 @app.callback(
-    Output('active-run-store', 'data'),
+    [Output('active-run-store', 'data'), Output('live-graph', 'figure'), Output('live-cursor-store', 'data'),
+     Output('run-command', 'children'), Output('run-progress', 'style'), Output('status', 'children'),
+     Output('charts', 'children'), Output('log-interval', 'disabled'), Output('log-interval', 'interval'),
+     Output('progress-text', 'children', allow_duplicate=True), Output('progress-bar', 'style', allow_duplicate=True)],
     [Input('run-button', 'n_clicks')],
-    [State('scenario', 'value'), State('workload_preset', 'value'), State('direct', 'value'),
-     State('bs', 'value'), State('numjobs', 'value'), State('iodepth', 'value'), State('size', 'value')]
+    [State('scenario', 'value'), State('workload_preset', 'value'), State('storage_type', 'value'), State('direct', 'value'),
+     State('bs', 'value'), State('numjobs', 'value'), State('iodepth', 'value'), State('size', 'value'),
+     State('steady-state', 'value'), State('hosts', 'value'), State('latency-log', 'value'),
+     State('ioengine', 'value'), State('target', 'value'), State('confirm-destructive', 'value'),
+     State('cpus-allowed', 'value'), State('numa-nodes', 'value'), State('precondition', 'value'),
+     State('trace', 'value'), State('replay-speed', 'value'), State('run-timeout', 'value'), State('profile', 'value')],
+    prevent_initial_call=True
 )
-def run_fio_test(n_clicks, scenario, workload_preset, direct, bs, numjobs, iodepth, size):
+def run_fio_test(n_clicks, scenario, workload_preset, storage_type, direct, bs, numjobs, iodepth, size, steady, hosts,
+                 latency_log, ioengine, target, confirm, cpus_allowed, numa_nodes, precondition, trace, replay_speed,
+                 timeout, profile):
     if n_clicks == 0:
-        return no_update
-    
-    os.makedirs('/app/test-data', exist_ok=True)
-    
-    scenario_config = config['scenarios'].get(scenario, config['scenarios']['standard'])
-    workload_config = config['workloads'].get(workload_preset, config['workloads']['oltp'])
-    
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = f'/app/test-data/results_{timestamp}.json'
-    log_file = f'/app/test-data/log_{timestamp}.txt'
-    
-    rw = workload_config.get('rw', 'randread')
-    rwmixread = workload_config.get('rwmixread', 100)
-    
-    fio_cmd = [
-        'fio',
-        f'--filename=/app/test-data/testfile_{timestamp}',
-        f'--direct={direct}',
-        f'--rw={rw}',
-        f'--bs={bs}',
-        f'--numjobs={numjobs}',
-        f'--iodepth={iodepth}',
-        f'--size={size}',
-        f'--runtime={scenario_config["runtime"]}',
-        f'--ramp_time={scenario_config["ramp_time"]}',
-        '--time_based',
-        '--ioengine=libaio',
-        '--group_reporting',
-        '--output-format=json',
-        f'--output={output_file}',
-        f'--name=test_{timestamp}'
-    ]
-    
-    if 'rw' in rw and rwmixread < 100:
-        fio_cmd.append(f'--rwmixread={rwmixread}')
+        return [no_update] * 11
     
-    cmd_str = ' '.join(fio_cmd)
-    print(f"Running FIO command: {cmd_str}", flush=True)
-
-    with open(log_file, "w") as lf:
-        lf.write(f"Command: {cmd_str}\n\n")
-        lf.flush()
-        process = subprocess.Popen(fio_cmd, stdout=lf, stderr=lf, text=True)
-
-    running_processes[timestamp] = {
-        "process": process,
-        "output_file": output_file,
-        "log_file": log_file,
-        "scenario_config": scenario_config,
-        "workload_config": workload_config,
-        "start_time": datetime.now(),
-        "runtime": scenario_config["runtime"]
-    }
+    try:
+        job = scheduler.submit({
+            'scenario': scenario, 'workload_preset': workload_preset, 'storage_type': storage_type,
+            'direct': direct, 'bs': bs, 'numjobs': numjobs, 'iodepth': iodepth, 'size': size,
+            'steady_state': defaults.section(config, 'steady_state') if steady else None,
+            'hosts': hosts or None,
+            'latency_logs': defaults.section(config, 'latency_logs') if latency_log else None,
+            'ioengine': ioengine,
+            'precondition': defaults.section(config, 'preconditioning') if precondition else None,
+            'trace': trace or None,
+            'replay_speed': replay_speed if replay_speed is not None else 1.0,
+            'timeout': timeout or None,
+            'profile': profile or None,
+            **placement_params(target, confirm, cpus_allowed, numa_nodes)
+        })
+    except ValueError as e:
+        return [no_update] * 5 + [create_error_status(str(e))] + [no_update] * 5
+    run_id = job['run_id']
 
-    return {"run_id": timestamp, "log_file": log_file}
+    return (
+        {"run_id": run_id}, create_live_figure(), {"run_id": run_id, "seq": 0},
+        create_command_display(job['command']), {'display': 'block'}, None, None, False, POLL_INTERVAL_MS,
+        f"Queued (position {scheduler.queue_position(run_id) or 1} for this device)", progress_bar_style(0)
+    )
 
 @app.callback(
-    [Output('status', 'children'), Output('charts', 'children'), 
-     Output('test-results-store', 'data'), Output('active-run-store', 'clear_data')],
+    [Output('progress-text', 'children'), Output('progress-bar', 'style'), Output('live-log', 'children'),
+     Output('live-graph', 'extendData'), Output('live-cursor-store', 'data', allow_duplicate=True),
+     Output('run-finished-store', 'data'), Output('log-interval', 'interval', allow_duplicate=True)],
     [Input('log-interval', 'n_intervals')],
-    [State('active-run-store', 'data')]
+    [State('active-run-store', 'data'), State('live-cursor-store', 'data'), State('log-interval', 'interval')],
+    prevent_initial_call=True
 )
-def monitor_test_progress(n, active_run):
+def monitor_test_progress(n, active_run, cursor, interval):
+    """Polling fallback used until (or whenever) the push channel is unavailable"""
     if not active_run:
-        return no_update, no_update, no_update, no_update
+        return [no_update] * 7
 
     run_id = active_run.get('run_id')
-    log_file = active_run.get('log_file')
-
-    proc_info = running_processes.get(run_id)
+    proc_info = scheduler.live_run(run_id)
+    backoff = min(interval * 2, MAX_POLL_INTERVAL_MS)
     if not proc_info:
-        return no_update, no_update, no_update, no_update
+        position = scheduler.queue_position(run_id)
+        if position is None:
+            return no_update, no_update, no_update, no_update, no_update, {"run_id": run_id}, POLL_INTERVAL_MS
+        return f"Queued (position {position} for this device)", no_update, no_update, no_update, no_update, no_update, backoff
+
+    stream = proc_info['stream']
+    seq = cursor.get('seq', 0) if cursor and cursor.get('run_id') == run_id else 0
+    samples = stream.buffer.since(seq)
+
+    if proc_info['settled'].is_set():
+        extension = live_figure_extension(samples, SAMPLE_BUFFER_SIZE) if samples else no_update
+        return no_update, no_update, no_update, extension, no_update, {"run_id": run_id}, POLL_INTERVAL_MS
+
+    if not samples:
+        # Nothing new from fio: back off instead of rebuilding the same view every tick
+        return no_update, no_update, no_update, no_update, no_update, no_update, backoff
+
+    progress_percent = run_progress(proc_info['start_time'], proc_info['runtime'])
+    log_content = tail_file(proc_info['log_file'])
+
+    return (
+        progress_label(progress_percent, proc_info['runtime']),
+        progress_bar_style(progress_percent),
+        log_excerpt(log_content) if log_content is not None else "Collecting logs...",
+        live_figure_extension(samples, SAMPLE_BUFFER_SIZE),
+        {"run_id": run_id, "seq": samples[-1]['seq']},
+        no_update,
+        POLL_INTERVAL_MS
+    )
+
+def latency_heatmap_charts(record, digest):
+    """Heatmap chart list for a run that recorded latency logs, binned server-side"""
+    if not record.get('latency_log'):
+        return []
+    criteria = defaults.section(config, 'latency_logs')
+
+    def build():
+        heatmap = latency_logs.load_heatmap(record['latency_log'], criteria)
+        return [create_latency_heatmap(heatmap)] if heatmap is not None else []
+    return view_cache.get_or_build(view_cache.key('heatmap', digest, record['latency_log'], criteria), build)
+
+def telemetry_charts(record, digest):
+    """Host telemetry chart list for a run that was sampled"""
+    path = record.get('telemetry_file')
+    if not path or not os.path.exists(path):
+        return []
+    return view_cache.get_or_build(
+        view_cache.key('telemetry', digest, view_cache.file_digest(path)),
+        lambda: [create_telemetry_chart(read_samples(record['result_file']), telemetry.load(path))]
+    )
+
+def precondition_charts(record):
+    """Convergence curve of the preconditioning run that covered this run, if any"""
+    path = f"{DATA_DIR}/precondition_{record['precondition_run_id']}.json" if record.get('precondition_run_id') else None
+    if not path or not os.path.exists(path):
+        return []
+    return view_cache.get_or_build(
+        view_cache.key('precondition', view_cache.file_digest(path)),
+        lambda: [create_precondition_chart(preconditioning.load_curve(path))]
+    )
+
+def baseline_comparison(record, digest):
+    """Comparison panel list for a run with a pinned baseline (other than itself)"""
+    baseline = results_store.baseline(record['workload_preset'], record['storage_type'])
+    if baseline is None or baseline['run_id'] == record['run_id']:
+        return []
+    criteria = defaults.section(config, 'regression')
+    before, after = regression.sides(results_store, baseline, record)
+    if not after:
+        return []
+    try:
+        key = view_cache.key('baseline', view_cache.file_digest(baseline['result_file']), digest, criteria,
+                             [run['run_id'] for run in before + after])
+        return view_cache.get_or_build(
+            key, lambda: [create_baseline_comparison(regression.compare(before, after, criteria))]
+        )
+    except (OSError, ValueError) as e:
+        return [create_error_status(f"Baseline comparison failed: {e}")]
+
+def result_views(record, fio_data=None):
+    """Summary and chart components for a stored run, served from the render cache when possible.
+
+    The fio document is only loaded if some view has to be rebuilt.
+    """
+    digest = view_cache.file_digest(record['result_file'])
+    workload_config = config['workloads'].get(record['workload_preset'], {})
+    scenario_config = {'runtime': record['runtime'] or 0}
+    loaded = [fio_data]
+
+    def document():
+        if loaded[0] is None:
+            loaded[0] = read_final_document(record['result_file'])
+        return loaded[0]
+
+    summary = [create_steady_state_notice(record), view_cache.get_or_build(
+        view_cache.key('summary', digest, workload_config, scenario_config),
+        lambda: create_status_summary(document(), workload_config, scenario_config)
+    )]
+    summary += baseline_comparison(record, digest)
+    if record.get('hosts'):
+        summary.append(view_cache.get_or_build(
+            view_cache.key('hosts', digest),
+            lambda: create_host_breakdown(per_host_summaries(document()))
+        ))
+    if record.get('profile'):
+        summary.append(view_cache.get_or_build(
+            view_cache.key('profile', digest),
+            lambda: create_profile_breakdown(profiles.group_results(document()))
+        ))
+    charts = view_cache.get_or_build(
+        view_cache.key('charts', digest, workload_config),
+        lambda: create_comprehensive_charts(document(), workload_config)
+    )
+    summary.append(create_detail_panels(record['run_id']))
+    return summary, (charts + precondition_charts(record) + latency_heatmap_charts(record, digest)
+                     + telemetry_charts(record, digest))
 
-    process = proc_info['process']
+def run_summary(run_id):
+    record = results_store.get(run_id)
+    return compact_record(record) if record else None
+
+def run_section(run_id, section):
+    """A detail section's data for a stored run, computed once per result file"""
+    record = results_store.get(run_id)
+    if record is None:
+        return None
+    digest = view_cache.file_digest(record['result_file'])
+    return view_cache.get_or_build(
+        view_cache.key('section', digest, section),
+        lambda: SECTIONS[section](read_final_document(record['result_file']))
+    )
+
+register_result_routes(app.server, run_summary, run_section)
+
+@app.callback(
+    [Output('status', 'children', allow_duplicate=True), Output('charts', 'children', allow_duplicate=True),
+     Output('test-results-store', 'data'), Output('active-run-store', 'clear_data'),
+     Output('run-progress', 'style', allow_duplicate=True), Output('log-interval', 'disabled', allow_duplicate=True)],
+    [Input('run-finished-store', 'data')],
+    prevent_initial_call=True
+)
+def show_test_results(finished):
+    if not finished:
+        return [no_update] * 6
+
+    run_id = finished.get('run_id')
+    job = scheduler.job(run_id)
+    record = results_store.get(run_id)
 
     try:
-        with open(log_file, 'r') as lf:
-            lines = lf.readlines()[-15:]
-        log_content = ''.join(lines)
-    except Exception:
-        log_content = "Collecting logs..."
-
-    if process.poll() is None:
-        start_time = proc_info['start_time']
-        runtime = proc_info['runtime']
-        elapsed = (datetime.now() - start_time).total_seconds()
-        progress_percent = min((elapsed / runtime) * 100, 100)
+        if record is None:
+            error = job.get('error') if job else None
+            raise ValueError(error or f"Run {run_id} finished without results")
+
+        summary, charts = result_views(record)
+        # Only the compact summary goes to the browser; details load per panel (see results_api)
+        return summary, charts, compact_record(record), True, {'display': 'none'}, True
         
-        return create_running_status(log_content, progress_percent, runtime), no_update, no_update, no_update
+    except Exception as e:
+        return create_error_status(str(e)), "", {}, True, {'display': 'none'}, True
+
+@app.callback(
+    Output('history-table', 'data'),
+    [Input('history-workload', 'value'), Input('history-storage', 'value'), Input('test-results-store', 'data')]
+)
+def update_history(workload_preset, storage_type, _):
+    return history_rows(results_store.query(workload_preset=workload_preset, storage_type=storage_type, limit=200))
+
+@app.callback(
+    [Output('status', 'children', allow_duplicate=True), Output('charts', 'children', allow_duplicate=True)],
+    [Input('history-table', 'selected_rows')],
+    [State('history-table', 'data')],
+    prevent_initial_call=True
+)
+def show_history_run(selected_rows, rows):
+    if not selected_rows:
+        return no_update, no_update
+
+    run = results_store.get(rows[selected_rows[0]]['run_id'])
+    if not run:
+        return no_update, no_update
+
+    try:
+        return result_views(run)
+    except (OSError, ValueError) as e:
+        return create_error_status(str(e)), ""
+
+@app.callback(
+    Output({'type': 'detail-body', 'section': MATCH, 'run_id': MATCH}, 'children'),
+    [Input({'type': 'detail-panel', 'section': MATCH, 'run_id': MATCH}, 'open')],
+    [State({'type': 'detail-body', 'section': MATCH, 'run_id': MATCH}, 'children')],
+    prevent_initial_call=True
+)
+def load_detail_section(is_open, loaded):
+    if not is_open or loaded:
+        return no_update
+    section, run_id = ctx.triggered_id['section'], ctx.triggered_id['run_id']
+    try:
+        payload = run_section(run_id, section)
+    except (OSError, ValueError) as e:
+        return create_error_status(str(e))
+    if payload is None:
+        return create_error_status(f"Run {run_id} not found")
+    return create_detail_section(section, payload)
+
+@app.callback(
+    Output('baseline-status', 'children'),
+    [Input('pin-baseline', 'n_clicks')],
+    [State('history-table', 'selected_rows'), State('history-table', 'data')],
+    prevent_initial_call=True
+)
+def pin_baseline(n_clicks, selected_rows, rows):
+    if not selected_rows:
+        return "Select a run to pin"
+    run = results_store.pin_baseline(rows[selected_rows[0]]['run_id'])
+    return f"Baseline for {run['workload_preset'] or '-'} / {run['storage_type'] or '-'}: {run['run_id']}"
+
+def sweep_started(sweep_id):
+    """Outputs of the sweep buttons once a sweep is requested; monitor_sweep takes over from here"""
+    return ({'sweep_id': sweep_id, 'rendered': 0}, False,
+            create_sweep_status(PublishedSweep(run_state.sweep(sweep_id), scheduler).progress()), [])
+
+@app.callback(
+    [Output('sweep-store', 'data'), Output('sweep-interval', 'disabled'),
+     Output('sweep-status', 'children'), Output('sweep-charts', 'children')],
+    [Input('sweep-button', 'n_clicks')],
+    [State('sweep-bs', 'value'), State('sweep-iodepth', 'value'), State('sweep-numjobs', 'value'),
+     State('sweep-adaptive', 'value'), State('sweep-slo', 'value'), State('sweep-min-gain', 'value'),
+     State('scenario', 'value'), State('workload_preset', 'value'), State('storage_type', 'value'),
+     State('direct', 'value'), State('size', 'value'), State('steady-state', 'value'), State('ioengine', 'value'),
+     State('target', 'value'), State('confirm-destructive', 'value'), State('cpus-allowed', 'value'),
+     State('numa-nodes', 'value'), State('precondition', 'value')],
+    prevent_initial_call=True
+)
+def run_sweep(n_clicks, block_sizes, queue_depths, job_counts, adaptive, p99_slo, min_gain,
+              scenario, workload_preset, storage_type, direct, size, steady, ioengine, target, confirm, cpus_allowed,
+              numa_nodes, precondition):
+    if not n_clicks:
+        return no_update, no_update, no_update, no_update
+
+    plan = expand_sweep(block_sizes or [], queue_depths or [], job_counts or [])
+    if not plan:
+        return no_update, no_update, create_error_status("Select at least one block size, queue depth and job count"), no_update
+
+    base = {'scenario': scenario, 'workload_preset': workload_preset, 'storage_type': storage_type,
+            'direct': direct, 'size': size, 'ioengine': ioengine,
+            'steady_state': defaults.section(config, 'steady_state') if steady else None,
+            'precondition': defaults.section(config, 'preconditioning') if precondition else None,
+            **placement_params(target, confirm, cpus_allowed, numa_nodes)}
+    if adaptive:
+        adaptive_config = defaults.section(config, 'adaptive')
+        sweep_id = request_sweep(
+            run_state, 'adaptive', block_sizes=block_sizes, queue_depths=queue_depths, job_counts=job_counts,
+            base=base, min_gain=min_gain / 100 if min_gain is not None else adaptive_config['min_gain'],
+            p99_slo_us=p99_slo or None, bisect_steps=adaptive_config['bisect_steps']
+        )
     else:
-        output_file = proc_info['output_file']
-        scenario_config = proc_info['scenario_config']
-        workload_config = proc_info['workload_config']
-
-        try:
-            with open(output_file, 'r') as f:
-                fio_data = json.load(f)
-            
-            charts = create_comprehensive_charts(fio_data, workload_config)
-            summary = create_status_summary(fio_data, workload_config, scenario_config)
-            
-            running_processes.pop(run_id, None)
-            return summary, charts, fio_data, True
-            
-        except Exception as e:
-            running_processes.pop(run_id, None)
-            return create_error_status(str(e)), "", {}, True
+        sweep_id = request_sweep(run_state, 'sweep', plan=plan, base=base)
+    return sweep_started(sweep_id)
+
+@app.callback(
+    [Output('sweep-store', 'data', allow_duplicate=True), Output('sweep-interval', 'disabled', allow_duplicate=True),
+     Output('sweep-status', 'children', allow_duplicate=True), Output('sweep-charts', 'children', allow_duplicate=True)],
+    [Input('compare-button', 'n_clicks')],
+    [State('compare-engines', 'value'), State('scenario', 'value'), State('workload_preset', 'value'),
+     State('storage_type', 'value'), State('direct', 'value'), State('bs', 'value'), State('numjobs', 'value'),
+     State('iodepth', 'value'), State('size', 'value'), State('target', 'value'),
+     State('confirm-destructive', 'value'), State('cpus-allowed', 'value'), State('numa-nodes', 'value')],
+    prevent_initial_call=True
+)
+def run_engine_comparison(n_clicks, engines, scenario, workload_preset, storage_type, direct, bs, numjobs, iodepth,
+                          size, target, confirm, cpus_allowed, numa_nodes):
+    if not n_clicks:
+        return no_update, no_update, no_update, no_update
+    if not engines or len(engines) < 2:
+        return no_update, no_update, create_error_status("Select at least two engines to compare"), no_update
+    try:
+        for engine in engines:
+            ioengines.validate(config, engine)
+    except ValueError as e:
+        return no_update, no_update, create_error_status(str(e)), no_update
+
+    base = {'scenario': scenario, 'workload_preset': workload_preset, 'storage_type': storage_type,
+            'direct': direct, 'bs': bs, 'numjobs': numjobs, 'iodepth': iodepth, 'size': size,
+            **placement_params(target, confirm, cpus_allowed, numa_nodes)}
+    return sweep_started(request_sweep(run_state, 'engines', engines=engines, base=base))
+
+@app.callback(
+    [Output('sweep-store', 'data', allow_duplicate=True), Output('sweep-interval', 'disabled', allow_duplicate=True),
+     Output('sweep-status', 'children', allow_duplicate=True), Output('sweep-charts', 'children', allow_duplicate=True)],
+    [Input('repeat-button', 'n_clicks')],
+    [State('repeat-min-runs', 'value'), State('repeat-max-runs', 'value'), State('repeat-target-ci', 'value'),
+     State('repeat-interleave', 'value'), State('sweep-bs', 'value'), State('sweep-iodepth', 'value'),
+     State('sweep-numjobs', 'value'), State('scenario', 'value'), State('workload_preset', 'value'),
+     State('storage_type', 'value'), State('direct', 'value'), State('bs', 'value'), State('numjobs', 'value'),
+     State('iodepth', 'value'), State('size', 'value'), State('ioengine', 'value'), State('target', 'value'),
+     State('confirm-destructive', 'value'), State('cpus-allowed', 'value'), State('numa-nodes', 'value')],
+    prevent_initial_call=True
+)
+def run_repeated(n_clicks, min_runs, max_runs, target_ci, interleave, block_sizes, queue_depths, job_counts,
+                 scenario, workload_preset, storage_type, direct, bs, numjobs, iodepth, size, ioengine, target, confirm,
+                 cpus_allowed, numa_nodes):
+    if not n_clicks:
+        return no_update, no_update, no_update, no_update
+
+    overrides = {key: value for key, value in (('min_runs', min_runs), ('max_runs', max_runs),
+                                               ('target_ci_pct', target_ci)) if value is not None}
+    criteria = defaults.section(config, 'repeatability', dict(overrides, interleave=bool(interleave)))
+    if criteria['max_runs'] < criteria['min_runs']:
+        return no_update, no_update, create_error_status("Max runs must be at least min runs"), no_update
+
+    configs = [{'bs': bs, 'iodepth': int(iodepth), 'numjobs': int(numjobs)}]
+    if interleave:
+        configs += [point for point in expand_sweep(block_sizes or [], queue_depths or [], job_counts or [])
+                    if point not in configs]
+    base = {'scenario': scenario, 'workload_preset': workload_preset, 'storage_type': storage_type,
+            'direct': direct, 'size': size, 'ioengine': ioengine,
+            **placement_params(target, confirm, cpus_allowed, numa_nodes)}
+    return sweep_started(request_sweep(run_state, 'repeat', configs=configs, base=base, criteria=criteria))
+
+@app.callback(
+    [Output('sweep-status', 'children', allow_duplicate=True), Output('sweep-charts', 'children', allow_duplicate=True),
+     Output('sweep-store', 'data', allow_duplicate=True), Output('sweep-interval', 'disabled', allow_duplicate=True)],
+    [Input('sweep-interval', 'n_intervals')],
+    [State('sweep-store', 'data')],
+    prevent_initial_call=True
+)
+def monitor_sweep(n, sweep_state):
+    sweep_id = (sweep_state or {}).get('sweep_id')
+    snapshot = run_state.sweep(sweep_id) if sweep_id else None
+    if not snapshot:
+        return no_update, no_update, no_update, True
+    sweep = PublishedSweep(snapshot, scheduler)
+
+    progress = sweep.progress()
+    finished = progress['status'] in FINISHED_STATUSES
+    results = list(sweep.results)
+
+    # Only rebuild the surfaces when another point has completed
+    if len(results) != sweep_state.get('rendered'):
+        if sweep.kind == 'engines':
+            charts = create_engine_comparison(ioengines.compare_engines(results))
+        elif sweep.kind == 'repeat':
+            charts = create_repeat_summary(sweep.report())
+        else:
+            charts = create_sweep_charts(results)
+        sweep_state = dict(sweep_state, rendered=len(results))
+    else:
+        charts, sweep_state = no_update, no_update
+
+    return create_sweep_status(progress), charts, sweep_state, finished
+
+@app.callback(
+    Output('queue-panel', 'children'),
+    [Input({'type': 'queue-action', 'action': ALL, 'run_id': ALL}, 'n_clicks'),
+     Input('active-run-store', 'data'), Input('run-finished-store', 'data'),
+     Input('log-interval', 'n_intervals'), Input('sweep-interval', 'n_intervals')]
+)
+def update_queue_panel(*_):
+    trigger = ctx.triggered_id
+    if isinstance(trigger, dict) and ctx.triggered[0]['value']:
+        if trigger['action'] == 'cancel':
+            scheduler.cancel(trigger['run_id'])
+        else:
+            scheduler.move(trigger['run_id'], -1 if trigger['action'] == 'up' else 1)
+    return create_queue_panel(scheduler.jobs())
+
+def start_background_services():
+    """Dispatch runs and sweeps from this process, unless a supervisor (supervisor.py) already owns the queue"""
+    global supervisor_lock
+    if scheduler.is_alive() or supervisor_lock is not None:
+        return
+    supervisor_lock = claim_supervisor(results_store.path)
+    if supervisor_lock is None:
+        print("Another process owns the run queue; showing its runs from the shared store", flush=True)
+        return
+    scheduler.start()
+    sweep_controller.start()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=8050, debug=True)
\ No newline at end of file
+    debug = os.environ.get('FLOWFIO_DEBUG', '1') == '1'
+    # With the debug reloader the module is imported in a watcher process too; only the
+    # serving child may own the scheduler, or queued runs would be dispatched twice
+    if not debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    app.run(host='0.0.0.0', port=int(os.environ.get('FLOWFIO_PORT', 8050)), debug=debug)
\ No newline at end of file
@@ -0,0 +1,89 @@
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+    push: {
+        // Open a Server-Sent Events channel for the active run; interval polling
+        // stays on as the fallback until the channel is confirmed open.
+        connect: function (activeRun) {
+            var self = window.dash_clientside.push;
+            if (self.source) {
+                self.source.close();
+                self.source = null;
+            }
+            if (!activeRun || !activeRun.run_id || !window.EventSource) {
+                return {connected: false};
+            }
+
+            var runId = activeRun.run_id;
+            var setProps = window.dash_clientside.set_props;
+            var source = new EventSource('/events/' + encodeURIComponent(runId));
+            self.source = source;
+
+            source.onopen = function () {
+                setProps('log-interval', {disabled: true});
+                setProps('push-state-store', {data: {run_id: runId, connected: true}});
+            };
+
+            source.addEventListener('progress', function (event) {
+                var payload = JSON.parse(event.data);
+                var samples = payload.samples;
+                var keys = self.traceKeys;
+                var xs = samples.map(function (s) { return s.t; });
+                setProps('live-graph', {extendData: [
+                    {
+                        x: keys.map(function () { return xs; }),
+                        y: keys.map(function (key) { return samples.map(function (s) { return s[key]; }); })
+                    },
+                    keys.map(function (_, i) { return i; }),
+                    self.maxPoints
+                ]});
+                setProps('live-cursor-store', {data: {run_id: runId, seq: payload.seq}});
+                setProps('progress-text', {children: self.progressLabel(payload.progress, payload.runtime)});
+                setProps('progress-bar', {style: self.barStyle(payload.progress)});
+                if (payload.log !== undefined) {
+                    setProps('live-log', {children: payload.log});
+                }
+            });
+
+            source.addEventListener('queued', function (event) {
+                var payload = JSON.parse(event.data);
+                setProps('progress-text', {children: 'Queued (position ' + payload.position + ' for this device)'});
+            });
+
+            source.addEventListener('done', function () {
+                source.close();
+                self.source = null;
+                setProps('run-finished-store', {data: {run_id: runId}});
+            });
+
+            source.onerror = function () {
+                if (source.readyState === EventSource.CLOSED) {
+                    self.source = null;
+                }
+                setProps('log-interval', {disabled: false});
+                setProps('push-state-store', {data: {run_id: runId, connected: false}});
+            };
+
+            return {run_id: runId, connected: false};
+        },
+
+        traceKeys: ['read_iops', 'write_iops', 'read_bw', 'write_bw', 'read_lat', 'write_lat'],
+        maxPoints: 3600,
+
+        progressLabel: function (progress, runtime) {
+            var remaining = Math.max(0, runtime - (progress / 100) * runtime);
+            var minutes = Math.floor(remaining / 60);
+            var seconds = Math.floor(remaining % 60);
+            var label = minutes > 0 ? minutes + 'm ' + seconds + 's' : seconds + 's';
+            return 'Running benchmark... (' + progress.toFixed(1) + '% complete, ' + label + ' remaining)';
+        },
+
+        barStyle: function (progress) {
+            return {
+                width: progress + '%',
+                height: '4px',
+                backgroundColor: '#10b981',
+                borderRadius: '2px',
+                transition: 'width 0.3s ease'
+            };
+        }
+    }
+});
@@ -0,0 +1,295 @@
+import argparse
+import contextlib
+import json
+import sys
+
+import yaml
+
+import defaults
+import ioengines
+import profiles
+import traces
+from engine import DATA_DIR, new_run_id, preset_parameters, run_to_completion
+from results_store import DEFAULT_DB_PATH, ResultsStore, compact_record, read_final_document
+from sweep import (AdaptiveSweepRunner, EngineComparisonRunner, RepeatRunner, SweepRunner, expand_sweep, tail_latency,
+                   total_iops)
+
+class InlineScheduler:
+    """Scheduler stand-in that runs each submitted point in the foreground, so sweeps run unattended"""
+
+    def __init__(self, config, store):
+        self.config = config
+        self.store = store
+        self.records = {}
+
+    def submit(self, params, priority=0, run_id=None):
+        run_id = run_id or new_run_id()
+        try:
+            self.records[run_id] = run_to_completion(self.config, self.store, params, run_id)
+        except (OSError, ValueError) as e:
+            print(f"Run {run_id} failed: {e}", file=sys.stderr, flush=True)
+            self.records[run_id] = None
+        return {'run_id': run_id}
+
+    def wait(self, run_id, timeout=None):
+        return self.records.get(run_id)
+
+    def cancel(self, run_id):
+        pass
+
+    def live_run(self, run_id):
+        return None
+
+def split_list(value):
+    return [item.strip() for item in value.split(',') if item.strip()] if value else []
+
+def describe(record):
+    """One human-readable line per run"""
+    setup = (f"profile={record['profile']}" if record.get('profile')
+             else f"bs={record['bs']} qd={record['iodepth']} jobs={record['numjobs']}")
+    line = (f"{record['run_id']}  {setup}  "
+            f"{total_iops(record):.0f} IOPS  {(record['read_bw'] or 0) + (record['write_bw'] or 0):.1f} MB/s  "
+            f"p99 {tail_latency(record):.1f}us")
+    if record.get('regression'):
+        line += f"  [{record['regression']} vs {record['baseline_run_id']}]"
+    return line
+
+def base_params(config, args):
+    """plan_run keyword arguments shared by every run of this invocation"""
+    bs, iodepth, numjobs = preset_parameters(config, args.workload, args.storage)
+    return {
+        'scenario': args.scenario,
+        'workload_preset': args.workload,
+        'storage_type': args.storage,
+        'direct': '0' if args.buffered else '1',
+        'bs': getattr(args, 'bs', None) or bs,
+        'iodepth': getattr(args, 'iodepth', None) or iodepth,
+        'numjobs': getattr(args, 'numjobs', None) or numjobs,
+        'size': args.size or config['scenarios'].get(args.scenario, {}).get('size', '1G'),
+        'steady_state': defaults.section(config, 'steady_state') if args.steady_state else None,
+        'latency_logs': defaults.section(config, 'latency_logs') if args.latency_log else None,
+        'hosts': split_list(args.hosts) or None,
+        'ioengine': getattr(args, 'ioengine', None),
+        'precondition': defaults.section(config, 'preconditioning') if args.precondition else None,
+        'target': args.target,
+        'confirm_destructive': args.confirm_destructive,
+        'cpus_allowed': args.cpus_allowed,
+        'numa_cpu_nodes': args.numa_nodes,
+        'trace': getattr(args, 'trace', None),
+        'replay_speed': getattr(args, 'replay_speed', None),
+        'profile': getattr(args, 'profile', None),
+        'timeout': args.timeout,
+    }
+
+def run_command(config, store, args):
+    scheduler = InlineScheduler(config, store)
+    record = scheduler.wait(scheduler.submit(base_params(config, args))['run_id'])
+    if record and record.get('profile'):
+        args.report = profiles.group_results(read_final_document(record['result_file']))
+    return [record] if record else []
+
+def sweep_command(config, store, args):
+    base = base_params(config, args)
+    for key in ('bs', 'iodepth', 'numjobs'):
+        base.pop(key)
+    block_sizes = split_list(args.bs) or config['block_sizes']
+    queue_depths = split_list(args.iodepth) or config['queue_depths']
+    job_counts = split_list(args.numjobs) or config['job_counts']
+
+    scheduler = InlineScheduler(config, store)
+    if args.adaptive:
+        adaptive = defaults.section(config, 'adaptive')
+        runner = AdaptiveSweepRunner(
+            block_sizes, queue_depths, job_counts, base, scheduler,
+            min_gain=args.min_gain / 100 if args.min_gain is not None else adaptive['min_gain'],
+            p99_slo_us=args.slo, bisect_steps=adaptive['bisect_steps']
+        )
+    else:
+        runner = SweepRunner(expand_sweep(block_sizes, queue_depths, job_counts), base, scheduler)
+    runner.run()
+    return runner.results
+
+def compare_command(config, store, args):
+    engines = split_list(args.engines) or defaults.section(config, 'engine_comparison').get('engines') \
+        or list(ioengines.configured_engines(config))
+    for engine in engines:
+        ioengines.validate(config, engine)
+    runner = EngineComparisonRunner(engines, base_params(config, args), InlineScheduler(config, store))
+    runner.run()
+    return runner.results
+
+def repeat_command(config, store, args):
+    base = base_params(config, args)
+    configs = expand_sweep(split_list(args.bs) or [base['bs']], split_list(args.iodepth) or [base['iodepth']],
+                           split_list(args.numjobs) or [base['numjobs']])
+    for key in ('bs', 'iodepth', 'numjobs'):
+        base.pop(key)
+    overrides = {key: value for key, value in (('min_runs', args.runs), ('max_runs', args.max_runs),
+                                               ('target_ci_pct', args.target_ci)) if value is not None}
+    if args.no_interleave:
+        overrides['interleave'] = False
+    criteria = defaults.section(config, 'repeatability', overrides)
+    if criteria['max_runs'] < criteria['min_runs']:
+        raise ValueError("--max-runs must be at least --runs")
+    runner = RepeatRunner(configs, base, InlineScheduler(config, store), criteria)
+    runner.run()
+    args.report = runner.report()
+    return runner.results
+
+def describe_repeats(report):
+    """Repeatability table: mean, stddev, CV and CI per configuration and metric"""
+    def number(value, digits=1):
+        return f"{value:,.{digits}f}" if value is not None else "n/a"
+
+    lines = []
+    for entry in report:
+        state = 'converged' if entry['converged'] else 'not converged'
+        lines.append(f"{entry['config']}: {entry['kept']}/{entry['runs']} runs kept, {state}"
+                     + (f", outliers {', '.join(entry['outliers'])}" if entry['outliers'] else ''))
+        for metric, stats in entry['metrics'].items():
+            lines.append(f"  {metric:<6}{number(stats['mean']):>14} ± {number(stats['stddev']):<12}"
+                         f"CV {number(stats['cv_pct'], 2):>6}%  CI {number(stats['ci_low'])} – "
+                         f"{number(stats['ci_high'])} ({number(stats['ci_width_pct'], 2)}%)")
+    return '\n'.join(lines)
+
+def describe_groups(report):
+    """Profile results per job group, then per job within it"""
+    def row(label, summary):
+        return (f"{label:<28}{summary['read_iops'] + summary['write_iops']:>12,.0f} IOPS"
+                f"{summary['read_bw'] + summary['write_bw']:>10.1f} MB/s  "
+                f"p99 r {summary['read_p99']:.1f} / w {summary['write_p99']:.1f}us")
+
+    lines = []
+    for entry in report:
+        lines.append(row(entry['group'], entry['summary']))
+        lines.extend(row(f"  {job}", summary) for job, summary in entry['jobs'].items())
+    return '\n'.join(lines)
+
+def describe_engines(records):
+    """Engine comparison table: IOPS and IOPS per CPU core"""
+    def number(value, digits=0):
+        return f"{value:,.{digits}f}" if value is not None else "n/a"
+
+    lines = [f"{'engine':<12}{'IOPS':>12}{'p99 us':>10}{'fio cores':>11}{'IOPS/core':>12}"
+             f"{'host cores':>12}{'IOPS/host core':>16}"]
+    for row in ioengines.compare_engines(records):
+        lines.append(f"{row['ioengine']:<12}{number(row['iops']):>12}{number(row['p99'], 1):>10}"
+                     f"{number(row['fio_cores'], 2):>11}{number(row['iops_per_core']):>12}"
+                     f"{number(row['host_cores'], 2):>12}{number(row['iops_per_host_core']):>16}")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run FlowFIO presets and sweeps without the dashboard")
+    parser.add_argument('--config', default='fio_defaults.yaml')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--json', action='store_true', help="emit JSON summaries on stdout")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="exit with status 2 if any run regressed against its baseline")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('presets', help="list workload presets, storage types and scenarios")
+    for name in ('run', 'sweep', 'compare-engines', 'repeat'):
+        command = commands.add_parser(name, help=f"{name} a workload preset")
+        command.add_argument('--workload', required=name != 'run', help="workload preset (run: or --trace/--profile)")
+        command.add_argument('--storage')
+        command.add_argument('--scenario', default='standard')
+        command.add_argument('--size')
+        command.add_argument('--buffered', action='store_true', help="run without direct I/O")
+        command.add_argument('--steady-state', action='store_true')
+        command.add_argument('--latency-log', action='store_true')
+        command.add_argument('--precondition', action='store_true',
+                             help="precondition the target first unless its recorded state is still valid")
+        command.add_argument('--hosts', help="comma-separated labels from distributed.hosts")
+        command.add_argument('--target', help="named target from the targets: section (default: fresh file per run)")
+        command.add_argument('--confirm-destructive', action='store_true',
+                             help="allow writes to raw block devices (destroys their data)")
+        command.add_argument('--cpus-allowed', help="fio cpus_allowed for every job, e.g. 0-15")
+        command.add_argument('--numa-nodes', help="fio numa_cpu_nodes for every job, e.g. 0")
+        command.add_argument('--timeout', type=float,
+                             help="interrupt each run after this many seconds (default from supervision:)")
+        lists = ' (comma-separated)' if name in ('sweep', 'repeat') else ''
+        command.add_argument('--bs', help=f"block size{lists}")
+        command.add_argument('--iodepth', help=f"queue depth{lists}")
+        command.add_argument('--numjobs', help=f"job count{lists}")
+        if name != 'compare-engines':
+            command.add_argument('--ioengine', help="engine from the ioengines: section (default common.ioengine)")
+    commands.choices['compare-engines'].add_argument(
+        '--engines', help="comma-separated engines (default engine_comparison.engines)")
+    run = commands.choices['run']
+    run.add_argument('--trace', help="replay an imported trace (python traces.py import) instead of a preset")
+    run.add_argument('--replay-speed', type=float, default=1.0,
+                     help="trace replay rate relative to the recording; 0 replays as fast as possible")
+    run.add_argument('--profile', help="multi-job profile from the profiles: section instead of a preset")
+    repeat = commands.choices['repeat']
+    repeat.add_argument('--runs', type=int, help="minimum runs per configuration (default repeatability.min_runs)")
+    repeat.add_argument('--max-runs', type=int, help="give up after this many runs per configuration")
+    repeat.add_argument('--target-ci', type=float, help="stop once the IOPS CI is narrower than this % of the mean")
+    repeat.add_argument('--no-interleave', action='store_true',
+                        help="finish each configuration before the next instead of running them round-robin")
+    sweep = commands.choices['sweep']
+    sweep.add_argument('--adaptive', action='store_true', help="stop each ladder at the saturation knee")
+    sweep.add_argument('--slo', type=float, help="p99 latency SLO in microseconds (adaptive)")
+    sweep.add_argument('--min-gain', type=float, help="minimum IOPS gain in percent (adaptive)")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+
+    if args.command == 'presets':
+        listing = {
+            'workloads': {k: v.get('name', k) for k, v in config['workloads'].items()},
+            'storage_types': {k: v.get('name', k) for k, v in config['storage_types'].items()},
+            'scenarios': list(config['scenarios']),
+            'ioengines': list(ioengines.configured_engines(config)),
+            'targets': {k: v.get('name', k) for k, v in config.get('targets', {}).items()},
+            'traces': traces.list_traces(DATA_DIR),
+            'profiles': {k: v.get('name', k) for k, v in config.get('profiles', {}).items()},
+        }
+        if args.json:
+            print(json.dumps(listing, indent=2))
+        else:
+            for section, items in listing.items():
+                print(f"{section}: {', '.join(items)}")
+        return 0
+
+    if args.workload not in config['workloads'] and not getattr(args, 'trace', None) \
+            and not getattr(args, 'profile', None):
+        parser.error(f"unknown workload preset {args.workload!r}")
+
+    store = ResultsStore(args.db)
+    commands = {'run': run_command, 'sweep': sweep_command, 'compare-engines': compare_command,
+                'repeat': repeat_command}
+    # Keep stdout clean for the JSON document; engine progress goes to stderr
+    with contextlib.redirect_stdout(sys.stderr if args.json else sys.stdout):
+        try:
+            records = commands[args.command](config, store, args)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.json:
+        summaries = [compact_record(record) for record in records]
+        if args.command == 'compare-engines':
+            summaries = {'runs': summaries, 'engines': ioengines.compare_engines(records)}
+        elif args.command == 'repeat':
+            summaries = {'runs': summaries, 'repeatability': args.report}
+        elif getattr(args, 'profile', None) and records:
+            summaries = {'runs': summaries, 'groups': args.report}
+        print(json.dumps(summaries, indent=2))
+    else:
+        for record in records:
+            print(describe(record))
+        if args.command == 'compare-engines' and records:
+            print(describe_engines(records))
+        if args.command == 'repeat' and records:
+            print(describe_repeats(args.report))
+        if getattr(args, 'profile', None) and records:
+            print(describe_groups(args.report))
+
+    if not records:
+        return 1
+    if args.fail_on_regression and any(record.get('regression') == 'regressed' for record in records):
+        return 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
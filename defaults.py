@@ -0,0 +1,20 @@
+import functools
+import os
+
+import yaml
+
+# The shipped config is the only source of defaults: a config that leaves out a section,
+# or a key in it, gets the shipped value
+DEFAULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fio_defaults.yaml')
+
+@functools.lru_cache(maxsize=None)
+def shipped():
+    with open(DEFAULTS_FILE) as f:
+        return yaml.safe_load(f)
+
+def section(config, name, overrides=None):
+    """A settings section of the config merged over the shipped one, then overrides on top"""
+    merged = dict(shipped().get(name) or {})
+    merged.update(config.get(name) or {})
+    merged.update(overrides or {})
+    return merged
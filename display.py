@@ -1,7 +1,26 @@
 from dash import dcc, html, dash_table
+import numpy as np
 import plotly.graph_objs as go
+from plotly.subplots import make_subplots
 from dash_iconify import DashIconify
 
+from analysis import DEFAULT_PERCENTILES, analyze
+from latency_logs import percentile_over_time
+from regression import METRICS
+
+POLL_INTERVAL_MS = 1000
+MAX_POLL_INTERVAL_MS = 8000
+SWEEP_POLL_INTERVAL_MS = 2000
+
+LIVE_TRACES = [
+    ('read_iops', 'Read IOPS', 1, '#10b981'),
+    ('write_iops', 'Write IOPS', 1, '#3b82f6'),
+    ('read_bw', 'Read MB/s', 2, '#10b981'),
+    ('write_bw', 'Write MB/s', 2, '#3b82f6'),
+    ('read_lat', 'Read Latency (μs)', 3, '#10b981'),
+    ('write_lat', 'Write Latency (μs)', 3, '#3b82f6'),
+]
+
 def create_layout():
     """Create the main dashboard layout"""
     return html.Div([
@@ -15,8 +34,16 @@ def create_layout():
                 create_sidebar(),
                 
                 html.Div([
+                    create_progress_panel(),
+                    html.Div(id='queue-panel'),
+                    html.Div(id='sweep-status'),
+                    html.Div(id='sweep-charts'),
                     html.Div(id='status'),
-                    html.Div(id='charts')
+                    html.Div([
+                        dcc.Graph(id='live-graph', figure=create_live_figure(), style={'height': '520px'})
+                    ], className='chart-container'),
+                    html.Div(id='charts'),
+                    create_history_section()
                 ], className='main-content')
                 
             ], className='layout')
@@ -25,7 +52,12 @@ def create_layout():
         
         dcc.Store(id='test-results-store'),
         dcc.Store(id='active-run-store'),
-        dcc.Interval(id='log-interval', interval=1000, n_intervals=0)
+        dcc.Store(id='live-cursor-store'),
+        dcc.Store(id='run-finished-store'),
+        dcc.Store(id='push-state-store'),
+        dcc.Store(id='sweep-store'),
+        dcc.Interval(id='log-interval', interval=POLL_INTERVAL_MS, n_intervals=0, disabled=True),
+        dcc.Interval(id='sweep-interval', interval=SWEEP_POLL_INTERVAL_MS, n_intervals=0, disabled=True)
     ])
 
 def create_sidebar():
@@ -95,36 +127,163 @@ def create_sidebar():
                 value='1G',
                 placeholder='e.g., 1G, 500M'
             ),
+            
+            html.Label("Convergence"),
+            dcc.Checklist(
+                id='steady-state',
+                options=[{'label': 'Stop early at steady state', 'value': 'steady'}],
+                value=[]
+            ),
+            dcc.Checklist(
+                id='precondition',
+                options=[{'label': 'Precondition target first (fill + write rounds)', 'value': 'precondition'}],
+                value=[]
+            ),
+            
+            html.Label("Latency Logs"),
+            dcc.Checklist(
+                id='latency-log',
+                options=[{'label': 'Record latency over time (heatmap)', 'value': 'log'}],
+                value=[]
+            ),
+            
+            html.Label("Hosts"),
+            dcc.Dropdown(id='hosts', multi=True, placeholder='Local only'),
+            
+            html.Label("I/O Engine"),
+            dcc.Dropdown(id='ioengine', clearable=False),
+            
+            html.Label("Target"),
+            dcc.Dropdown(id='target', placeholder='Fresh file per run'),
+            dcc.Checklist(
+                id='confirm-destructive',
+                options=[{'label': 'Allow destructive writes to raw devices', 'value': 'confirm'}],
+                value=[]
+            ),
+            
+            html.Label("CPUs Allowed"),
+            dcc.Input(id='cpus-allowed', type='text', placeholder='e.g., 0-15'),
+            
+            html.Label("NUMA Nodes"),
+            dcc.Input(id='numa-nodes', type='text', placeholder='e.g., 0'),
+            
+            html.Label("Job Profile"),
+            dcc.Dropdown(id='profile', placeholder='Single workload'),
+            
+            html.Label("Replay Trace"),
+            dcc.Dropdown(id='trace', placeholder='Synthetic preset'),
+            
+            html.Label("Replay Speed (×)"),
+            dcc.Input(id='replay-speed', type='number', value=1, min=0, step=0.25),
+            
+            html.Label("Timeout (s)"),
+            dcc.Input(id='run-timeout', type='number', min=1, placeholder='From runtime'),
+        ], className='control-section'),
+        
+        html.Div([
+            html.H4([
+                DashIconify(icon="mdi:engine", style={"marginRight": "6px"}),
+                "Engine Comparison"
+            ]),
+            
+            html.Label("Engines"),
+            dcc.Dropdown(id='compare-engines', multi=True),
+            
+            html.Button([
+                DashIconify(icon="mdi:compare-horizontal", style={"marginRight": "8px"}),
+                'Compare Engines'
+            ], id='compare-button', n_clicks=0, className='run-button'),
+        ], className='control-section'),
+        
+        html.Div([
+            html.H4([
+                DashIconify(icon="mdi:repeat", style={"marginRight": "6px"}),
+                "Repeatability"
+            ]),
+            
+            html.Label("Min / Max Runs"),
+            html.Div([
+                dcc.Input(id='repeat-min-runs', type='number', value=3, min=2, style={'width': '48%'}),
+                dcc.Input(id='repeat-max-runs', type='number', value=10, min=2, style={'width': '48%', 'float': 'right'}),
+            ]),
+            
+            html.Label("Target CI Width (% of mean)"),
+            dcc.Input(id='repeat-target-ci', type='number', value=5, min=0),
+            
+            dcc.Checklist(
+                id='repeat-interleave',
+                options=[{'label': 'Interleave with the sweep selections below', 'value': 'interleave'}],
+                value=[]
+            ),
+            
+            html.Button([
+                DashIconify(icon="mdi:repeat-variant", style={"marginRight": "8px"}),
+                'Run Repeated'
+            ], id='repeat-button', n_clicks=0, className='run-button'),
+        ], className='control-section'),
+        
+        html.Div([
+            html.H4([
+                DashIconify(icon="mdi:grid", style={"marginRight": "6px"}),
+                "Parameter Sweep"
+            ]),
+            
+            html.Label("Block Sizes"),
+            dcc.Dropdown(id='sweep-bs', multi=True),
+            
+            html.Label("Queue Depths"),
+            dcc.Dropdown(id='sweep-iodepth', multi=True),
+            
+            html.Label("Job Counts"),
+            dcc.Dropdown(id='sweep-numjobs', multi=True),
+            
+            dcc.Checklist(
+                id='sweep-adaptive',
+                options=[{'label': 'Adaptive (stop at saturation knee)', 'value': 'adaptive'}],
+                value=[]
+            ),
+            
+            html.Label("P99 SLO (μs)"),
+            dcc.Input(id='sweep-slo', type='number', placeholder='optional', min=0),
+            
+            html.Label("Min IOPS Gain (%)"),
+            dcc.Input(id='sweep-min-gain', type='number', value=5, min=0),
+            
+            html.Button([
+                DashIconify(icon="mdi:play-box-multiple", style={"marginRight": "8px"}),
+                'Run Sweep'
+            ], id='sweep-button', n_clicks=0, className='run-button'),
         ], className='control-section'),
                
     ], className='sidebar')
 
 def create_status_summary(fio_data, workload_config, scenario_config):
     """Create the status summary display after benchmark completion"""
-    job = fio_data['jobs'][0] if fio_data['jobs'] else {}
-    
-    read_iops = sum(j['read']['iops'] for j in fio_data['jobs'])
-    write_iops = sum(j['write']['iops'] for j in fio_data['jobs'])
-    read_bw = sum(j['read']['bw'] for j in fio_data['jobs']) / 1024
-    write_bw = sum(j['write']['bw'] for j in fio_data['jobs']) / 1024
+    stats = analyze(fio_data)
+    total = stats['total']
     
     return html.Div([
         html.Div([
             html.Div([
-                html.H4(f"{read_iops + write_iops:.0f}"),
+                html.H4(f"{total['iops']:.0f}"),
                 html.P("IOPS")
             ], className='metric-card-minimal'),
             
             html.Div([
-                html.H4(f"{read_bw + write_bw:.1f}"),
+                html.H4(f"{total['bw']:.1f}"),
                 html.P("MB/s")
             ], className='metric-card-minimal'),
             
             html.Div([
-                html.H4(f"{job.get('read', {}).get('lat_ns', {}).get('mean', 0) / 1000:.1f}"),
+                html.H4(f"{total['lat_mean']:.1f}"),
                 html.P("Latency (μs)")
             ], className='metric-card-minimal'),
             
+            html.Div([
+                html.H4(f"{total['percentiles'][99]:.1f}"),
+                html.P("P99 (μs)" if total['exact'] else "P99 (μs, upper bound)")
+            ], className='metric-card-minimal'),
+            
             html.Div([
                 html.H4(f"{scenario_config['runtime']}s"),
                 html.P("Duration")
@@ -133,47 +292,209 @@ def create_status_summary(fio_data, workload_config, scenario_config):
         
         html.Div([
             html.H4("Performance Breakdown"),
-            create_performance_table(fio_data)
+            create_performance_table(fio_data, stats)
         ], className='detailed-table', style={'marginTop': '24px'})
     ])
 
-def create_performance_table(fio_data):
-    """Create the detailed performance breakdown table"""
-    summary_data = []
-    
-    total_read_iops = sum(j['read']['iops'] for j in fio_data['jobs'])
-    total_write_iops = sum(j['write']['iops'] for j in fio_data['jobs'])
-    total_read_bw = sum(j['read']['bw'] for j in fio_data['jobs']) / 1024
-    total_write_bw = sum(j['write']['bw'] for j in fio_data['jobs']) / 1024
-    avg_read_lat = sum(j['read'].get('lat_ns', {}).get('mean', 0) for j in fio_data['jobs']) / len(fio_data['jobs']) / 1000
-    avg_write_lat = sum(j['write'].get('lat_ns', {}).get('mean', 0) for j in fio_data['jobs']) / len(fio_data['jobs']) / 1000
-    
-    summary_data.append({
-        'Metric': 'Read',
-        'IOPS': f"{total_read_iops:.0f}",
-        'Bandwidth (MB/s)': f"{total_read_bw:.1f}",
-        'Avg Latency (μs)': f"{avg_read_lat:.1f}",
-        'P95 Latency (μs)': f"{fio_data['jobs'][0]['read'].get('clat_ns', {}).get('percentile', {}).get('95.000000', 0) / 1000:.1f}" if fio_data['jobs'] else "0",
-        'P99 Latency (μs)': f"{fio_data['jobs'][0]['read'].get('clat_ns', {}).get('percentile', {}).get('99.000000', 0) / 1000:.1f}" if fio_data['jobs'] else "0"
-    })
-    
-    summary_data.append({
-        'Metric': 'Write',
-        'IOPS': f"{total_write_iops:.0f}",
-        'Bandwidth (MB/s)': f"{total_write_bw:.1f}",
-        'Avg Latency (μs)': f"{avg_write_lat:.1f}",
-        'P95 Latency (μs)': f"{fio_data['jobs'][0]['write'].get('clat_ns', {}).get('percentile', {}).get('95.000000', 0) / 1000:.1f}" if fio_data['jobs'] else "0",
-        'P99 Latency (μs)': f"{fio_data['jobs'][0]['write'].get('clat_ns', {}).get('percentile', {}).get('99.000000', 0) / 1000:.1f}" if fio_data['jobs'] else "0"
-    })
-    
-    summary_data.append({
-        'Metric': 'Total',
-        'IOPS': f"{total_read_iops + total_write_iops:.0f}",
-        'Bandwidth (MB/s)': f"{total_read_bw + total_write_bw:.1f}",
-        'Avg Latency (μs)': f"{(avg_read_lat + avg_write_lat) / 2:.1f}",
-        'P95 Latency (μs)': "-",
-        'P99 Latency (μs)': "-"
-    })
+def create_steady_state_notice(record):
+    """Create the convergence badge shown above a result when steady-state mode was on"""
+    state = record.get('steady_state')
+    if not state:
+        return html.Div()
+    if state == 'converged':
+        return html.Div([
+            DashIconify(icon="mdi:chart-line-variant", style={"marginRight": "8px"}),
+            f"Converged to steady state after {record.get('converged_at') or 0:.0f}s"
+        ], className='status-success', style={"display": "flex", "alignItems": "center"})
+    return html.Div([
+        DashIconify(icon="mdi:alert", style={"marginRight": "8px", "color": "#f59e0b"}),
+        "Did not reach steady state within the configured runtime"
+    ], className='status-error', style={"display": "flex", "alignItems": "center"})
+
+def create_host_breakdown(per_host):
+    """Create the per-host table and IOPS comparison for a distributed run"""
+    rows = [{
+        'Host': host,
+        'Read IOPS': f"{summary['read_iops']:.0f}",
+        'Write IOPS': f"{summary['write_iops']:.0f}",
+        'Read BW (MB/s)': f"{summary['read_bw']:.1f}",
+        'Write BW (MB/s)': f"{summary['write_bw']:.1f}",
+        'Read P99 (μs)': f"{summary['read_p99']:.1f}",
+        'Write P99 (μs)': f"{summary['write_p99']:.1f}",
+    } for host, summary in per_host.items()]
+
+    fig = go.Figure([
+        go.Bar(name='Read', x=list(per_host), y=[s['read_iops'] for s in per_host.values()], marker_color='#3b82f6'),
+        go.Bar(name='Write', x=list(per_host), y=[s['write_iops'] for s in per_host.values()], marker_color='#ef4444'),
+    ])
+    fig.update_layout(
+        title='IOPS per Host', barmode='stack', height=300, template='plotly_white',
+        margin=dict(l=40, r=20, t=50, b=40)
+    )
+
+    return html.Div([
+        html.H4("Per-Host Breakdown"),
+        dash_table.DataTable(
+            data=rows,
+            columns=[{'name': c, 'id': c} for c in rows[0]] if rows else [],
+            style_cell={'textAlign': 'center', 'padding': '8px'},
+            style_header={'backgroundColor': '#f8fafc', 'fontWeight': 'bold'}
+        ),
+        dcc.Graph(figure=fig, config={'displayModeBar': False})
+    ], className='detailed-table', style={'marginTop': '24px'})
+
+def create_profile_breakdown(groups):
+    """Create the per-group table (with each group's jobs) and IOPS comparison for a profile run"""
+    rows = []
+    for entry in groups:
+        for label, summary in [(entry['group'], entry['summary'])] + [
+                (f"{entry['group']} / {job}", job_summary) for job, job_summary in entry['jobs'].items()]:
+            rows.append({
+                'Group / Job': label,
+                'Read IOPS': f"{summary['read_iops']:.0f}",
+                'Write IOPS': f"{summary['write_iops']:.0f}",
+                'Read BW (MB/s)': f"{summary['read_bw']:.1f}",
+                'Write BW (MB/s)': f"{summary['write_bw']:.1f}",
+                'Read P99 (μs)': f"{summary['read_p99']:.1f}",
+                'Write P99 (μs)': f"{summary['write_p99']:.1f}",
+            })
+
+    names = [entry['group'] for entry in groups]
+    fig = go.Figure([
+        go.Bar(name='Read', x=names, y=[e['summary']['read_iops'] for e in groups], marker_color='#3b82f6'),
+        go.Bar(name='Write', x=names, y=[e['summary']['write_iops'] for e in groups], marker_color='#ef4444'),
+    ])
+    fig.update_layout(
+        title='IOPS per Job Group', barmode='stack', height=300, template='plotly_white',
+        margin=dict(l=40, r=20, t=50, b=40)
+    )
+
+    return html.Div([
+        html.H4("Per-Group Breakdown"),
+        dash_table.DataTable(
+            data=rows,
+            columns=[{'name': c, 'id': c} for c in rows[0]] if rows else [],
+            style_cell={'textAlign': 'center', 'padding': '8px'},
+            style_header={'backgroundColor': '#f8fafc', 'fontWeight': 'bold'}
+        ),
+        dcc.Graph(figure=fig, config={'displayModeBar': False})
+    ], className='detailed-table', style={'marginTop': '24px'})
+
+def create_baseline_comparison(comparison):
+    """Create the baseline diff table with the regression verdict"""
+    rows = [{
+        'Metric': row['label'],
+        'Baseline': f"{row['baseline']:.1f}",
+        'This Run': f"{row['candidate']:.1f}",
+        'Delta': f"{row['delta_pct']:+.1f}%",
+    } for row in comparison['metrics']]
+
+    if comparison['p_value'] is None:
+        significance = "Not enough samples for a significance test"
+    else:
+        basis = ('repeated runs' if comparison['basis'] == 'runs'
+                 else f"{comparison.get('block') or 1}-interval blocks of interval samples")
+        significance = (f"IOPS difference p = {comparison['p_value']:.3f} over {basis} "
+                        f"({'significant' if comparison['significant'] else 'not significant'})")
+
+    if comparison['regressed']:
+        verdict = html.Div([
+            DashIconify(icon="mdi:trending-down", style={"marginRight": "8px"}),
+            f"Regression against baseline {comparison['baseline_run_id']}"
+        ], className='status-error', style={"display": "flex", "alignItems": "center"})
+    else:
+        verdict = html.Div([
+            DashIconify(icon="mdi:check-circle", style={"marginRight": "8px"}),
+            f"Within threshold of baseline {comparison['baseline_run_id']}"
+        ], className='status-success', style={"display": "flex", "alignItems": "center"})
+
+    return html.Div([
+        html.H4("Baseline Comparison"),
+        verdict,
+        dash_table.DataTable(
+            data=rows,
+            columns=[{'name': c, 'id': c} for c in rows[0]],
+            style_cell={'textAlign': 'center', 'fontFamily': 'Segoe UI', 'fontSize': '13px', 'padding': '8px'},
+            style_header={'backgroundColor': 'transparent', 'fontWeight': 'bold', 'color': 'white'},
+            style_data={'backgroundColor': 'rgba(255, 255, 255, 0.05)', 'color': '#fafafa'},
+            style_data_conditional=[{
+                'if': {'row_index': index},
+                'backgroundColor': 'rgba(239, 68, 68, 0.15)',
+                'color': '#fca5a5'
+            } for index, row in enumerate(comparison['metrics']) if row['regressed']]
+        ),
+        html.P(significance, style={'color': '#a1a1aa', 'fontSize': '12px', 'marginTop': '8px'})
+    ], className='detailed-table', style={'marginTop': '24px'})
+
+DETAIL_SECTIONS = [
+    ('jobs', 'Per-Job Statistics'),
+    ('percentiles', 'Latency Percentiles'),
+    ('histogram', 'Latency Histogram'),
+]
+
+def create_detail_panels(run_id):
+    """Collapsible detail sections whose contents are fetched from the server when first opened"""
+    return html.Div([
+        html.Details([
+            html.Summary(label, style={'cursor': 'pointer', 'fontWeight': 'bold', 'padding': '6px 0'}),
+            html.Div(id={'type': 'detail-body', 'section': section, 'run_id': run_id})
+        ], id={'type': 'detail-panel', 'section': section, 'run_id': run_id}, open=False)
+        for section, label in DETAIL_SECTIONS
+    ], className='detailed-table', style={'marginTop': '24px'})
+
+def create_detail_section(section, payload):
+    """Render one lazily loaded detail section (see results_api.SECTIONS)"""
+    if section == 'jobs':
+        columns = [('host', 'Host'), ('job', 'Job'), ('read_iops', 'Read IOPS'), ('write_iops', 'Write IOPS'),
+                   ('read_bw', 'Read MB/s'), ('write_bw', 'Write MB/s'), ('read_lat_mean', 'Read Avg (μs)'),
+                   ('write_lat_mean', 'Write Avg (μs)'), ('read_p99', 'Read P99 (μs)'), ('write_p99', 'Write P99 (μs)')]
+        rows = [{key: f"{row[key]:.1f}" if isinstance(row[key], float) else row[key] for key, _ in columns}
+                for row in payload]
+        return dash_table.DataTable(
+            data=rows, columns=[{'name': name, 'id': key} for key, name in columns], page_size=20,
+            style_cell={'textAlign': 'center', 'fontFamily': 'Segoe UI', 'fontSize': '13px', 'padding': '6px'},
+            style_header={'backgroundColor': 'transparent', 'fontWeight': 'bold', 'color': 'white'},
+            style_data={'backgroundColor': 'rgba(255, 255, 255, 0.05)', 'color': '#fafafa'}
+        )
+
+    if section == 'percentiles':
+        ladders = {d: dict(payload[d]['percentiles']) for d in ('read', 'write', 'total')}
+        rows = [{
+            'Percentile': f"{p:g}",
+            **{d.title(): f"{ladders[d][p]:.1f}" if payload[d]['ios'] else '-' for d in ladders}
+        } for p in ladders['total']]
+        return dash_table.DataTable(
+            data=rows, columns=[{'name': c, 'id': c} for c in rows[0]] if rows else [],
+            style_cell={'textAlign': 'center', 'fontFamily': 'Segoe UI', 'fontSize': '13px', 'padding': '6px'},
+            style_header={'backgroundColor': 'transparent', 'fontWeight': 'bold', 'color': 'white'},
+            style_data={'backgroundColor': 'rgba(255, 255, 255, 0.05)', 'color': '#fafafa'}
+        )
+
+    if not payload:
+        return html.P("No histogram bins recorded (needs --output-format=json+)", style={'color': '#a1a1aa'})
+    fig = go.Figure([
+        go.Bar(x=data['latency_us'], y=data['count'], name=direction.title(),
+               marker_color='#10b981' if direction == 'read' else '#3b82f6')
+        for direction, data in payload.items()
+    ])
+    fig.update_layout(
+        xaxis_title='Latency (μs)', xaxis_type='log', yaxis_title='IOs', barmode='overlay',
+        plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Segoe UI', color='#fafafa', size=11), margin=dict(t=20, b=40, l=50, r=20)
+    )
+    return dcc.Graph(figure=fig, style={'height': '300px'})
+
+def create_performance_table(fio_data, stats=None):
+    """Create the detailed performance breakdown table; stats is a precomputed analysis.analyze result"""
+    stats = stats or analyze(fio_data)
+    summary_data = [{
+        'Metric': name,
+        'IOPS': f"{row['iops']:.0f}",
+        'Bandwidth (MB/s)': f"{row['bw']:.1f}",
+        'Avg Latency (μs)': f"{row['lat_mean']:.1f}",
+        'P95 Latency (μs)': ("" if row['exact'] else "≤ ") + f"{row['percentiles'][95]:.1f}",
+        'P99 Latency (μs)': ("" if row['exact'] else "≤ ") + f"{row['percentiles'][99]:.1f}"
+    } for name, row in (('Read', stats['read']), ('Write', stats['write']), ('Total', stats['total']))]
     
     return dash_table.DataTable(
         data=summary_data,
@@ -207,53 +528,144 @@ def create_performance_table(fio_data):
         }
     )
 
-def create_running_status(log_content, progress_percent, runtime):
-    """Create the running status display with progress bar and formatted logs"""
-    lines = log_content.split('\n')
-    
-    # Extract command from first line
-    command = ""
-    output_lines = []
+HISTORY_COLUMNS = [
+    ('run_id', 'Run'),
+    ('workload_preset', 'Workload'),
+    ('storage_type', 'Storage'),
+    ('bs', 'BS'),
+    ('iodepth', 'QD'),
+    ('numjobs', 'Jobs'),
+    ('total_iops', 'IOPS'),
+    ('total_bw', 'MB/s'),
+    ('read_p99', 'Read P99 (μs)'),
+    ('write_p99', 'Write P99 (μs)'),
+    ('steady_state', 'Steady State'),
+    ('regression', 'vs Baseline'),
+]
+
+def create_history_section():
+    """Create the run history browser backed by the results store"""
+    return html.Div([
+        html.H4([
+            DashIconify(icon="mdi:history", style={"marginRight": "8px"}),
+            "Run History"
+        ]),
+        html.Div([
+            dcc.Dropdown(id='history-workload', placeholder='All workloads', style={'width': '220px'}),
+            dcc.Dropdown(id='history-storage', placeholder='All storage types', style={'width': '220px'}),
+            html.Button([
+                DashIconify(icon="mdi:pin", style={"marginRight": "6px"}),
+                'Pin as Baseline'
+            ], id='pin-baseline', n_clicks=0, className='queue-button'),
+            html.Span(id='baseline-status', style={'alignSelf': 'center', 'color': '#a1a1aa', 'fontSize': '13px'}),
+        ], style={'display': 'flex', 'gap': '12px', 'padding': '16px 20px 0 20px'}),
+        dash_table.DataTable(
+            id='history-table',
+            columns=[{"name": name, "id": key} for key, name in HISTORY_COLUMNS],
+            data=[],
+            row_selectable='single',
+            page_size=15,
+            style_cell={
+                'textAlign': 'center',
+                'fontFamily': 'Segoe UI',
+                'fontSize': '13px',
+                'padding': '8px'
+            },
+            style_header={
+                'backgroundColor': 'transparent',
+                'fontWeight': 'bold',
+                'color': 'white',
+                'fontSize': '14px'
+            },
+            style_data={
+                'backgroundColor': 'rgba(255, 255, 255, 0.05)',
+                'color': '#fafafa'
+            }
+        )
+    ], className='detailed-table', style={'marginTop': '24px'})
+
+def history_rows(runs):
+    """Format stored run summaries for the history table"""
+    return [{
+        'run_id': run['run_id'],
+        'workload_preset': run['workload_preset'] or '-',
+        'storage_type': run['storage_type'] or '-',
+        'bs': run['bs'],
+        'iodepth': run['iodepth'],
+        'numjobs': run['numjobs'],
+        'total_iops': f"{(run['read_iops'] or 0) + (run['write_iops'] or 0):.0f}",
+        'total_bw': f"{(run['read_bw'] or 0) + (run['write_bw'] or 0):.1f}",
+        'read_p99': f"{run['read_p99'] or 0:.1f}",
+        'write_p99': f"{run['write_p99'] or 0:.1f}",
+        'steady_state': (run.get('steady_state') or '-').replace('_', ' '),
+        'regression': run.get('regression') or '-',
+    } for run in runs]
+
+def create_progress_panel():
+    """Create the persistent run progress panel whose pieces are updated in place"""
+    return html.Div([
+        html.Div(id='run-command'),
+        html.Div([
+            html.Div([
+                DashIconify(icon="mdi:loading", className="spin", style={"marginRight": "8px"}),
+                html.Span(id='progress-text')
+            ], style={"display": "flex", "alignItems": "center", "marginBottom": "8px", "color": "#10b981"}),
+            html.Div([
+                html.Div(id='progress-bar', style=progress_bar_style(0))
+            ], style={
+                "width": "100%",
+                "height": "4px",
+                "backgroundColor": "rgba(113, 113, 122, 0.3)",
+                "borderRadius": "2px",
+                "overflow": "hidden"
+            })
+        ], style={"marginBottom": "16px"}),
+        html.H4("Live Output:", style={"color": "#fafafa", "marginBottom": "8px"}),
+        html.Pre(id='live-log', style={
+            "fontFamily": "monospace",
+            "fontSize": "11px",
+            "color": "#a1a1aa",
+            "backgroundColor": "rgba(0, 0, 0, 0.3)",
+            "padding": "12px",
+            "borderRadius": "4px",
+            "whiteSpace": "pre-wrap",
+            "maxHeight": "200px",
+            "overflowY": "auto"
+        })
+    ], id='run-progress', style={'display': 'none'})
+
+def create_command_display(command):
+    """Create the command block shown once when a run starts"""
+    cmd_parts = command.split(' ')
+    formatted_cmd = []
+    current_line = ""
     
-    for line in lines:
-        if line.startswith("Command: "):
-            command = line[9:]  # Remove "Command: " prefix
+    for part in cmd_parts:
+        if len(current_line + part) > 80:
+            formatted_cmd.append(current_line.strip())
+            current_line = part + " "
         else:
-            output_lines.append(line)
+            current_line += part + " "
     
-    # Format command with line breaks
-    if command:
-        cmd_parts = command.split(' ')
-        formatted_cmd = []
-        current_line = ""
-        
-        for part in cmd_parts:
-            if len(current_line + part) > 80:
-                formatted_cmd.append(current_line.strip())
-                current_line = part + " "
-            else:
-                current_line += part + " "
-        
-        if current_line.strip():
-            formatted_cmd.append(current_line.strip())
-        
-        command_display = html.Div([
-            html.H4("Running Command:", style={"color": "#10b981", "marginBottom": "8px"}),
-            html.Pre('\n'.join(formatted_cmd), style={
-                "fontFamily": "monospace",
-                "fontSize": "11px",
-                "color": "#fafafa",
-                "backgroundColor": "rgba(16, 185, 129, 0.1)",
-                "padding": "12px",
-                "borderRadius": "4px",
-                "marginBottom": "16px",
-                "whiteSpace": "pre-wrap"
-            })
-        ])
-    else:
-        command_display = html.Div()
+    if current_line.strip():
+        formatted_cmd.append(current_line.strip())
     
-    # Calculate remaining time
+    return html.Div([
+        html.H4("Running Command:", style={"color": "#10b981", "marginBottom": "8px"}),
+        html.Pre('\n'.join(formatted_cmd), style={
+            "fontFamily": "monospace",
+            "fontSize": "11px",
+            "color": "#fafafa",
+            "backgroundColor": "rgba(16, 185, 129, 0.1)",
+            "padding": "12px",
+            "borderRadius": "4px",
+            "marginBottom": "16px",
+            "whiteSpace": "pre-wrap"
+        })
+    ])
+
+def progress_label(progress_percent, runtime):
+    """Format the progress line with percentage and time remaining"""
     remaining_seconds = max(0, runtime - (progress_percent / 100) * runtime)
     remaining_minutes = int(remaining_seconds // 60)
     remaining_secs = int(remaining_seconds % 60)
@@ -263,58 +675,17 @@ def create_running_status(log_content, progress_percent, runtime):
     else:
         time_remaining = f"{remaining_secs}s"
     
-    # Progress bar
-    progress_bar = html.Div([
-        html.Div([
-            html.Div([
-                html.Div([
-                    DashIconify(icon="mdi:loading", className="spin", style={"marginRight": "8px"}),
-                    f"Running benchmark... ({progress_percent:.1f}% complete, {time_remaining} remaining)"
-                ], style={"display": "flex", "alignItems": "center", "marginBottom": "8px", "color": "#10b981"}),
-                html.Div([
-                    html.Div(style={
-                        "width": f"{progress_percent}%",
-                        "height": "4px",
-                        "backgroundColor": "#10b981",
-                        "borderRadius": "2px",
-                        "transition": "width 0.3s ease"
-                    })
-                ], style={
-                    "width": "100%",
-                    "height": "4px",
-                    "backgroundColor": "rgba(113, 113, 122, 0.3)",
-                    "borderRadius": "2px",
-                    "overflow": "hidden"
-                })
-            ])
-        ], style={"marginBottom": "16px"})
-    ])
-    
-    # Format output logs
-    output_content = '\n'.join(output_lines[-10:])  # Last 10 lines
-    if output_content.strip():
-        log_display = html.Div([
-            html.H4("Live Output:", style={"color": "#fafafa", "marginBottom": "8px"}),
-            html.Pre(output_content, style={
-                "fontFamily": "monospace",
-                "fontSize": "11px",
-                "color": "#a1a1aa",
-                "backgroundColor": "rgba(0, 0, 0, 0.3)",
-                "padding": "12px",
-                "borderRadius": "4px",
-                "whiteSpace": "pre-wrap",
-                "maxHeight": "200px",
-                "overflowY": "auto"
-            })
-        ])
-    else:
-        log_display = html.Div()
-    
-    return html.Div([
-        command_display,
-        progress_bar,
-        log_display
-    ])
+    return f"Running benchmark... ({progress_percent:.1f}% complete, {time_remaining} remaining)"
+
+def progress_bar_style(progress_percent):
+    """Style for the filled part of the progress bar"""
+    return {
+        "width": f"{progress_percent}%",
+        "height": "4px",
+        "backgroundColor": "#10b981",
+        "borderRadius": "2px",
+        "transition": "width 0.3s ease"
+    }
 
 def create_error_status(error_message):
     """Create error status display"""
@@ -338,10 +709,9 @@ def create_comprehensive_charts(fio_data, workload_config):
     """Create all performance charts"""
     charts = []
     
-    total_read_iops = sum(j['read']['iops'] for j in fio_data['jobs'])
-    total_write_iops = sum(j['write']['iops'] for j in fio_data['jobs'])
-    total_read_bw = sum(j['read']['bw'] for j in fio_data['jobs']) / 1024
-    total_write_bw = sum(j['write']['bw'] for j in fio_data['jobs']) / 1024
+    stats = analyze(fio_data, DEFAULT_PERCENTILES)
+    total_read_iops, total_write_iops = stats['read']['iops'], stats['write']['iops']
+    total_read_bw, total_write_bw = stats['read']['bw'], stats['write']['bw']
     
     charts_row1 = html.Div([
         html.Div([
@@ -364,7 +734,7 @@ def create_comprehensive_charts(fio_data, workload_config):
     if fio_data['jobs']:
         lat_chart = html.Div([
             dcc.Graph(
-                figure=create_latency_chart(fio_data['jobs'][0]),
+                figure=create_latency_chart(stats['read'], stats['write']),
                 style={'height': '350px'}
             )
         ], className='chart-container')
@@ -418,16 +788,13 @@ def create_bandwidth_chart(read_bw, write_bw):
     )
     return fig
 
-def create_latency_chart(job):
-    """Create latency percentile chart"""
-    read_percentiles = job['read'].get('clat_ns', {}).get('percentile', {})
-    write_percentiles = job['write'].get('clat_ns', {}).get('percentile', {})
-    
+def create_latency_chart(read_stats, write_stats):
+    """Create latency percentile chart from merged read/write statistics (see analysis.analyze)"""
     fig = go.Figure()
     
-    if read_percentiles:
-        percentiles = [float(p) for p in read_percentiles.keys()]
-        read_lats = [v / 1000 for v in read_percentiles.values()]
+    if read_stats['ios']:
+        percentiles = list(read_stats['percentiles'].keys())
+        read_lats = list(read_stats['percentiles'].values())
         fig.add_trace(go.Scatter(
             x=percentiles, y=read_lats, name='Read',
             mode='lines+markers', 
@@ -435,9 +802,9 @@ def create_latency_chart(job):
             marker=dict(size=4, color='#fafafa')
         ))
     
-    if write_percentiles:
-        percentiles = [float(p) for p in write_percentiles.keys()]
-        write_lats = [v / 1000 for v in write_percentiles.values()]
+    if write_stats['ios']:
+        percentiles = list(write_stats['percentiles'].keys())
+        write_lats = list(write_stats['percentiles'].values())
         fig.add_trace(go.Scatter(
             x=percentiles, y=write_lats, name='Write',
             mode='lines+markers', 
@@ -464,4 +831,447 @@ def create_latency_chart(job):
             gridwidth=1
         )
     )
-    return fig
\ No newline at end of file
+    return fig
+def create_latency_heatmap(heatmap):
+    """Create the time x latency heatmap from server-side binned counts (see latency_logs)"""
+    time_edges, lat_edges, counts = heatmap['time_edges'], heatmap['lat_edges'], heatmap['counts']
+    times = (time_edges[:-1] + time_edges[1:]) / 2
+    latencies = np.sqrt(lat_edges[:-1] * lat_edges[1:])
+    # Trim empty latency rows so the colour range is spent on the populated band
+    populated = np.flatnonzero(counts.sum(axis=0))
+    rows = slice(populated[0], populated[-1] + 1) if len(populated) else slice(None)
+    z = np.where(counts > 0, np.log10(np.maximum(counts, 1)), np.nan).T[rows]
+
+    fig = go.Figure(go.Heatmap(
+        x=times, y=latencies[rows], z=z, colorscale='Viridis',
+        customdata=counts.T[rows],
+        hovertemplate='%{x:.1f}s, ~%{y:.1f}μs: %{customdata:.0f} IOs<extra></extra>',
+        colorbar=dict(title='log10 IOs')
+    ))
+    fig.add_trace(go.Scatter(
+        x=times, y=percentile_over_time(heatmap, 99), name='P99', mode='lines',
+        line=dict(color='#fafafa', width=1.5)
+    ))
+    fig.update_layout(
+        title=dict(text='Completion Latency over Time', font=dict(size=16, color='#fafafa'), x=0.5),
+        xaxis_title='Time (s)',
+        yaxis_title='Latency (μs)',
+        yaxis_type='log',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Segoe UI', color='#fafafa', size=11),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=60, b=40, l=50, r=40)
+    )
+    return html.Div([dcc.Graph(figure=fig, style={'height': '380px'})], className='chart-container')
+
+def create_telemetry_chart(fio_samples, telemetry_data):
+    """Plot host telemetry under fio throughput on one time axis, with the sampler's own overhead"""
+    samples = telemetry_data['samples']
+    times = [s['t'] for s in samples]
+    fig = make_subplots(rows=4, cols=1, shared_xaxes=True, vertical_spacing=0.05,
+                        subplot_titles=('Throughput (IOPS)', 'Host CPU (%)', 'fio CPU (cores)',
+                                        'Disk Busy / Memory (%)'))
+
+    fig.add_trace(go.Scatter(x=[s['t'] for s in fio_samples], y=[s['read_iops'] + s['write_iops'] for s in fio_samples],
+                             name='IOPS', mode='lines', line=dict(color='#10b981', width=2)), row=1, col=1)
+    for key, name, color in (('cpu_user', 'user', '#3b82f6'), ('cpu_system', 'system', '#8b5cf6'),
+                             ('cpu_iowait', 'iowait', '#f59e0b')):
+        fig.add_trace(go.Scatter(x=times, y=[s[key] for s in samples], name=name, mode='lines',
+                                 stackgroup='cpu', line=dict(color=color, width=1)), row=2, col=1)
+    fig.add_trace(go.Scatter(x=times, y=[s['fio_cpu_pct'] / 100 for s in samples], name='fio',
+                             mode='lines', line=dict(color='#ef4444', width=2)), row=3, col=1)
+    disks = sorted({disk for s in samples for disk in s['disks']})
+    for disk in disks:
+        fig.add_trace(go.Scatter(x=times, y=[s['disks'].get(disk, {}).get('busy_pct') for s in samples],
+                                 name=f'{disk} busy', mode='lines'), row=4, col=1)
+    fig.add_trace(go.Scatter(x=times, y=[s['mem_used_pct'] for s in samples], name='memory used',
+                             mode='lines', line=dict(color='#a1a1aa', dash='dot')), row=4, col=1)
+
+    fig.update_layout(
+        title=dict(text='Host Telemetry', font=dict(size=16, color='#fafafa'), x=0.5),
+        height=640,
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Segoe UI', color='#fafafa', size=11),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=80, b=40, l=50, r=40)
+    )
+    fig.update_xaxes(title_text='Time (s)', row=4, col=1)
+
+    overhead = telemetry_data.get('overhead', {})
+    return html.Div([
+        dcc.Graph(figure=fig),
+        html.P(
+            f"Sampler overhead: {overhead.get('pct_of_one_core', 0):.2f}% of one core "
+            f"({overhead.get('mean_sample_ms', 0):.1f} ms per sample every {telemetry_data.get('interval')}s)",
+            style={'color': '#a1a1aa', 'fontSize': '12px', 'textAlign': 'right'}
+        )
+    ], className='chart-container')
+
+def create_live_figure():
+    """Create the empty live time series figure that interval samples are appended to"""
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, vertical_spacing=0.06,
+                        subplot_titles=('IOPS', 'Bandwidth (MB/s)', 'Latency (μs)'))
+    for _, name, row, color in LIVE_TRACES:
+        fig.add_trace(go.Scatter(
+            x=[], y=[], name=name, mode='lines',
+            line=dict(color=color, width=2, dash='solid' if name.startswith('Read') else 'dot')
+        ), row=row, col=1)
+
+    fig.update_layout(
+        title=dict(text='Live Metrics', font=dict(size=16, color='#fafafa'), x=0.5),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Segoe UI', color='#fafafa', size=11),
+        legend=dict(orientation="h", yanchor="bottom", y=1.04, xanchor="right", x=1),
+        margin=dict(t=70, b=40, l=50, r=40),
+        uirevision='live'
+    )
+    fig.update_xaxes(gridcolor='rgba(113, 113, 122, 0.1)')
+    fig.update_yaxes(gridcolor='rgba(113, 113, 122, 0.1)')
+    fig.update_xaxes(title_text='Elapsed (s)', row=3, col=1)
+    return fig
+
+def live_figure_extension(samples, max_points):
+    """Build the extendData payload that appends new samples to the live figure"""
+    xs = [s['t'] for s in samples]
+    return (
+        dict(x=[xs] * len(LIVE_TRACES), y=[[s[key] for s in samples] for key, _, _, _ in LIVE_TRACES]),
+        list(range(len(LIVE_TRACES))),
+        max_points
+    )
+
+def create_sweep_status(progress):
+    """Create the combined progress view for a running or finished sweep"""
+    total = progress['total'] or 1
+    percent = progress['completed'] / total * 100
+    point = progress['current_point']
+    sample = progress['current_sample']
+
+    if progress['status'] == 'running' and point:
+        headline = (f"Sweep point {progress['completed'] + 1}/{progress['total']}: "
+                    + ' '.join(f"{key}={value}" for key, value in point.items()))
+    else:
+        headline = f"Sweep {progress['status']}: {progress['completed']}/{progress['total']} points"
+    if progress['failed']:
+        headline += f" ({progress['failed']} failed)"
+
+    details = []
+    best = progress.get('best')
+    if best:
+        details.append(html.P(
+            f"Best under SLO: bs={best['bs']} iodepth={best['iodepth']} numjobs={best['numjobs']} "
+            f"({best['iops']:.0f} IOPS, p99 {best['p99']:.1f} μs)",
+            style={"color": "#fafafa", "fontSize": "13px"}
+        ))
+    for knee in progress.get('knees', []):
+        details.append(html.P(
+            f"Knee bs={knee['bs']} numjobs={knee['numjobs']}: iodepth {knee['iodepth']} ({knee['reason']})",
+            style={"color": "#a1a1aa", "fontSize": "12px"}
+        ))
+    if sample:
+        details.append(html.P(
+            f"Current: {sample['read_iops'] + sample['write_iops']:.0f} IOPS, "
+            f"{sample['read_bw'] + sample['write_bw']:.1f} MB/s",
+            style={"color": "#a1a1aa", "fontSize": "13px"}
+        ))
+
+    return html.Div([
+        html.Div([
+            DashIconify(icon="mdi:loading" if progress['status'] in ('pending', 'running') else "mdi:check-circle",
+                        className="spin" if progress['status'] in ('pending', 'running') else None,
+                        style={"marginRight": "8px"}),
+            headline
+        ], style={"display": "flex", "alignItems": "center", "marginBottom": "8px", "color": "#10b981"}),
+        html.Div([
+            html.Div(style=progress_bar_style(percent))
+        ], style={
+            "width": "100%",
+            "height": "4px",
+            "backgroundColor": "rgba(113, 113, 122, 0.3)",
+            "borderRadius": "2px",
+            "overflow": "hidden",
+            "marginBottom": "8px"
+        }),
+        *details
+    ], className='status-success')
+
+def create_sweep_charts(results):
+    """Create IOPS and tail latency curves over queue depth, one line per block size (and job count)"""
+    if not results:
+        return []
+
+    multiple_job_counts = len({r['numjobs'] for r in results}) > 1
+    series = {}
+    for record in sorted(results, key=lambda r: r['iodepth']):
+        name = f"{record['bs']} × {record['numjobs']} jobs" if multiple_job_counts else record['bs']
+        series.setdefault(name, []).append(record)
+
+    iops_fig = go.Figure()
+    lat_fig = go.Figure()
+    for name, records in series.items():
+        qds = [r['iodepth'] for r in records]
+        iops_fig.add_trace(go.Scatter(
+            x=qds, y=[(r['read_iops'] or 0) + (r['write_iops'] or 0) for r in records],
+            name=name, mode='lines+markers'
+        ))
+        lat_fig.add_trace(go.Scatter(
+            x=qds, y=[max(r['read_p99'] or 0, r['write_p99'] or 0) for r in records],
+            name=name, mode='lines+markers'
+        ))
+
+    for fig, title, y_title in ((iops_fig, 'IOPS vs Queue Depth', 'IOPS'),
+                                (lat_fig, 'P99 Latency vs Queue Depth', 'Latency (μs)')):
+        fig.update_layout(
+            title=dict(text=title, font=dict(size=16, color='#fafafa'), x=0.5),
+            xaxis_title='Queue Depth',
+            yaxis_title=y_title,
+            xaxis_type='log',
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family='Segoe UI', color='#fafafa', size=11),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            margin=dict(t=60, b=40, l=50, r=40),
+            xaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)'),
+            yaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)')
+        )
+    lat_fig.update_layout(yaxis_type='log')
+
+    return html.Div([
+        html.Div([
+            dcc.Graph(figure=iops_fig, style={'height': '350px'})
+        ], style={'width': '48%', 'display': 'inline-block'}),
+        html.Div([
+            dcc.Graph(figure=lat_fig, style={'height': '350px'})
+        ], style={'width': '48%', 'float': 'right', 'display': 'inline-block'})
+    ], className='chart-container')
+
+def create_precondition_chart(curve):
+    """Create the preconditioning convergence curve: IOPS per round with the steady-state window"""
+    rounds = curve['rounds']
+    fig = go.Figure(go.Scatter(
+        x=[r['round'] for r in rounds], y=[r['iops'] for r in rounds],
+        name='Round IOPS', mode='lines+markers', line=dict(color='#10b981')
+    ))
+
+    window = [r for r in rounds if r.get('mean') is not None]
+    last = (next((r for r in rounds if r['round'] == curve['converged_round']), None)
+            if curve['converged_round'] else (window[-1] if window else None))
+    if last is not None:
+        start = last['round'] - curve['window_rounds'] + 1
+        mean = last['mean']
+        fig.add_vrect(x0=start - 0.5, x1=last['round'] + 0.5, fillcolor='rgba(16, 185, 129, 0.08)', line_width=0)
+        fig.add_trace(go.Scatter(
+            x=[start, last['round']], y=[mean, mean], name='Window mean', mode='lines',
+            line=dict(color='#a1a1aa', dash='dash')
+        ))
+        for factor in (1 - curve['max_range_pct'] / 200, 1 + curve['max_range_pct'] / 200):
+            fig.add_trace(go.Scatter(
+                x=[start, last['round']], y=[mean * factor] * 2, mode='lines', showlegend=False,
+                line=dict(color='#6366f1', dash='dot', width=1)
+            ))
+
+    fig.update_layout(
+        title=dict(text='Preconditioning Convergence', font=dict(size=16, color='#fafafa'), x=0.5),
+        xaxis_title='Round',
+        yaxis_title='IOPS',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Segoe UI', color='#fafafa', size=11),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=60, b=40, l=50, r=40),
+        xaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)', dtick=1),
+        yaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)')
+    )
+
+    if last is not None:
+        verdict = (f"Steady at round {curve['converged_round']}" if curve['converged_round']
+                   else f"Not steady after {len(rounds)} rounds")
+        verdict += (f": window range {last['range_pct']:.1f}% (≤ {curve['max_range_pct']:g}%), "
+                    f"slope {last['slope_pct']:.1f}% (≤ {curve['max_slope_pct']:g}%)")
+    else:
+        verdict = f"Stopped after {len(rounds)} rounds, fewer than the {curve['window_rounds']}-round window"
+    return html.Div([
+        dcc.Graph(figure=fig, style={'height': '350px'}),
+        html.P(f"{curve['target']} preconditioned {curve['completed']}. {verdict}", style={"color": "#a1a1aa", "fontSize": "12px"})
+    ], className='chart-container')
+
+def create_engine_comparison(rows):
+    """Create IOPS and IOPS-per-core bars for the same workload run on several I/O engines"""
+    if not rows:
+        return []
+
+    engines = [row['ioengine'] for row in rows]
+    iops_fig = go.Figure(go.Bar(x=engines, y=[row['iops'] for row in rows], name='IOPS', marker_color='#10b981'))
+    core_fig = go.Figure([
+        go.Bar(x=engines, y=[row['iops_per_core'] for row in rows], name='per fio core', marker_color='#10b981'),
+        go.Bar(x=engines, y=[row['iops_per_host_core'] for row in rows], name='per busy host core',
+               marker_color='#6366f1'),
+    ])
+
+    for fig, title, y_title in ((iops_fig, 'IOPS by Engine', 'IOPS'),
+                                (core_fig, 'IOPS per CPU Core', 'IOPS / core')):
+        fig.update_layout(
+            title=dict(text=title, font=dict(size=16, color='#fafafa'), x=0.5),
+            yaxis_title=y_title,
+            barmode='group',
+            plot_bgcolor='rgba(0,0,0,0)',
+            paper_bgcolor='rgba(0,0,0,0)',
+            font=dict(family='Segoe UI', color='#fafafa', size=11),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+            margin=dict(t=60, b=40, l=50, r=40),
+            yaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)')
+        )
+
+    def number(value, digits=0):
+        return f"{value:,.{digits}f}" if value is not None else "n/a"
+
+    table = dash_table.DataTable(
+        data=[{
+            'ioengine': row['ioengine'],
+            'iops': number(row['iops']),
+            'p99': number(row['p99'], 1),
+            'fio_cores': number(row['fio_cores'], 2),
+            'iops_per_core': number(row['iops_per_core']),
+            'host_cores': number(row['host_cores'], 2),
+            'iops_per_host_core': number(row['iops_per_host_core']),
+        } for row in rows],
+        columns=[{'name': name, 'id': key} for key, name in (
+            ('ioengine', 'Engine'), ('iops', 'IOPS'), ('p99', 'P99 (μs)'), ('fio_cores', 'fio Cores'),
+            ('iops_per_core', 'IOPS / fio Core'), ('host_cores', 'Busy Host Cores'),
+            ('iops_per_host_core', 'IOPS / Host Core'))],
+        style_cell={'textAlign': 'center', 'fontFamily': 'Segoe UI', 'fontSize': '13px', 'padding': '6px'},
+        style_header={'backgroundColor': 'transparent', 'fontWeight': 'bold', 'color': 'white'},
+        style_data={'backgroundColor': 'rgba(255, 255, 255, 0.05)', 'color': '#fafafa'}
+    )
+
+    return html.Div([
+        html.Div([
+            dcc.Graph(figure=iops_fig, style={'height': '350px'})
+        ], style={'width': '48%', 'display': 'inline-block'}),
+        html.Div([
+            dcc.Graph(figure=core_fig, style={'height': '350px'})
+        ], style={'width': '48%', 'float': 'right', 'display': 'inline-block'}),
+        table
+    ], className='chart-container')
+
+def create_repeat_summary(report):
+    """Create per-run IOPS by configuration (outliers crossed) and the mean / stddev / CV / CI table"""
+    if not report or not any(entry['runs'] for entry in report):
+        return []
+
+    fig = go.Figure()
+    for entry in report:
+        rejected = set(entry['outliers'])
+        kept = [(n + 1, iops) for n, (run_id, iops) in enumerate(zip(entry['run_ids'], entry['iops']))
+                if run_id not in rejected]
+        dropped = [(n + 1, iops) for n, (run_id, iops) in enumerate(zip(entry['run_ids'], entry['iops']))
+                   if run_id in rejected]
+        fig.add_trace(go.Scatter(
+            x=[x for x, _ in kept], y=[y for _, y in kept], name=entry['config'], mode='markers',
+            marker=dict(size=9)
+        ))
+        if dropped:
+            fig.add_trace(go.Scatter(
+                x=[x for x, _ in dropped], y=[y for _, y in dropped], name=f"{entry['config']} (outlier)",
+                mode='markers', marker=dict(size=11, symbol='x', color='#ef4444')
+            ))
+        stats = entry['metrics'].get('iops')
+        if stats and stats['ci_low'] is not None:
+            fig.add_hrect(y0=stats['ci_low'], y1=stats['ci_high'], fillcolor='rgba(16, 185, 129, 0.1)', line_width=0)
+    fig.update_layout(
+        title=dict(text='IOPS per Repeat', font=dict(size=16, color='#fafafa'), x=0.5),
+        xaxis_title='Run',
+        yaxis_title='IOPS',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(family='Segoe UI', color='#fafafa', size=11),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        margin=dict(t=60, b=40, l=50, r=40),
+        xaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)', dtick=1),
+        yaxis=dict(gridcolor='rgba(113, 113, 122, 0.1)')
+    )
+
+    def number(value, digits=1):
+        return f"{value:,.{digits}f}" if value is not None else "n/a"
+
+    rows = []
+    for entry in report:
+        for metric, label, _ in METRICS:
+            stats = entry['metrics'].get(metric)
+            if not stats:
+                continue
+            rows.append({
+                'config': entry['config'],
+                'metric': label,
+                'runs': f"{entry['kept']}/{entry['runs']}",
+                'mean': number(stats['mean']),
+                'stddev': number(stats['stddev']),
+                'cv': number(stats['cv_pct'], 2),
+                'ci': f"{number(stats['ci_low'])} – {number(stats['ci_high'])}",
+                'ci_width': number(stats['ci_width_pct'], 2),
+                'state': 'converged' if entry['converged'] else 'not converged',
+            })
+    table = dash_table.DataTable(
+        data=rows,
+        columns=[{'name': name, 'id': key} for key, name in (
+            ('config', 'Configuration'), ('metric', 'Metric'), ('runs', 'Kept Runs'), ('mean', 'Mean'),
+            ('stddev', 'Stddev'), ('cv', 'CV %'), ('ci', 'CI'), ('ci_width', 'CI Width %'), ('state', 'Stopping Rule'))],
+        style_cell={'textAlign': 'center', 'fontFamily': 'Segoe UI', 'fontSize': '13px', 'padding': '6px'},
+        style_header={'backgroundColor': 'transparent', 'fontWeight': 'bold', 'color': 'white'},
+        style_data={'backgroundColor': 'rgba(255, 255, 255, 0.05)', 'color': '#fafafa'}
+    )
+
+    return html.Div([
+        dcc.Graph(figure=fig, style={'height': '350px'}),
+        table
+    ], className='chart-container')
+
+def create_queue_panel(jobs):
+    """Create the run queue listing with reorder and cancel controls"""
+    if not jobs:
+        return html.Div()
+
+    rows = []
+    for job in jobs:
+        params = job['params']
+        if params.get('stage') == 'precondition':
+            description = f"precondition {params.get('target')} for {params.get('workload_preset')} bs={params.get('bs')}"
+        elif params.get('profile'):
+            description = f"profile {params['profile']}"
+        elif params.get('trace'):
+            speed = params.get('replay_speed')
+            description = f"replay {params['trace']} at {f'{speed}×' if speed else 'full speed'} iodepth={params.get('iodepth')}"
+        else:
+            description = (f"{params.get('workload_preset')} bs={params.get('bs')} "
+                           f"iodepth={params.get('iodepth')} numjobs={params.get('numjobs')}")
+        controls = [
+            html.Button(DashIconify(icon="mdi:close"), title='Cancel', className='queue-button',
+                        id={'type': 'queue-action', 'action': 'cancel', 'run_id': job['run_id']})
+        ]
+        if job['status'] == 'queued':
+            controls = [
+                html.Button(DashIconify(icon="mdi:arrow-up"), title='Move up', className='queue-button',
+                            id={'type': 'queue-action', 'action': 'up', 'run_id': job['run_id']}),
+                html.Button(DashIconify(icon="mdi:arrow-down"), title='Move down', className='queue-button',
+                            id={'type': 'queue-action', 'action': 'down', 'run_id': job['run_id']}),
+            ] + controls
+
+        rows.append(html.Div([
+            DashIconify(icon="mdi:loading" if job['status'] == 'running' else "mdi:timer-sand",
+                        className="spin" if job['status'] == 'running' else None,
+                        style={"marginRight": "8px", "color": "#10b981"}),
+            html.Span(job['run_id'], style={"fontFamily": "monospace", "marginRight": "12px"}),
+            html.Span(description, style={"color": "#a1a1aa", "flex": "1"}),
+            html.Span(job['device'], style={"color": "#71717a", "marginRight": "12px", "fontSize": "12px"}),
+            *controls
+        ], style={"display": "flex", "alignItems": "center", "padding": "6px 0"}))
+
+    return html.Div([
+        html.H4([
+            DashIconify(icon="mdi:tray-full", style={"marginRight": "8px"}),
+            f"Run Queue ({len(jobs)})"
+        ], style={"color": "#fafafa", "marginBottom": "8px"}),
+        *rows
+    ], className='chart-container')
@@ -0,0 +1,91 @@
+import argparse
+import ipaddress
+import socket
+import subprocess
+import time
+
+from results_store import summarize_fio
+
+DEFAULT_PORT = 8765
+
+def host_addresses(config, labels):
+    """Resolve host labels from the distributed: section into (label, fio address) pairs"""
+    hosts = config.get('distributed', {}).get('hosts', {})
+    missing = [label for label in labels if label not in hosts]
+    if missing:
+        raise ValueError(f"Unknown fio hosts: {', '.join(missing)}")
+    return [(label, hosts[label]) for label in labels]
+
+def host_data_dir(config, label):
+    """Directory on a host for per-run test files and relative target paths.
+
+    This host's data directory means nothing on the remote side, so it comes from
+    distributed.data_dirs (per label) or distributed.remote_data_dir.
+    """
+    section = config.get('distributed', {})
+    data_dir = (section.get('data_dirs') or {}).get(label) or section.get('remote_data_dir')
+    if not data_dir:
+        raise ValueError(f"No data directory for fio host {label!r}; set distributed.remote_data_dir "
+                         f"or distributed.data_dirs.{label}")
+    return data_dir
+
+def client_args(host_job_files):
+    """fio client flags: each --client is followed by the job file that host should run"""
+    args = []
+    for address, job_file in host_job_files:
+        args.extend([f'--client={address}', job_file])
+    return args
+
+def is_local_address(address):
+    """True for a fio --client address on this machine: loopback, a unix socket or this host's name"""
+    host = address.split(',', 1)[0]
+    if host.startswith('sock:'):
+        return True
+    if host.startswith(('ip:', 'ip6:')):
+        host = host.split(':', 1)[1]
+    host = host.strip('[]')
+    if host in ('localhost', socket.gethostname()):
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+def host_device(label):
+    """Scheduler device key of a remote host"""
+    return f'host:{label}'
+
+def per_host_summaries(fio_data):
+    """Summaries keyed by hostname from a normalized client-mode document"""
+    by_host = {}
+    for job in fio_data.get('jobs', []):
+        by_host.setdefault(job.get('hostname', 'local'), []).append(job)
+    return {host: summarize_fio({'jobs': jobs}) for host, jobs in sorted(by_host.items())}
+
+def start_local_agents(count, base_port=DEFAULT_PORT):
+    """Start fio --server agents on localhost to stand in for remote hosts"""
+    agents = []
+    for index in range(count):
+        port = base_port + index
+        agents.append(subprocess.Popen(['fio', f'--server=ip:127.0.0.1,{port}']))
+        print(f"fio agent listening on localhost,{port}", flush=True)
+    return agents
+
+def main():
+    parser = argparse.ArgumentParser(description="Run local fio server agents for distributed testing")
+    parser.add_argument('--local-agents', type=int, default=2)
+    parser.add_argument('--base-port', type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    agents = start_local_agents(args.local_agents, args.base_port)
+    try:
+        while all(agent.poll() is None for agent in agents):
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for agent in agents:
+            agent.terminate()
+
+if __name__ == '__main__':
+    main()
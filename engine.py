@@ -0,0 +1,583 @@
+import os
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+import psutil
+
+from streaming import FioStatusStream
+from distributed import client_args, host_addresses, host_data_dir, host_device, is_local_address
+from steady_state import SteadyStateWatcher, fio_steadystate_options, verdict
+from preconditioning import PreconditionWatcher
+from latency_logs import fio_log_options
+import defaults
+import ioengines
+import preconditioning
+import profiles
+import regression
+import supervision
+import targets
+import telemetry
+import traces
+
+DATA_DIR = os.environ.get('FLOWFIO_DATA_DIR', '/app/test-data')
+
+# common: keys that control reporting rather than the job; output_args passes these
+REPORTING_OPTIONS = ('output_format', 'status_interval')
+
+def new_run_id():
+    return datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+
+def device_for_path(path):
+    """Map a target path to the block device backing it, so runs on one disk are serialized"""
+    if path.startswith('/dev/'):
+        return os.path.realpath(path)
+    path = os.path.realpath(path)
+    best = None
+    for partition in psutil.disk_partitions(all=True):
+        mount = partition.mountpoint
+        if path == mount or path.startswith(mount.rstrip('/') + '/'):
+            if best is None or len(mount) > len(best.mountpoint):
+                best = partition
+    return best.device if best and best.device else path
+
+def path_devices(paths):
+    """Scheduler device keys of local paths; a file counts against the disk holding its directory"""
+    return {device_for_path(path if path.startswith('/dev/') else os.path.dirname(path)) for path in paths}
+
+def client_devices(config, remote):
+    """Scheduler device keys of a client-mode run from {host label: resolved targets}.
+
+    A remote host is one key. Agents on this machine (distributed.py --local-agents) drive
+    its own disks, so they take the keys of their paths and queue behind local runs there.
+    """
+    keys = set()
+    for label, address in host_addresses(config, remote):
+        if is_local_address(address):
+            keys.update(path_devices(t['path'] for t in remote[label]))
+        else:
+            keys.add(host_device(label))
+    return ','.join(sorted(keys))
+
+def preset_parameters(config, workload_preset, storage_type):
+    """Default (bs, iodepth, numjobs) for a workload preset, tuned by the storage type's recommendations"""
+    if not workload_preset or workload_preset not in config['workloads']:
+        return '4k', '32', '4'
+
+    workload = config['workloads'][workload_preset]
+    bs = workload.get('bs', '4k')
+    iodepth = str(workload.get('iodepth', 32))
+    numjobs = str(workload.get('numjobs', 4))
+
+    if storage_type and storage_type in config['storage_types']:
+        storage = config['storage_types'][storage_type]
+        iodepth = str(storage.get('recommended_iodepth', iodepth))
+        numjobs = str(storage.get('recommended_numjobs', numjobs))
+
+    return bs, iodepth, numjobs
+
+def base_job_options(config, ioengine=None):
+    """Options shared by every job: the common: section plus the chosen ioengine and its YAML options"""
+    common = config.get('common', {})
+    options = {key: value for key, value in common.items() if key not in REPORTING_OPTIONS}
+    options.update(ioengines.engine_options(config, ioengine or ioengines.default_engine(config)))
+    return options
+
+def job_options(scenario_config, workload_config, bs, numjobs, iodepth, size, direct, filename, steady_state=None,
+                latency_logs=None, base_options=None):
+    """Resolve the fio job options for one benchmark, independent of how they are passed to fio"""
+    rw = workload_config.get('rw', 'randread')
+    rwmixread = workload_config.get('rwmixread', 100)
+
+    options = {
+        'time_based': True,
+        'group_reporting': True,
+        'ioengine': ioengines.DEFAULT_ENGINE,
+        **(base_options or {}),
+        'filename': filename,
+        'direct': direct,
+        'rw': rw,
+        'bs': bs,
+        'numjobs': numjobs,
+        'iodepth': iodepth,
+        'size': size,
+        'runtime': scenario_config["runtime"],
+        'ramp_time': scenario_config["ramp_time"],
+    }
+
+    if 'rw' in rw and rwmixread < 100:
+        options['rwmixread'] = rwmixread
+
+    # Presets derived from traces mix block sizes and sequential/random IO
+    for key in ('bssplit', 'percentage_random'):
+        if key in workload_config:
+            options[key] = workload_config[key]
+
+    if steady_state and steady_state.get('mode') == 'fio':
+        options.update(fio_steadystate_options(steady_state, scenario_config['ramp_time']))
+
+    if latency_logs:
+        options.update(fio_log_options(latency_logs))
+
+    # false in the YAML means "leave the flag off"; no filename means each job section names its own
+    return {key: value for key, value in options.items() if value is not False and value is not None}
+
+def output_args(config, output_file):
+    """Reporting flags shared by local and client-mode invocations"""
+    return [
+        '--output-format=json+',
+        f'--status-interval={config["common"].get("status_interval", 1)}',
+        f'--output={output_file}',
+    ]
+
+def cli_args(options):
+    """Render job options as fio command line flags; True means a bare flag"""
+    return [f'--{key}' if value is True else f'--{key}={value}' for key, value in options.items()]
+
+def render_job_file(global_options, jobs):
+    """Render fio job file text from [global] options and an ordered list of (name, options) sections"""
+    lines = []
+    for name, options in [('global', global_options)] + list(jobs):
+        lines.append(f'[{name}]')
+        lines.extend(key if value is True else f'{key}={value}' for key, value in options.items())
+        lines.append('')
+    return '\n'.join(lines)
+
+def build_fio_command(config, scenario_config, workload_config, bs, numjobs, iodepth, size, direct,
+                      output_file, run_id, steady_state=None, latency_logs=None, ioengine=None, resolved=None,
+                      pinning=None, replay=None):
+    """Build the fio command line for one benchmark run; resolved is targets.resolve() output.
+
+    replay is an optional (trace profile, speed) pair that replays an imported trace onto
+    the target instead of generating the workload.
+    """
+    resolved = resolved or targets.resolve(config, None, DATA_DIR, run_id)
+    filename, jobs = targets.job_sections(f'test_{run_id}', resolved)
+    base_options = dict(base_job_options(config, ioengine), **(pinning or {}))
+    options = job_options(scenario_config, workload_config, bs, numjobs, iodepth, size, direct,
+                          filename, steady_state, latency_logs, base_options)
+    if replay:
+        options = traces.replay_job_options(options, *replay)
+    # Options before the first --name are global; each --name starts a job section
+    sections = [arg for name, job in jobs for arg in [f'--name={name}'] + cli_args(job)]
+    return ['fio'] + cli_args(options) + output_args(config, output_file) + sections
+
+def profile_job_file(config, scenario_config, sections, size, direct, target, latency_logs=None, ioengine=None,
+                     pinning=None):
+    """Job file text for a compiled profile: the run's target, size and timing in [global], one section per job"""
+    base_options = {**base_job_options(config, ioengine), **(pinning or {}), **target['options']}
+    options = job_options(scenario_config, {}, None, None, None, size, direct, targets.escape_filename(target['path']),
+                          latency_logs=latency_logs, base_options=base_options)
+    # Each section sets its own pattern
+    options.pop('rw')
+    return render_job_file(options, sections)
+
+def remote_targets(config, target, run_id, label):
+    """A target resolved on a fio host, in that host's data directory"""
+    return targets.resolve(config, target, host_data_dir(config, label), f'{run_id}_{label}')
+
+def plan_client_run(config, scenario_config, workload_config, bs, numjobs, iodepth, size, direct,
+                    output_file, run_id, hosts, steady_state=None, latency_logs=None, ioengine=None, target=None,
+                    pinning=None):
+    """Plan the same job on several fio --server hosts; returns (command, job files).
+
+    Test files and relative target paths are resolved in each host's own data directory
+    (see distributed.host_data_dir); the job files themselves stay here, fio sends them.
+    """
+    if latency_logs:
+        raise ValueError("Latency logs are written on each fio host, where they cannot be read back; "
+                         "record them with a local run")
+    job_files = {}
+    host_job_files = []
+    base_options = dict(base_job_options(config, ioengine), **(pinning or {}))
+    for label, address in host_addresses(config, hosts):
+        filename, jobs = targets.job_sections(f'test_{run_id}', remote_targets(config, target, run_id, label))
+        options = job_options(scenario_config, workload_config, bs, numjobs, iodepth, size, direct,
+                              filename, steady_state, latency_logs, base_options)
+        path = f'{DATA_DIR}/job_{run_id}_{label}.fio'
+        job_files[path] = render_job_file(options, jobs)
+        host_job_files.append((address, path))
+    return ['fio'] + output_args(config, output_file) + client_args(host_job_files), job_files
+
+def plan_run(config, scenario, workload_preset, storage_type, direct, bs, numjobs, iodepth, size, run_id=None,
+             steady_state=None, sweep_id=None, hosts=None, latency_logs=None, ioengine=None, target=None,
+             cpus_allowed=None, numa_cpu_nodes=None, confirm_destructive=False, precondition_run_id=None, trace=None,
+             replay_speed=1.0, timeout=None, profile=None):
+    """Resolve a run's configuration, paths and command without starting anything.
+
+    steady_state is an optional criteria dict (the steady_state section); in watch mode
+    the run is interrupted as soon as the live samples converge. hosts is an optional
+    list of labels from the distributed: config section to run the job on via fio's
+    client/server mode instead of locally. latency_logs is an optional settings dict
+    (the latency_logs section) that makes fio write completion latency logs. ioengine
+    names an engine under ioengines: (default common.ioengine); it and its options are
+    checked against fio --enghelp. target names an entry under targets: (default: a
+    fresh file per run); writes to raw block devices need confirm_destructive.
+    cpus_allowed / numa_cpu_nodes pin every job (targets may pin their own job).
+    trace names an imported trace (see traces.py) to replay instead of the preset, at
+    replay_speed times its recorded rate (0: as fast as possible); the run is recorded
+    under the workload preset 'trace:<name>' so replays of one trace compare with each other.
+    timeout (seconds) overrides the limit derived from the runtime (see supervision.run_timeout).
+    profile names a multi-job profile under profiles: (see profiles.py) compiled to a job file
+    in place of the preset; the scenario's runtime applies to each stage that sets none.
+    """
+    scenario_config = config['scenarios'].get(scenario, config['scenarios']['standard'])
+    workload_config = config['workloads'].get(workload_preset, config['workloads']['oltp'])
+    replay = None
+    if trace:
+        if hosts:
+            raise ValueError("Trace replay runs locally; the imported iolog lives on this host")
+        if steady_state:
+            raise ValueError("A trace replay ends with the trace; steady-state detection does not apply")
+        info = traces.load(DATA_DIR, trace)
+        replay_speed = float(replay_speed if replay_speed is not None else 1.0)
+        replay = (info, replay_speed)
+        workload_preset = f'trace:{trace}'
+        workload_config = dict(traces.derive_preset(info), iodepth=iodepth)
+        expected = traces.expected_duration(info, replay_speed)
+        scenario_config = dict(scenario_config, runtime=round(expected) if expected else scenario_config['runtime'],
+                               ramp_time=0)
+        bs, numjobs = workload_config['bs'], '1'
+    compiled = None
+    if profile:
+        if hosts:
+            raise ValueError("A profile compiles to one local job file; client mode runs a single workload")
+        if steady_state:
+            raise ValueError("A multi-stage profile has no single steady state to detect")
+        if trace:
+            raise ValueError("Pick either a trace or a profile")
+        profile_config = profiles.get(config, profile)
+        compiled = profiles.compile_jobs(config, profile_config)
+        workload_preset = f'profile:{profile}'
+        workload_config = {'rw': profiles.summary_rw([options['rw'] for _, options in compiled])}
+        bs = iodepth = numjobs = None
+
+    ioengine = ioengine or ioengines.default_engine(config)
+    ioengines.validate(config, ioengine)
+
+    run_id = run_id or new_run_id()
+    output_file = f'{DATA_DIR}/results_{run_id}.json'
+    log_file = f'{DATA_DIR}/log_{run_id}.txt'
+    if latency_logs:
+        latency_logs = dict(latency_logs, prefix=f'{DATA_DIR}/latency_{run_id}')
+
+    rw = workload_config.get('rw', 'randread')
+    pinning = {key: value for key, value in (('cpus_allowed', cpus_allowed), ('numa_cpu_nodes', numa_cpu_nodes))
+               if value not in (None, '')}
+
+    job_files = {}
+    device = None
+    if hosts:
+        # Target paths are host-local, resolved against each host's data directory
+        remote = {label: remote_targets(config, target, run_id, label) for label in hosts}
+        targets.check_destructive([t['path'] for entries in remote.values() for t in entries], rw,
+                                  confirm_destructive, local=False)
+        fio_cmd, job_files = plan_client_run(config, scenario_config, workload_config, bs, numjobs, iodepth, size,
+                                             direct, output_file, run_id, hosts, steady_state, latency_logs, ioengine,
+                                             target, pinning)
+        device = client_devices(config, remote)
+        target_paths = []
+    else:
+        resolved = targets.resolve(config, target, DATA_DIR, run_id)
+        target_paths = [t['path'] for t in resolved]
+        if replay and len(resolved) > 1:
+            raise ValueError("A trace replays onto a single path; pick a target with one path")
+        if compiled and len(resolved) > 1:
+            raise ValueError("A profile's jobs share one path; pick a target with one path")
+        targets.check_destructive(target_paths, rw, confirm_destructive)
+        if compiled:
+            job_file = f'{DATA_DIR}/job_{run_id}.fio'
+            job_files[job_file] = profile_job_file(config, scenario_config, compiled, size, direct, resolved[0],
+                                                   latency_logs, ioengine, pinning)
+            fio_cmd = ['fio'] + output_args(config, output_file) + [job_file]
+            scenario_config = dict(scenario_config, runtime=profiles.expected_runtime(
+                profile_config, scenario_config['runtime'], scenario_config['ramp_time']))
+        else:
+            fio_cmd = build_fio_command(config, scenario_config, workload_config, bs, numjobs, iodepth, size, direct,
+                                        output_file, run_id, steady_state, latency_logs, ioengine, resolved, pinning,
+                                        replay)
+
+    return {
+        "run_id": run_id,
+        "fio_cmd": fio_cmd,
+        "command": ' '.join(fio_cmd),
+        "targets": target_paths,
+        "device": device,
+        "job_files": job_files,
+        "output_file": output_file,
+        "log_file": log_file,
+        "scenario_config": scenario_config,
+        "workload_config": workload_config,
+        "runtime": scenario_config["runtime"],
+        "timeout": timeout,
+        "steady_state": steady_state,
+        "regression": defaults.section(config, 'regression'),
+        "telemetry": telemetry.settings(config),
+        "supervision": defaults.section(config, 'supervision'),
+        "settled": threading.Event(),
+        "record": {
+            "run_id": run_id,
+            "timestamp": time.time(),
+            "workload_preset": workload_preset,
+            "storage_type": storage_type,
+            "scenario": scenario,
+            "rw": rw,
+            "rwmixread": workload_config.get('rwmixread', 100),
+            "bs": bs,
+            "ioengine": ioengine,
+            "iodepth": int(iodepth) if iodepth is not None else None,
+            "numjobs": int(numjobs) if numjobs is not None else None,
+            "direct": int(direct),
+            "runtime": scenario_config["runtime"],
+            "result_file": output_file,
+            "log_file": log_file,
+            "sweep_id": sweep_id,
+            "hosts": ','.join(hosts) if hosts else None,
+            "latency_log": latency_logs['prefix'] if latency_logs else None,
+            "target": target,
+            "cpus_allowed": pinning.get('cpus_allowed'),
+            "numa_cpu_nodes": pinning.get('numa_cpu_nodes'),
+            "precondition_run_id": precondition_run_id,
+            "trace": trace,
+            "replay_speed": replay[1] if replay else None,
+            "profile": profile,
+        }
+    }
+
+def plan_precondition(config, workload_preset, bs, size, target, criteria, run_id=None, ioengine=None,
+                      confirm_destructive=False, cpus_allowed=None, numa_cpu_nodes=None):
+    """Plan a preconditioning stage for a named target.
+
+    One fio invocation: fill_passes sequential passes over the test range, then
+    (after a stonewall) rounds of the preset's write pattern that PreconditionWatcher
+    stops once the round averages reach steady state, or after max_rounds rounds.
+    """
+    if not target:
+        raise ValueError("Preconditioning needs a named target; per-run test files always start fresh")
+    workload_config = config['workloads'].get(workload_preset, config['workloads']['oltp'])
+    run_id = run_id or new_run_id()
+    output_file = f'{DATA_DIR}/results_{run_id}.json'
+    log_file = f'{DATA_DIR}/log_{run_id}.txt'
+    job_file = f'{DATA_DIR}/job_{run_id}.fio'
+
+    rw = preconditioning.round_workload(workload_config.get('rw', 'randread'))
+    resolved = targets.resolve(config, target, DATA_DIR, run_id)
+    paths = [t['path'] for t in resolved]
+    targets.check_destructive(paths, rw, confirm_destructive)
+
+    global_options = dict(base_job_options(config, ioengine), direct=1, size=size)
+    global_options.pop('time_based', None)
+    global_options.update((key, value) for key, value in (('cpus_allowed', cpus_allowed),
+                                                          ('numa_cpu_nodes', numa_cpu_nodes)) if value)
+    rounds_runtime = criteria['max_rounds'] * criteria['round_seconds']
+    fill_jobs, round_jobs = [], []
+    for index, entry in enumerate(resolved):
+        filename = targets.escape_filename(entry['path'])
+        fill_jobs.append((f'{preconditioning.FILL_JOB}_{index}', dict({
+            'filename': filename, 'rw': 'write', 'bs': criteria['fill_bs'],
+            'iodepth': criteria['fill_iodepth'], 'loops': criteria['fill_passes'],
+        }, **entry['options'])))
+        rounds = {'filename': filename, 'rw': rw, 'bs': bs, 'iodepth': criteria['round_iodepth'],
+                  'numjobs': criteria['round_numjobs'], 'time_based': True, 'runtime': rounds_runtime}
+        if 'rw' in rw and workload_config.get('rwmixread', 100) < 100:
+            rounds['rwmixread'] = workload_config['rwmixread']
+        if index == 0:
+            rounds['stonewall'] = True
+        round_jobs.append((f'{preconditioning.ROUNDS_JOB}_{index}', dict(rounds, **entry['options'])))
+
+    fio_cmd = ['fio'] + output_args(config, output_file) + [job_file]
+    return {
+        "run_id": run_id,
+        "stage": "precondition",
+        "fio_cmd": fio_cmd,
+        "command": ' '.join(fio_cmd),
+        "targets": paths,
+        "device": None,
+        "job_files": {job_file: render_job_file(global_options, fill_jobs + round_jobs)},
+        "output_file": output_file,
+        "log_file": log_file,
+        "runtime": rounds_runtime,
+        "steady_state": None,
+        "precondition": criteria,
+        "telemetry": {'enabled': False},
+        "supervision": defaults.section(config, 'supervision'),
+        "finish": finish_precondition,
+        "settled": threading.Event(),
+        "record": {
+            "run_id": run_id,
+            "workload_preset": workload_preset,
+            "target": target,
+            "rw": rw,
+            "bs": bs,
+            "size": size,
+            "signature": preconditioning.signature(rw, bs),
+        }
+    }
+
+def precondition_stage(config, store, params, criteria):
+    """Decide whether a run's target must be preconditioned first.
+
+    Returns (plan_precondition arguments, or None when the target's recorded state is
+    still valid for this workload, id of the valid preconditioning run or None).
+    """
+    if params.get('hosts'):
+        raise ValueError("Preconditioning runs on local targets only")
+    target = params.get('target')
+    if not target:
+        raise ValueError("Preconditioning needs a named target; per-run test files always start fresh")
+    workload_config = config['workloads'].get(params['workload_preset'], config['workloads']['oltp'])
+    paths = [t['path'] for t in targets.resolve(config, target, DATA_DIR, None)]
+    signature = preconditioning.signature(workload_config.get('rw', 'randread'), params['bs'])
+    rows = store.preconditioning(paths)
+    if preconditioning.is_valid(rows, paths, signature, params['size'], criteria['max_age_hours']):
+        return None, rows[0]['run_id']
+    stage = {key: params.get(key) for key in ('workload_preset', 'bs', 'size', 'target', 'ioengine',
+                                              'confirm_destructive', 'cpus_allowed', 'numa_cpu_nodes')}
+    return dict(stage, criteria=criteria), None
+
+def finish_precondition(run, fio_data, store):
+    """Record the target's preconditioned state and convergence curve"""
+    watcher = run['precondition_watcher']
+    watcher.finish()
+    record = run['record']
+    state = 'steady' if watcher.converged_round else 'not_steady'
+    curve = dict(watcher.curve(), target=record['target'], state=state,
+                 completed=datetime.now().strftime('%Y-%m-%d %H:%M'))
+    curve_file = preconditioning.save_curve(f"{DATA_DIR}/precondition_{record['run_id']}.json", curve)
+    store.record_preconditioning(run['targets'], record['target'], state, record['signature'], record['size'],
+                                 record['run_id'], len(curve['rounds']), curve_file)
+    run['record'] = dict(record, state=state, curve_file=curve_file, rounds=len(curve['rounds']))
+    run['settled'].set()
+    return run['record']
+
+def launch_run(run):
+    """Start fio for a planned run and attach its status stream"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    for path, text in run['job_files'].items():
+        with open(path, 'w') as f:
+            f.write(text)
+    print(f"Running FIO command: {run['command']}", flush=True)
+
+    with open(run['log_file'], "w") as lf:
+        lf.write(f"Command: {run['command']}\n\n")
+        lf.flush()
+        # Own session: fio outlives a restart of this process (or a Ctrl-C meant for it) and is reattached
+        process = subprocess.Popen(run['fio_cmd'], stdout=lf, stderr=lf, text=True, start_new_session=True)
+    run = watch_run(run, process, datetime.now())
+    run['record']['timestamp'] = time.time()
+    return run
+
+def attach_run(run, process, start_time):
+    """Watch a planned run whose fio was started earlier (see supervision.AttachedProcess).
+
+    The status stream re-reads the output file from the beginning, so samples and
+    watcher state are rebuilt; telemetry only covers the time from now on.
+    """
+    run = watch_run(run, process, start_time)
+    run['record']['timestamp'] = start_time.timestamp()
+    return run
+
+def watch_run(run, process, start_time):
+    """Attach the status stream, watchers and telemetry to a running fio process"""
+    stream = FioStatusStream(run['output_file'], process)
+    watcher = None
+    steady_state = run['steady_state']
+    if steady_state and steady_state.get('mode', 'watch') == 'watch':
+        watcher = SteadyStateWatcher(process, steady_state, run['scenario_config']['ramp_time'])
+        stream.listeners.append(watcher)
+    precondition_watcher = None
+    if run.get('precondition'):
+        precondition_watcher = PreconditionWatcher(process, run['precondition'], stream)
+        stream.listeners.append(precondition_watcher)
+    stream.start()
+
+    sampler = None
+    if run['telemetry']['enabled']:
+        sampler = telemetry.TelemetrySampler(process, run['telemetry']['interval'])
+        sampler.start()
+
+    run.update({
+        "process": process,
+        "stream": stream,
+        "start_time": start_time,
+        "steady_state_watcher": watcher,
+        "precondition_watcher": precondition_watcher,
+        "telemetry_sampler": sampler,
+    })
+    run['timeout_seconds'] = supervision.run_timeout(run, run['supervision'])
+    return run
+
+def start_run(config, *args, **kwargs):
+    """Plan and immediately launch a run, bypassing the scheduler"""
+    return launch_run(plan_run(config, *args, **kwargs))
+
+def wait_for_run(run, poll_interval=1):
+    """Block until fio exits and return its final document (None if it produced none).
+
+    A run that outlives its timeout is interrupted (and killed if it ignores that); its
+    partial document is returned with run['timed_out'] set.
+    """
+    while run['process'].poll() is None:
+        supervision.supervise(run, run['supervision'])
+        time.sleep(poll_interval)
+    return run['stream'].result()
+
+def run_to_completion(config, store, params, run_id=None):
+    """Run one benchmark in the foreground and return its stored record; params are plan_run arguments.
+
+    A 'precondition' criteria dict in params (the preconditioning section) first runs
+    the preconditioning stage unless the target's recorded state is still valid.
+    """
+    params = dict(params)
+    run_id = run_id or new_run_id()
+    criteria = params.pop('precondition', None)
+    if criteria:
+        stage, params['precondition_run_id'] = precondition_stage(config, store, params, criteria)
+        if stage is not None:
+            run = launch_run(plan_precondition(config, run_id=f'{run_id}_pre', **stage))
+            fio_data = wait_for_run(run)
+            if fio_data is None:
+                raise ValueError(f"Preconditioning produced no results (see {run['log_file']})")
+            params['precondition_run_id'] = finish_precondition(run, fio_data, store)['run_id']
+
+    run = start_run(config, run_id=run_id, **params)
+    fio_data = wait_for_run(run)
+    if fio_data is None:
+        raise ValueError(supervision.timeout_error(run)
+                         or f"No results found in {run['output_file']} (see {run['log_file']})")
+    record = finish_run(run, fio_data, store)
+    if run.get('timed_out'):
+        raise ValueError(f"{supervision.timeout_error(run)} (partial results stored as {record['run_id']})")
+    return record
+
+def finish_run(run, fio_data, store):
+    """Record a finished run's result in the store and return the stored record.
+
+    When a baseline is pinned for the run's preset and storage type, the run (with its
+    repeats so far) is compared against it (with its repeats) and flagged if it regressed.
+    """
+    state, converged_at = verdict(run, fio_data)
+    record = dict(run['record'], steady_state=state, converged_at=converged_at)
+
+    sampler = run.get('telemetry_sampler')
+    if sampler is not None:
+        sampler.stop()
+        sampler.join(5)
+        record.update(telemetry.summarize(sampler.samples),
+                      telemetry_file=sampler.save(f"{DATA_DIR}/telemetry_{record['run_id']}.json"))
+    baseline = store.baseline(record['workload_preset'], record['storage_type'])
+    before, after = regression.sides(store, baseline, record) if baseline is not None else ([], [])
+    if after:
+        try:
+            comparison = regression.compare(before, after, run['regression'])
+        except (OSError, ValueError) as e:
+            print(f"Baseline comparison for {record['run_id']} skipped: {e}", flush=True)
+        else:
+            record.update(baseline_run_id=baseline['run_id'],
+                          regression='regressed' if comparison['regressed'] else 'ok')
+    if record.get('target') and run['targets'] and record['rw'] not in targets.READ_ONLY_RW:
+        store.note_writes(run['targets'], preconditioning.signature(record['rw'], record['bs']))
+    run['record'] = store.ingest(record, fio_data)
+    run['settled'].set()
+    return run['record']
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""Stand-in fio binary for the tests and selfbench.py: emits deterministic synthetic json+ status output.
+
+Accepts the command lines and job files FlowFIO generates (options before the first
+--name are global, each --name starts a job section). Nothing touches a disk. Knobs
+come from the environment:
+
+  FAKE_FIO_TICK   wall seconds per status interval (default: the status interval itself)
+  FAKE_FIO_JOBS   job entries per section in the output (default 1 with group_reporting, else numjobs)
+  FAKE_FIO_BINS   non-empty latency histogram bins per job and direction (default 64)
+  FAKE_FIO_IOPS   IOPS per job entry (default 20000)
+  FAKE_FIO_SEED   random seed (default 0)
+"""
+import json
+import math
+import os
+import random
+import signal
+import sys
+import time
+
+ENGINES = ('libaio', 'io_uring', 'psync')
+
+def parse_job_file(path):
+    sections, current = [], None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith(('#', ';')):
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                current = (line[1:-1], {})
+                sections.append(current)
+            elif current is not None:
+                key, _, value = line.partition('=')
+                current[1][key.strip()] = value.strip() if value else '1'
+    global_options = next((options for name, options in sections if name == 'global'), {})
+    return global_options, [(name, options) for name, options in sections if name != 'global']
+
+def parse_args(argv):
+    """(global options, [(job name, options)]) from fio-style arguments and job files"""
+    global_options, jobs = {}, []
+    for arg in argv:
+        if arg.startswith('--'):
+            key, _, value = arg[2:].partition('=')
+            value = value if _ else '1'
+            if key == 'name':
+                jobs.append((value, {}))
+            elif jobs:
+                jobs[-1][1][key] = value
+            else:
+                global_options[key] = value
+        elif arg.endswith('.fio'):
+            file_global, file_jobs = parse_job_file(arg)
+            global_options.update(file_global)
+            jobs.extend(file_jobs)
+    return global_options, jobs or [('job', {})]
+
+def latency_bins(rng, count, median_ns):
+    """A log-normal-ish histogram over fio's bucket values"""
+    bins = {}
+    for index in range(count):
+        value = int(median_ns * math.exp((index - count / 2) / (count / 6)))
+        bins[str(max(value, 1))] = int(1000 * math.exp(-((index - count / 2) / (count / 4)) ** 2)) + rng.randint(0, 9)
+    return bins
+
+def direction_stats(ios, iops, elapsed, bs, lat_ns, bins):
+    io_bytes = ios * bs
+    return {
+        'io_bytes': io_bytes,
+        'io_kbytes': io_bytes // 1024,
+        'bw_bytes': int(iops * bs),
+        'bw': int(iops * bs / 1024),
+        'iops': iops,
+        'runtime': elapsed * 1000,
+        'total_ios': ios,
+        'short_ios': 0,
+        'drop_ios': 0,
+        'slat_ns': {'min': 100, 'max': 5000, 'mean': 500.0, 'stddev': 50.0, 'N': ios},
+        'clat_ns': {'min': lat_ns // 4, 'max': lat_ns * 20, 'mean': float(lat_ns), 'stddev': lat_ns / 5, 'N': ios,
+                    'bins': bins},
+        'lat_ns': {'min': lat_ns // 4, 'max': lat_ns * 20, 'mean': float(lat_ns + 500), 'stddev': lat_ns / 5,
+                   'N': ios},
+    }
+
+def size_bytes(value, default=4096):
+    units = {'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30}
+    value = str(value or '').lower().rstrip('b')
+    try:
+        return int(value[:-1]) * units[value[-1]] if value and value[-1] in units else int(value)
+    except ValueError:
+        return default
+
+def main(argv):
+    for arg in argv:
+        if arg == '--enghelp':
+            print('Available IO engines:\n' + '\n'.join(f'\t{engine}' for engine in ENGINES))
+            return 0
+        if arg.startswith('--enghelp='):
+            return 0
+        if arg.startswith('--client'):
+            print('fake fio: client/server mode is not simulated', file=sys.stderr)
+            return 1
+
+    global_options, jobs = parse_args(argv)
+    output = global_options.pop('output', None)
+    interval = float(global_options.pop('status-interval', global_options.pop('status_interval', 1)))
+    tick = float(os.environ.get('FAKE_FIO_TICK', interval))
+    rng = random.Random(int(os.environ.get('FAKE_FIO_SEED', 0)))
+    bin_count = int(os.environ.get('FAKE_FIO_BINS', 64))
+    base_iops = float(os.environ.get('FAKE_FIO_IOPS', 20000))
+
+    entries = []
+    for name, options in jobs:
+        merged = dict(global_options, **options)
+        numjobs = int(merged.get('numjobs', 1))
+        copies = int(os.environ.get('FAKE_FIO_JOBS', 1 if 'group_reporting' in merged else numjobs))
+        rw = merged.get('rw', 'read')
+        if rw in ('read', 'randread'):
+            mix = 1.0
+        elif rw in ('write', 'randwrite', 'trim', 'randtrim'):
+            mix = 0.0
+        else:
+            mix = int(merged.get('rwmixread', 50)) / 100
+        for copy in range(copies):
+            entries.append({'name': name, 'options': merged, 'read_share': mix,
+                            'bs': size_bytes(merged.get('bs')), 'ios': {'read': 0, 'write': 0},
+                            'bins': {direction: latency_bins(rng, bin_count, 50000 + 1000 * copy)
+                                     for direction in ('read', 'write')}})
+    runtime = int(global_options.get('runtime', jobs[0][1].get('runtime', 10)))
+    intervals = max(1, int(runtime / interval))
+
+    stop = []
+    signal.signal(signal.SIGINT, lambda *_: stop.append(True))
+    out = open(output, 'w') if output else sys.stdout
+    started_ms = int(time.time() * 1000)
+
+    def document(step):
+        elapsed = int(step * interval)
+        docs = []
+        for entry in entries:
+            iops = base_iops * (1 + rng.uniform(-0.02, 0.02))
+            stats = {}
+            for direction in ('read', 'write'):
+                share = entry['read_share'] if direction == 'read' else 1 - entry['read_share']
+                entry['ios'][direction] += int(iops * share * interval)
+                stats[direction] = direction_stats(entry['ios'][direction], iops * share, elapsed, entry['bs'],
+                                                   50000, entry['bins'][direction] if share else {})
+            docs.append({
+                'jobname': entry['name'], 'groupid': 0, 'error': 0, 'elapsed': elapsed,
+                'job options': {key: value for key, value in entry['options'].items()
+                                if key not in ('output', 'output-format')},
+                'read': stats['read'], 'write': stats['write'],
+                'usr_cpu': 5.0, 'sys_cpu': 10.0, 'ctx': step * 100,
+            })
+        timestamp_ms = started_ms + int(step * interval * 1000)
+        return {
+            'fio version': 'fio-fake',
+            'timestamp': timestamp_ms // 1000,
+            'timestamp_ms': timestamp_ms,
+            'time': time.ctime(timestamp_ms / 1000),
+            'global options': {key: value for key, value in global_options.items()
+                               if key not in ('output', 'output-format')},
+            'jobs': docs,
+        }
+
+    step = 0
+    for step in range(1, intervals + 1):
+        time.sleep(tick)
+        out.write(json.dumps(document(step), indent=2) + '\n')
+        out.flush()
+        if stop:
+            break
+
+    hist_prefix = global_options.get('write_hist_log')
+    if hist_prefix:
+        with open(f'{hist_prefix}_clat_hist.1.log', 'w') as f:
+            for line in range(1, step + 1):
+                buckets = [0] * 1856
+                for _ in range(200):
+                    buckets[rng.randint(500, 700)] += 1
+                f.write(', '.join(map(str, [line * int(interval * 1000), 0, 4096] + buckets)) + '\n')
+    if out is not sys.stdout:
+        out.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,29 @@
+# Production serving: gunicorn -c gunicorn.conf.py app:server
+#
+# Dashboard requests are spread over several worker processes; fio runs and sweeps belong to a
+# single supervisor process (supervisor.py) started alongside them, and run progress reaches every
+# worker through the shared SQLite store. Settings come from the server: section of the config.
+import os
+import subprocess
+import sys
+
+import yaml
+
+import defaults
+
+with open('fio_defaults.yaml') as f:
+    _settings = defaults.section(yaml.safe_load(f), 'server')
+
+bind = os.environ.get('FLOWFIO_BIND', _settings['bind'])
+workers = int(os.environ.get('FLOWFIO_WORKERS', _settings['workers']))
+threads = _settings['threads']
+worker_class = 'gthread'
+timeout = _settings['timeout']
+raw_env = ['FLOWFIO_SUPERVISOR=external']
+
+def on_starting(server):
+    server.flowfio_supervisor = subprocess.Popen([sys.executable, 'supervisor.py'])
+
+def on_exit(server):
+    server.flowfio_supervisor.terminate()
+    server.flowfio_supervisor.wait(30)
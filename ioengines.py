@@ -0,0 +1,84 @@
+import functools
+import re
+import subprocess
+
+DEFAULT_ENGINE = 'libaio'
+
+OPTION_LINE = re.compile(r'^\s*([A-Za-z0-9_]+)\s*:\s')
+
+def configured_engines(config):
+    """Engines declared under ioengines: in the YAML config, with their fio options"""
+    return config.get('ioengines') or {DEFAULT_ENGINE: {}}
+
+def default_engine(config):
+    return config.get('common', {}).get('ioengine', DEFAULT_ENGINE)
+
+def engine_options(config, ioengine):
+    """fio job options selecting an engine: the engine plus its YAML options (false/null ones are left out)"""
+    options = {'ioengine': ioengine}
+    for key, value in (configured_engines(config).get(ioengine) or {}).items():
+        if value is not None and value is not False:
+            options[key] = value
+    return options
+
+@functools.lru_cache(maxsize=None)
+def fio_engines(fio='fio'):
+    """Engines this fio build can load, from `fio --enghelp`"""
+    output = subprocess.run([fio, '--enghelp'], capture_output=True, text=True, timeout=10).stdout
+    lines = output.splitlines()
+    if lines and lines[0].rstrip().endswith(':'):
+        lines = lines[1:]
+    return frozenset(line.strip() for line in lines if line.strip())
+
+@functools.lru_cache(maxsize=None)
+def fio_engine_options(ioengine, fio='fio'):
+    """Engine-specific option names, from `fio --enghelp=<engine>`"""
+    output = subprocess.run([fio, f'--enghelp={ioengine}'], capture_output=True, text=True, timeout=10).stdout
+    return frozenset(match.group(1) for match in map(OPTION_LINE.match, output.splitlines()) if match)
+
+def validate(config, ioengine, fio='fio'):
+    """Check an engine and its YAML options against what the local fio build supports.
+
+    Raises ValueError naming the unknown engine or options. Skipped when fio itself
+    cannot be run here; the run then fails with fio's own error.
+    """
+    if ioengine not in configured_engines(config):
+        raise ValueError(f"ioengine {ioengine!r} is not declared under ioengines: in the config")
+    try:
+        available = fio_engines(fio)
+        supported = fio_engine_options(ioengine, fio) if ioengine in available else frozenset()
+    except (OSError, subprocess.SubprocessError):
+        return
+    if ioengine not in available:
+        raise ValueError(f"This fio build has no {ioengine!r} engine (see fio --enghelp)")
+    unknown = sorted(set(engine_options(config, ioengine)) - {'ioengine'} - supported)
+    if unknown:
+        raise ValueError(f"{ioengine} does not support {', '.join(unknown)} (see fio --enghelp={ioengine})")
+
+def per_core(iops, cpu_pct):
+    """IOPS per CPU core given CPU use in percent of one core"""
+    return iops / (cpu_pct / 100) if cpu_pct else None
+
+def compare_engines(records):
+    """One row per engine for runs of the same workload: throughput, tail latency and IOPS per core.
+
+    fio cores come from the fio process tree (telemetry fio_cpu_pct); host cores from
+    host-wide user+system time, which also covers kernel threads such as io_uring's SQ
+    poller that are not part of fio's process tree.
+    """
+    rows = []
+    for record in records:
+        iops = (record.get('read_iops') or 0) + (record.get('write_iops') or 0)
+        host_cores = record.get('host_cpu_cores')
+        rows.append({
+            'run_id': record['run_id'],
+            'ioengine': record.get('ioengine'),
+            'iops': iops,
+            'bw': (record.get('read_bw') or 0) + (record.get('write_bw') or 0),
+            'p99': max(record.get('read_p99') or 0, record.get('write_p99') or 0),
+            'fio_cores': record['fio_cpu_pct'] / 100 if record.get('fio_cpu_pct') is not None else None,
+            'iops_per_core': per_core(iops, record.get('fio_cpu_pct')),
+            'host_cores': host_cores,
+            'iops_per_host_core': iops / host_cores if host_cores else None,
+        })
+    return rows
@@ -0,0 +1,141 @@
+import glob
+import os
+
+import numpy as np
+
+# fio's latency histogram layout (stat.h): 29 groups of 64 buckets
+FIO_IO_U_PLAT_BITS = 6
+FIO_IO_U_PLAT_VAL = 1 << FIO_IO_U_PLAT_BITS
+FIO_IO_U_PLAT_NR = 29 * FIO_IO_U_PLAT_VAL
+
+# Log-spaced latency axis, 100 ns to 10 s
+MIN_LATENCY_US = 0.1
+MAX_LATENCY_US = 1e7
+
+def fio_log_options(criteria):
+    """fio job options that write completion latency logs under criteria['prefix'].
+
+    Histogram logs stay small at any IOPS, so they replace the per-IO log when enabled.
+    """
+    if criteria.get('log_hist_msec'):
+        return {
+            'write_hist_log': criteria['prefix'],
+            'log_hist_msec': criteria['log_hist_msec'],
+            'log_hist_coarseness': criteria['log_hist_coarseness'],
+        }
+    return {
+        'write_lat_log': criteria['prefix'],
+        'log_avg_msec': criteria['log_avg_msec'],
+    }
+
+def log_files(prefix):
+    """Return (per-IO/averaged clat logs, clat histogram logs) written for a prefix, one per job"""
+    return sorted(glob.glob(f'{prefix}_clat.*.log')), sorted(glob.glob(f'{prefix}_clat_hist.*.log'))
+
+def plat_idx_to_val(index, edge=0.5):
+    """Vectorized port of fio's plat_idx_to_val: bucket index to a latency (ns).
+
+    edge places the value within the bucket; fio reports its percentiles at the
+    midpoint (0.5), so the default agrees with them.
+    """
+    index = np.asarray(index, dtype=np.int64)
+    error_bits = np.maximum((index >> FIO_IO_U_PLAT_BITS) - 1, 0)
+    base = np.left_shift(1, error_bits + FIO_IO_U_PLAT_BITS)
+    values = base + ((index % FIO_IO_U_PLAT_VAL) + edge) * np.left_shift(1, error_bits)
+    return np.where(index < FIO_IO_U_PLAT_VAL << 1, index, values)
+
+def coarse_idx_to_val(index, stride):
+    """Midpoint latency (ns) of a histogram-log bucket that merges stride fio buckets, as fiologparser_hist"""
+    first = np.asarray(index, dtype=np.int64) * stride
+    lower, upper = plat_idx_to_val(first, edge=0.0), plat_idx_to_val(first + stride - 1, edge=1.0)
+    return (lower + upper) / 2
+
+def last_time_ms(path, max_bytes=16384):
+    """Timestamp of the final row of a log, read from the file tail"""
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        while True:
+            f.seek(max(0, size - max_bytes))
+            lines = f.read().rstrip().splitlines()
+            # Histogram rows can be longer than the window; widen it until a whole row fits
+            if len(lines) > 1 or max_bytes >= size:
+                break
+            max_bytes *= 4
+    return float(lines[-1].split(b',', 1)[0]) if lines else 0.0
+
+def latency_edges(bins):
+    return np.logspace(np.log10(MIN_LATENCY_US), np.log10(MAX_LATENCY_US), bins + 1)
+
+def empty_heatmap(paths, criteria):
+    """Zeroed counts with time edges (s) spanning every log and fixed latency edges (µs)"""
+    duration = max((last_time_ms(path) for path in paths), default=0) / 1000
+    time_edges = np.linspace(0, max(duration, 1e-3), criteria['time_bins'] + 1)
+    lat_edges = latency_edges(criteria['latency_bins'])
+    return {
+        'time_edges': time_edges,
+        'lat_edges': lat_edges,
+        'counts': np.zeros((criteria['time_bins'], criteria['latency_bins'])),
+    }
+
+def bin_index(values, edges):
+    return np.clip(np.searchsorted(edges, values, side='right') - 1, 0, len(edges) - 2)
+
+def lat_log_heatmap(paths, criteria):
+    """Bin per-IO (or averaged) clat logs into a time x latency count grid, one chunk at a time.
+
+    Rows are "time ms, latency ns, ddir, bs, offset"; only the first two columns are parsed.
+    """
+    import pandas as pd  # deferred: only needed to read logs, keeps the headless CLI light
+
+    heatmap = empty_heatmap(paths, criteria)
+    counts = heatmap['counts']
+    for path in paths:
+        for chunk in pd.read_csv(path, header=None, usecols=[0, 1], names=['t', 'lat'],
+                                 dtype=np.float64, chunksize=criteria['chunk_rows']):
+            rows = bin_index(chunk['t'].to_numpy() / 1000, heatmap['time_edges'])
+            cols = bin_index(chunk['lat'].to_numpy() / 1000, heatmap['lat_edges'])
+            counts += np.bincount(rows * counts.shape[1] + cols, minlength=counts.size).reshape(counts.shape)
+    return heatmap
+
+def hist_log_heatmap(paths, criteria):
+    """Bin fio histogram logs ("time ms, ddir, bs, bucket counts...") into the same grid.
+
+    Each row holds the IOs completed in that interval per fio bucket, so rows are
+    regrouped onto the coarser latency axis and summed into their time bin.
+    """
+    import pandas as pd
+
+    heatmap = empty_heatmap(paths, criteria)
+    counts = heatmap['counts']
+    chunk_rows = max(1, criteria['chunk_rows'] // (FIO_IO_U_PLAT_NR >> criteria['log_hist_coarseness']))
+    for path in paths:
+        for chunk in pd.read_csv(path, header=None, dtype=np.float64, chunksize=chunk_rows):
+            values = chunk.to_numpy()
+            buckets = values[:, 3:]
+            # The coarseness the log was written with follows from its bucket count
+            stride = FIO_IO_U_PLAT_NR // buckets.shape[1]
+            bucket_us = coarse_idx_to_val(np.arange(buckets.shape[1]), stride) / 1000
+            # One-hot map from fio buckets to heatmap latency bins
+            mapping = np.zeros((buckets.shape[1], counts.shape[1]))
+            mapping[np.arange(buckets.shape[1]), bin_index(bucket_us, heatmap['lat_edges'])] = 1
+            rows = bin_index(values[:, 0] / 1000, heatmap['time_edges'])
+            np.add.at(counts, rows, buckets @ mapping)
+    return heatmap
+
+def load_heatmap(prefix, criteria):
+    """Heatmap for a run's logs, preferring histogram logs; None when nothing was logged"""
+    lat_logs, hist_logs = log_files(prefix)
+    if hist_logs:
+        return hist_log_heatmap(hist_logs, criteria)
+    if lat_logs:
+        return lat_log_heatmap(lat_logs, criteria)
+    return None
+
+def percentile_over_time(heatmap, percentile):
+    """Per time bin latency percentile (µs, bin upper edge) from the binned counts"""
+    counts = heatmap['counts']
+    cumulative = np.cumsum(counts, axis=1)
+    totals = cumulative[:, -1]
+    index = (cumulative < (totals * percentile / 100)[:, None]).sum(axis=1)
+    values = heatmap['lat_edges'][1:][np.minimum(index, counts.shape[1] - 1)]
+    return np.where(totals > 0, values, np.nan)
@@ -0,0 +1,188 @@
+import threading
+
+from flask import Response, request
+
+from analysis import direction_stats
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + '}'
+
+def format_value(value):
+    return repr(float(value))
+
+def run_labels(record, device=None):
+    """Labels identifying a run's configuration: preset and storage keys from fio_defaults.yaml plus device"""
+    return {
+        'workload_preset': record.get('workload_preset') or '',
+        'storage_type': record.get('storage_type') or '',
+        'device': device or record.get('device') or '',
+    }
+
+class MetricsState:
+    """Metric values kept up to date as runs progress and finish.
+
+    Live values are refreshed from each fio status interval on the stream thread,
+    last-run summaries from stored records and queue counts by the scheduler, so a
+    scrape only formats what is already in memory (and reuses the text until
+    something changes). Nothing here reads result files.
+    """
+
+    def __init__(self, quantiles=(50, 90, 99, 99.9)):
+        self.quantiles = tuple(quantiles)
+        self._live = {}
+        self._last_runs = {}
+        self._queue = {}
+        self._finished = {}
+        self._lock = threading.Lock()
+        self._version = 0
+        self._rendered = {}
+
+    def _changed(self):
+        self._version += 1
+
+    def run_started(self, run_id, run):
+        """Track a launched run; its stream feeds every new interval sample"""
+        labels = dict(run_labels(run['record'], run.get('device')), run_id=run_id)
+        stream = run['stream']
+
+        def update(sample):
+            # stream.latest is the cumulative document the sample was derived from
+            stats = direction_stats(stream.latest, ('read', 'write'), self.quantiles) if stream.latest else None
+            with self._lock:
+                if run_id in self._live:
+                    self._live[run_id].update(sample=sample, stats=stats)
+                    self._changed()
+
+        with self._lock:
+            self._live[run_id] = {'labels': labels, 'sample': None, 'stats': None}
+            self._changed()
+        stream.listeners.append(update)
+
+    def run_finished(self, run_id, run, status):
+        """Drop the live series and, for a completed run, replace its configuration's last-run summary"""
+        with self._lock:
+            self._live.pop(run_id, None)
+            self._finished[status] = self._finished.get(status, 0) + 1
+            self._changed()
+        if status == 'done' and run.get('stage') is None:
+            self.record_run(run['record'])
+
+    def record_run(self, record):
+        labels = run_labels(record)
+        key = tuple(labels.values())
+        with self._lock:
+            current = self._last_runs.get(key)
+            if current is None or (record.get('timestamp') or 0) >= (current['record'].get('timestamp') or 0):
+                self._last_runs[key] = {'labels': labels, 'record': dict(record)}
+                self._changed()
+
+    def load_last_runs(self, records):
+        """Seed last-run summaries from the store (e.g. ResultsStore.latest_runs()) at startup"""
+        for record in records:
+            self.record_run(record)
+
+    def set_queue(self, counts):
+        """Replace queue state: {(device, status): number of runs}"""
+        with self._lock:
+            if counts != self._queue:
+                self._queue = dict(counts)
+                self._changed()
+
+    def _families(self):
+        """(name, type, help, [(suffix, labels, value)]) for every metric family"""
+        live_iops, live_bw, live_lat, live_elapsed, live_quantiles = [], [], [], [], []
+        for entry in self._live.values():
+            labels, sample, stats = entry['labels'], entry['sample'], entry['stats']
+            if sample is not None:
+                live_elapsed.append(('', labels, sample['t']))
+                for direction in ('read', 'write'):
+                    directed = dict(labels, direction=direction)
+                    live_iops.append(('', directed, sample[f'{direction}_iops']))
+                    live_bw.append(('', directed, sample[f'{direction}_bw'] * 1024 * 1024))
+                    live_lat.append(('', directed, sample[f'{direction}_lat'] / 1e6))
+            if stats is not None:
+                for quantile, value in stats['percentiles'].items():
+                    live_quantiles.append(('', dict(labels, quantile=f'{quantile / 100:g}'), value / 1e6))
+                live_quantiles.append(('_sum', labels, stats['lat_mean'] * stats['ios'] / 1e6))
+                live_quantiles.append(('_count', labels, stats['ios']))
+
+        last_iops, last_bw, last_p99, last_timestamp, last_regressed, last_cpu = [], [], [], [], [], []
+        for entry in self._last_runs.values():
+            labels, record = entry['labels'], entry['record']
+            last_timestamp.append(('', labels, record.get('timestamp') or 0))
+            for direction in ('read', 'write'):
+                directed = dict(labels, direction=direction)
+                last_iops.append(('', directed, record.get(f'{direction}_iops') or 0))
+                last_bw.append(('', directed, (record.get(f'{direction}_bw') or 0) * 1024 * 1024))
+                last_p99.append(('', directed, (record.get(f'{direction}_p99') or 0) / 1e6))
+            if record.get('regression'):
+                last_regressed.append(('', labels, record['regression'] == 'regressed'))
+            if record.get('fio_cpu_pct') is not None:
+                last_cpu.append(('', labels, record['fio_cpu_pct']))
+
+        queue = [('', {'device': device, 'status': status}, count) for (device, status), count in self._queue.items()]
+        finished = [('_total', {'status': status}, count) for status, count in self._finished.items()]
+
+        return [
+            ('flowfio_live_iops', 'gauge', "IOPS over the latest fio status interval", live_iops),
+            ('flowfio_live_bandwidth_bytes', 'gauge', "Bytes per second over the latest status interval", live_bw),
+            ('flowfio_live_latency_mean_seconds', 'gauge', "Mean completion latency over the latest status interval",
+             live_lat),
+            ('flowfio_live_latency_seconds', 'summary', "Total latency quantiles since the run started", live_quantiles),
+            ('flowfio_live_elapsed_seconds', 'gauge', "Seconds fio has been running", live_elapsed),
+            ('flowfio_last_run_iops', 'gauge', "IOPS of the latest completed run per preset, storage type and device",
+             last_iops),
+            ('flowfio_last_run_bandwidth_bytes', 'gauge', "Bytes per second of the latest completed run", last_bw),
+            ('flowfio_last_run_latency_p99_seconds', 'gauge', "P99 completion latency of the latest completed run",
+             last_p99),
+            ('flowfio_last_run_timestamp_seconds', 'gauge', "Start time of the latest completed run", last_timestamp),
+            ('flowfio_last_run_regressed', 'gauge', "1 if the latest completed run regressed against its baseline",
+             last_regressed),
+            ('flowfio_last_run_fio_cpu_percent', 'gauge', "Mean CPU of the fio process tree (100 = one core)", last_cpu),
+            ('flowfio_queue_runs', 'gauge', "Runs in the scheduler queue by device and status", queue),
+            ('flowfio_runs_finished', 'counter', "Runs finished since the server started, by outcome", finished),
+        ]
+
+    def render(self, openmetrics=False):
+        """Exposition text in the Prometheus text format, or OpenMetrics when requested"""
+        with self._lock:
+            cached = self._rendered.get(openmetrics)
+            if cached and cached[0] == self._version:
+                return cached[1]
+            version = self._version
+            families = self._families()
+
+        lines = []
+        for name, metric_type, help_text, samples in families:
+            # Prometheus' text format names counters with their _total suffix; OpenMetrics names the family
+            family = name + '_total' if metric_type == 'counter' and not openmetrics else name
+            lines.append(f'# HELP {family} {help_text}')
+            lines.append(f'# TYPE {family} {metric_type}')
+            for suffix, labels, value in samples:
+                lines.append(f'{name}{suffix}{format_labels(labels)} {format_value(value)}')
+        if openmetrics:
+            lines.append('# EOF')
+        text = '\n'.join(lines) + '\n'
+
+        with self._lock:
+            self._rendered[openmetrics] = (version, text)
+        return text
+
+def register_metrics_route(server, state):
+    """Expose /metrics for Prometheus-compatible scrapers"""
+
+    @server.route('/metrics')
+    def scrape_metrics():
+        openmetrics = 'application/openmetrics-text' in request.headers.get('Accept', '')
+        return Response(
+            state.render(openmetrics),
+            content_type=OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE
+        )
@@ -0,0 +1,118 @@
+import json
+import signal
+import time
+
+from steady_state import linear_slope
+
+# SNIA SSS PTS style: fill the test range sequentially, then repeat fixed-length rounds of
+# the workload until the last window_rounds round averages are steady
+FILL_JOB = 'fill'
+ROUNDS_JOB = 'rounds'
+
+def round_workload(rw):
+    """rw for the rounds stage: the preset's own pattern, or random writes for read-only presets
+    (reads do not change the drive's state)"""
+    return 'randwrite' if rw in ('read', 'randread') else rw
+
+def signature(rw, bs):
+    """What a target was conditioned with; a run with another write pattern invalidates it"""
+    return f'{round_workload(rw)}:{bs}'
+
+def window_verdict(rounds, criteria):
+    """SNIA steady-state test over the trailing window of round averages"""
+    window = rounds[-criteria['window_rounds']:]
+    if len(window) < criteria['window_rounds']:
+        return None
+    mean = sum(window) / len(window)
+    if mean == 0:
+        return None
+    xs = list(range(len(window)))
+    range_pct = (max(window) - min(window)) / mean * 100
+    slope_pct = abs(linear_slope(xs, window)) * (len(window) - 1) / mean * 100
+    return {
+        'mean': mean,
+        'range_pct': range_pct,
+        'slope_pct': slope_pct,
+        'steady': range_pct <= criteria['max_range_pct'] and slope_pct <= criteria['max_slope_pct'],
+    }
+
+class PreconditionWatcher:
+    """Stream listener that folds the rounds stage into per-round IOPS and stops fio at steady state.
+
+    The fill and rounds stages run in one fio invocation (separated by stonewall); the
+    rounds job's own elapsed time says which round an interval belongs to.
+    """
+
+    def __init__(self, process, criteria, stream):
+        self.process = process
+        self.criteria = criteria
+        self.stream = stream
+        self.rounds = []
+        self.verdicts = []
+        self.converged_round = None
+        self._current = []
+        self._round = 0
+
+    def _rounds_elapsed(self):
+        jobs = (self.stream.latest or {}).get('jobs', [])
+        return max((job.get('elapsed', 0) for job in jobs if job.get('jobname', '').startswith(ROUNDS_JOB)), default=0)
+
+    def _close_round(self):
+        self.rounds.append(sum(self._current) / len(self._current))
+        self._current = []
+        result = window_verdict(self.rounds, self.criteria)
+        self.verdicts.append(result)
+        if result and result['steady'] and self.converged_round is None:
+            self.converged_round = len(self.rounds)
+            if self.process.poll() is None:
+                self.process.send_signal(signal.SIGINT)
+
+    def __call__(self, sample):
+        if self.converged_round is not None:
+            return
+        elapsed = self._rounds_elapsed()
+        if not elapsed:
+            return
+        index = int((elapsed - 1) // self.criteria['round_seconds'])
+        if index > self._round and self._current:
+            self._close_round()
+        self._round = index
+        self._current.append(sample['read_iops'] + sample['write_iops'])
+
+    def finish(self):
+        """Count the last round if fio ran it to the end without converging"""
+        if self.converged_round is None and self._current and self._rounds_elapsed() >= (self._round + 1) * self.criteria['round_seconds']:
+            self._close_round()
+
+    def curve(self):
+        """Round averages with each round's window verdict (the convergence curve)"""
+        return {
+            'rounds': [
+                dict({'round': index + 1, 'iops': iops}, **(self.verdicts[index] or {}))
+                for index, iops in enumerate(self.rounds)
+            ],
+            'converged_round': self.converged_round,
+            'window_rounds': self.criteria['window_rounds'],
+            'max_range_pct': self.criteria['max_range_pct'],
+            'max_slope_pct': self.criteria['max_slope_pct'],
+        }
+
+def is_valid(rows, paths, sig, size, max_age_hours):
+    """True when every path was conditioned to steady state with this signature and size recently enough"""
+    by_path = {row['path']: row for row in rows}
+    for path in paths:
+        row = by_path.get(path)
+        if row is None or row['state'] != 'steady' or row['signature'] != sig or row['size'] != str(size):
+            return False
+        if max_age_hours and time.time() - row['completed_at'] > max_age_hours * 3600:
+            return False
+    return True
+
+def save_curve(path, curve):
+    with open(path, 'w') as f:
+        json.dump(curve, f)
+    return path
+
+def load_curve(path):
+    with open(path) as f:
+        return json.load(f)
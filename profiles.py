@@ -0,0 +1,119 @@
+import re
+
+from results_store import summarize_fio
+
+# Workload preset fields a profile job inherits when it names a preset
+PRESET_FIELDS = ('rw', 'rwmixread', 'bs', 'iodepth', 'numjobs', 'bssplit', 'percentage_random')
+# Keys that place a job within the profile; everything else is passed to fio as a job option
+JOB_KEYS = ('name', 'workload')
+# Set by the run (target, size, reporting layout), not by the profile
+RESERVED_OPTIONS = ('filename', 'directory', 'size', 'description', 'stonewall', 'wait_for_previous', 'new_group',
+                    'group_reporting', 'output', 'output-format')
+# Group and job names become fio section names
+NAME = re.compile(r'^[A-Za-z0-9_-]+$')
+
+def profile_names(config):
+    return list(config.get('profiles', {}))
+
+def get(config, name):
+    """A profile from the profiles: section, checked so that it compiles to a valid job file"""
+    profiles = config.get('profiles', {})
+    if name not in profiles:
+        raise ValueError(f"Unknown profile {name!r}; define it under profiles: in fio_defaults.yaml")
+    profile = profiles[name]
+    if not profile.get('groups'):
+        raise ValueError(f"Profile {name!r} has no groups")
+    sections = set()
+    for group in profile['groups']:
+        if not NAME.match(str(group.get('name', ''))):
+            raise ValueError(f"Profile {name!r}: group names are letters, digits, '-' and '_' ({group.get('name')!r})")
+        if not group.get('jobs'):
+            raise ValueError(f"Profile {name!r}: group {group['name']!r} has no jobs")
+        for job in group['jobs']:
+            if not NAME.match(str(job.get('name', ''))):
+                raise ValueError(f"Profile {name!r}: job names are letters, digits, '-' and '_' ({job.get('name')!r})")
+            section = f"{group['name']}.{job['name']}"
+            if section in sections:
+                raise ValueError(f"Profile {name!r}: job {section!r} is defined twice")
+            sections.add(section)
+            if job.get('workload') and job['workload'] not in config['workloads']:
+                raise ValueError(f"Profile {name!r}: job {section!r} names unknown workload {job['workload']!r}")
+            reserved = sorted(set(job) & set(RESERVED_OPTIONS))
+            if reserved:
+                raise ValueError(f"Profile {name!r}: job {section!r} sets {', '.join(reserved)}, which the run controls")
+    return profile
+
+def job_options(config, job):
+    """fio options of one profile job: its workload preset's fields overridden by its own options"""
+    preset = config['workloads'][job['workload']] if job.get('workload') else {}
+    options = {key: preset[key] for key in PRESET_FIELDS if key in preset}
+    options.update((key, value) for key, value in job.items() if key not in JOB_KEYS)
+    options['rw'] = rw = options.get('rw', 'randread')
+    if not ('rw' in rw and options.get('rwmixread', 100) < 100):
+        options.pop('rwmixread', None)
+    # false in the YAML means "leave the flag off", as in the common: section
+    return {key: value for key, value in options.items() if value is not False and value is not None}
+
+def compile_jobs(config, profile):
+    """Ordered (section name, options) pairs for a profile's job file.
+
+    Groups run one after another (stonewall) unless marked concurrent, which starts them
+    alongside the group before. Every section is its own reporting group so fio reports
+    each job separately, and carries its group's name as its description so results can
+    be put back together per group.
+    """
+    sections = []
+    for group in profile['groups']:
+        for position, job in enumerate(group['jobs']):
+            options = job_options(config, job)
+            if 'runtime' in group:
+                options.setdefault('runtime', group['runtime'])
+            options['description'] = group['name']
+            if sections:
+                starts_stage = position == 0 and not group.get('concurrent')
+                options['stonewall' if starts_stage else 'new_group'] = True
+            sections.append((f"{group['name']}.{job['name']}", options))
+    return sections
+
+def summary_rw(rws):
+    """One rw value for the run record covering every job.
+
+    Reads/writes and random/sequential are decided separately, so a profile of
+    sequential and random reads is randread rather than a mixed pattern.
+    """
+    if len(set(rws)) == 1:
+        return rws[0]
+    random = any(rw.startswith('rand') for rw in rws)
+    patterns = {rw[4:] if rw.startswith('rand') else rw for rw in rws}
+    if patterns <= {'read'}:
+        return 'randread' if random else 'read'
+    if patterns <= {'write'}:
+        return 'randwrite' if random else 'write'
+    return 'randrw' if random else 'rw'
+
+def expected_runtime(profile, runtime, ramp_time):
+    """Wall time of a profile in seconds.
+
+    Each stage (a group and the concurrent groups after it) lasts as long as its longest
+    group and ramps up again after its stonewall.
+    """
+    stages = []
+    for index, group in enumerate(profile['groups']):
+        length = max(job.get('runtime', group.get('runtime', runtime)) for job in group['jobs'])
+        if index and group.get('concurrent'):
+            stages[-1] = max(stages[-1], length)
+        else:
+            stages.append(length)
+    return sum(stages) + ramp_time * (len(stages) - 1)
+
+def group_results(fio_data):
+    """Per-group summaries of a profile run, each with its jobs' summaries, in job file order"""
+    groups = {}
+    for job in fio_data.get('jobs', []):
+        group = job.get('job options', {}).get('description') or job.get('desc', '')
+        groups.setdefault(group, {}).setdefault(job.get('jobname', ''), []).append(job)
+    return [{
+        'group': group,
+        'summary': summarize_fio({'jobs': [entry for entries in jobs.values() for entry in entries]}),
+        'jobs': {name.split('.', 1)[-1]: summarize_fio({'jobs': entries}) for name, entries in jobs.items()},
+    } for group, jobs in groups.items()]
@@ -0,0 +1,89 @@
+import json
+import time
+
+from flask import Response, request, stream_with_context
+
+from streaming import log_excerpt, run_progress, tail_file
+
+HEARTBEAT_SECONDS = 15
+QUEUE_CHECK_SECONDS = 1
+
+def format_event(event, payload, event_id=None):
+    """Encode one Server-Sent Events message"""
+    message = f'event: {event}\ndata: {json.dumps(payload)}\n\n'
+    if event_id is not None:
+        message = f'id: {event_id}\n' + message
+    return message
+
+def progress_events(run_id, run, since=0):
+    """Yield SSE messages for a run, only when fio has emitted new interval data"""
+    stream = run['stream']
+    seq = since
+    last_log = None
+
+    while True:
+        samples = stream.buffer.since(seq)
+        if samples:
+            seq = samples[-1]['seq']
+            payload = {
+                'run_id': run_id,
+                'seq': seq,
+                'samples': samples,
+                'progress': run_progress(run['start_time'], run['runtime']),
+                'runtime': run['runtime'],
+            }
+            log_content = tail_file(run['log_file'])
+            if log_content is not None and log_content != last_log:
+                last_log = log_content
+                payload['log'] = log_excerpt(log_content)
+            yield format_event('progress', payload, seq)
+
+        if stream.finished and stream.buffer.last_seq <= seq:
+            # Hold 'done' until the result has been recorded so the client can load it
+            if run['settled'].wait(HEARTBEAT_SECONDS):
+                yield format_event('done', {'run_id': run_id})
+                return
+            yield ': keepalive\n\n'
+            continue
+
+        if not stream.wait_for_update(seq, HEARTBEAT_SECONDS):
+            yield ': keepalive\n\n'
+
+def queued_events(run_id, get_run, get_queue_position, since=0):
+    """Report queue position changes until the scheduler launches the run, then stream it"""
+    last_position = None
+    while True:
+        run = get_run(run_id)
+        if run is not None and 'stream' in run:
+            yield from progress_events(run_id, run, since)
+            return
+
+        position = get_queue_position(run_id)
+        if position is None:
+            yield format_event('done', {'run_id': run_id})
+            return
+        if position != last_position:
+            last_position = position
+            yield format_event('queued', {'run_id': run_id, 'position': position})
+        time.sleep(QUEUE_CHECK_SECONDS)
+
+def register_push_routes(server, get_run, get_queue_position):
+    """Expose /events/<run_id> as a Server-Sent Events endpoint on the Flask server"""
+
+    @server.route('/events/<run_id>')
+    def run_events(run_id):
+        run = get_run(run_id)
+        if (run is None or 'stream' not in run) and get_queue_position(run_id) is None:
+            return Response(format_event('done', {'run_id': run_id}), mimetype='text/event-stream')
+
+        since = request.headers.get('Last-Event-ID') or request.args.get('since') or 0
+        try:
+            since = int(since)
+        except ValueError:
+            since = 0
+
+        return Response(
+            stream_with_context(queued_events(run_id, get_run, get_queue_position, since)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
@@ -0,0 +1,134 @@
+import numpy as np
+
+from analysis import analyze
+from results_store import read_final_document
+from streaming import read_samples
+
+# (metric, label, higher is better)
+METRICS = [
+    ('iops', 'IOPS', True),
+    ('bw', 'Bandwidth (MB/s)', True),
+    ('p50', 'P50 (μs)', False),
+    ('p99', 'P99 (μs)', False),
+    ('p99.9', 'P99.9 (μs)', False),
+]
+
+def run_metrics(fio_data):
+    """Headline metrics compared between runs, from merged histograms"""
+    total = analyze(fio_data, (50, 99, 99.9))['total']
+    return {
+        'iops': total['iops'],
+        'bw': total['bw'],
+        'p50': total['percentiles'][50],
+        'p99': total['percentiles'][99],
+        'p99.9': total['percentiles'][99.9],
+    }
+
+def permutation_test(a, b, permutations=2000, seed=0, batch=100):
+    """Two-sided permutation test p-value for a difference in means"""
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    if len(a) < 2 or len(b) < 2:
+        return None
+    pooled = np.concatenate([a, b])
+    observed = abs(a.mean() - b.mean())
+    rng = np.random.default_rng(seed)
+    extreme = 0
+    for start in range(0, permutations, batch):
+        shuffled = rng.permuted(np.tile(pooled, (min(batch, permutations - start), 1)), axis=1)
+        diffs = np.abs(shuffled[:, :len(a)].mean(axis=1) - shuffled[:, len(a):].mean(axis=1))
+        extreme += np.count_nonzero(diffs >= observed)
+    return float((extreme + 1) / (permutations + 1))
+
+def interval_iops(record):
+    """Total IOPS of every status interval of a run"""
+    return [s['read_iops'] + s['write_iops'] for s in read_samples(record['result_file'])]
+
+def autocorrelation_time(series):
+    """Integrated autocorrelation time of a series: about how many consecutive samples
+    carry one independent sample's worth of information (1 for white noise)"""
+    x = np.asarray(series, dtype=np.float64)
+    if len(x) < 4 or x.var() == 0:
+        return 1.0
+    x = x - x.mean()
+    acf = np.correlate(x, x, 'full')[len(x) - 1:] / (x.var() * len(x))
+    tau = 1.0
+    # Sum the initial positive stretch; later lags are mostly estimation noise
+    for rho in acf[1:len(x) // 2]:
+        if rho <= 0:
+            break
+        tau += 2 * rho
+    return tau
+
+def block_means(series_per_run, block):
+    """Means of consecutive non-overlapping blocks, never spanning two runs"""
+    return [float(np.mean(series[start:start + block]))
+            for series in series_per_run for start in range(0, len(series) - block + 1, block)]
+
+def interval_blocks(baseline_records, candidate_records):
+    """(block length, baseline block means, candidate block means) of per-interval IOPS.
+
+    Adjacent status intervals are strongly autocorrelated, so permuting them as if they
+    were independent overstates significance. Means of blocks twice the longest
+    autocorrelation time on either side are close to independent.
+    """
+    before = [interval_iops(record) for record in baseline_records]
+    after = [interval_iops(record) for record in candidate_records]
+    block = max([int(np.ceil(2 * autocorrelation_time(series))) for series in before + after if series] or [1])
+    return block, block_means(before, block), block_means(after, block)
+
+def sides(store, baseline, record):
+    """(baseline runs, candidate runs) to compare: each run with its stored repeats, the
+    pinned baseline first; a repeat set holding the baseline only counts on its side"""
+    before = store.repeats(baseline)
+    baseline_ids = {run['run_id'] for run in before}
+    return before, [run for run in store.repeats(record) if run['run_id'] not in baseline_ids]
+
+def compare(baseline_records, candidate_records, criteria):
+    """Diff candidate run(s) against baseline run(s).
+
+    Each side may hold one run or repeats of the same configuration (the pinned
+    baseline first); metrics are averaged per side. Returns per-metric deltas, the IOPS significance test and
+    whether the candidate regressed beyond criteria['threshold_pct'].
+    """
+    baseline_metrics = [run_metrics(read_final_document(r['result_file'])) for r in baseline_records]
+    candidate_metrics = [run_metrics(read_final_document(r['result_file'])) for r in candidate_records]
+
+    rows = []
+    for metric, label, higher_is_better in METRICS:
+        before = float(np.mean([m[metric] for m in baseline_metrics]))
+        after = float(np.mean([m[metric] for m in candidate_metrics]))
+        delta_pct = (after - before) / before * 100 if before else 0.0
+        worse_pct = -delta_pct if higher_is_better else delta_pct
+        rows.append({
+            'metric': metric,
+            'label': label,
+            'baseline': before,
+            'candidate': after,
+            'delta_pct': delta_pct,
+            'regressed': worse_pct > criteria['threshold_pct'],
+        })
+
+    # Repeated runs are independent samples; with fewer, fall back to blocks of interval samples
+    if min(len(baseline_records), len(candidate_records)) >= criteria['min_repeats']:
+        basis, block = 'runs', None
+        before_samples = [m['iops'] for m in baseline_metrics]
+        after_samples = [m['iops'] for m in candidate_metrics]
+    else:
+        basis = 'intervals'
+        block, before_samples, after_samples = interval_blocks(baseline_records, candidate_records)
+    p_value = permutation_test(before_samples, after_samples, criteria['permutations'])
+    significant = p_value is not None and p_value < criteria['alpha']
+
+    return {
+        'baseline_run_id': baseline_records[0]['run_id'],
+        'metrics': rows,
+        'p_value': p_value,
+        'basis': basis,
+        'block': block,
+        'significant': significant,
+        # Latency regressions count on their own; an IOPS/bandwidth drop must also be significant
+        'regressed': any(
+            row['regressed'] and (row['metric'].startswith('p') or significant or p_value is None)
+            for row in rows
+        ),
+    }
@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from plotly.utils import PlotlyJSONEncoder
+
+TRIM_EVERY = 64
+
+class RenderCache:
+    """Content-addressed cache of rendered result views (component trees, figures, summaries).
+
+    Values are stored as serialized JSON and returned decoded, which Dash accepts as
+    component trees, so a hit skips loading the fio document and rebuilding figures.
+    Keys combine the result file's content hash with the view type and whatever else
+    the view depends on. An in-memory LRU sits in front of an optional directory tier.
+    """
+
+    def __init__(self, max_entries=256, directory=None, max_disk_entries=5000):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = self.misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def file_digest(self, path, chunk_size=1 << 20):
+        """Content hash of a file, recomputed only when its size or mtime changes"""
+        stat = os.stat(path)
+        signature = (stat.st_size, stat.st_mtime_ns)
+        cached = self._digests.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        self._digests[path] = (signature, digest.hexdigest())
+        return digest.hexdigest()
+
+    def key(self, kind, *parts):
+        """Cache key for a view type and the content hashes / parameters it depends on"""
+        material = json.dumps(parts, sort_keys=True, default=str)
+        return f"{kind}-{hashlib.blake2b(material.encode(), digest_size=16).hexdigest()}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return json.loads(self._entries[key])
+        if self.directory:
+            try:
+                with open(self._path(key)) as f:
+                    payload = f.read()
+                os.utime(self._path(key))
+            except OSError:
+                payload = None
+            if payload is not None:
+                self._remember(key, payload)
+                self.hits += 1
+                return json.loads(payload)
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store a value and return its decoded form (what a later hit would return)"""
+        payload = json.dumps(value, cls=PlotlyJSONEncoder)
+        self._remember(key, payload)
+        if self.directory:
+            tmp = f'{self._path(key)}.{os.getpid()}.tmp'
+            with open(tmp, 'w') as f:
+                f.write(payload)
+            os.replace(tmp, self._path(key))
+            self._writes += 1
+            if self._writes % TRIM_EVERY == 0:
+                self._trim_disk()
+        return json.loads(payload)
+
+    def get_or_build(self, key, build):
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, build())
+        return value
+
+    def _remember(self, key, payload):
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _trim_disk(self):
+        """Drop the least recently used files beyond max_disk_entries"""
+        with os.scandir(self.directory) as entries:
+            files = [(e.stat().st_mtime, e.path) for e in entries if e.name.endswith('.json')]
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_disk_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
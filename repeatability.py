@@ -0,0 +1,69 @@
+import numpy as np
+
+from regression import METRICS, run_metrics
+from results_store import read_final_document
+
+def bootstrap_ci(values, confidence=0.95, samples=2000, seed=0):
+    """Percentile bootstrap confidence interval for the mean"""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 2:
+        return None, None
+    rng = np.random.default_rng(seed)
+    means = values[rng.integers(0, len(values), size=(samples, len(values)))].mean(axis=1)
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(means, [tail, 100 - tail])
+    return float(low), float(high)
+
+def outliers(values, threshold=3.5):
+    """Indexes of values whose modified z-score exceeds threshold (Iglewicz and Hoaglin).
+
+    Median and MAD are barely moved by the outliers themselves, unlike mean and stddev,
+    so one bad run among a handful is still caught.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 3:
+        return []
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return []
+    scores = 0.6745 * np.abs(values - median) / mad
+    return [int(index) for index in np.flatnonzero(scores > threshold)]
+
+def describe(values, criteria):
+    """Mean, stddev, coefficient of variation and bootstrap CI of one metric across runs"""
+    values = np.asarray(values, dtype=np.float64)
+    mean = float(values.mean())
+    stddev = float(values.std(ddof=1)) if len(values) > 1 else None
+    low, high = bootstrap_ci(values, criteria['confidence'], criteria['bootstrap_samples'])
+    return {
+        'mean': mean,
+        'stddev': stddev,
+        'cv_pct': stddev / mean * 100 if stddev is not None and mean else None,
+        'ci_low': low,
+        'ci_high': high,
+        'ci_width_pct': (high - low) / mean * 100 if low is not None and mean else None,
+    }
+
+def summarize(run_ids, metrics, criteria):
+    """Statistics for the repeats of one configuration.
+
+    metrics holds run_metrics() per run. Outliers are judged on IOPS and dropped from
+    every metric; converged says whether the stop metrics' CIs are within target.
+    """
+    rejected = set(outliers([m['iops'] for m in metrics], criteria['outlier_z']))
+    kept = [m for index, m in enumerate(metrics) if index not in rejected]
+    stats = {metric: describe([m[metric] for m in kept], criteria) for metric, _, _ in METRICS} if kept else {}
+    widths = [stats[metric]['ci_width_pct'] for metric in criteria['stop_metrics'] if metric in stats]
+    return {
+        'runs': len(metrics),
+        'kept': len(kept),
+        'outliers': [run_ids[index] for index in sorted(rejected)],
+        'metrics': stats,
+        'converged': bool(widths) and len(kept) >= criteria['min_runs']
+                     and all(width is not None and width <= criteria['target_ci_pct'] for width in widths),
+    }
+
+def record_metrics(record):
+    """Headline metrics of a stored run, including percentiles from its merged histograms"""
+    return run_metrics(read_final_document(record['result_file']))
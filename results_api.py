@@ -0,0 +1,96 @@
+import gzip
+
+from flask import abort, jsonify, request
+
+from analysis import DEFAULT_PERCENTILES, analyze, latency_percentiles, merge_histograms
+
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_LEVEL = 6
+
+def job_stats(fio_data):
+    """Per job (and per host in client mode) throughput and latency"""
+    rows = []
+    for job in fio_data.get('jobs', []):
+        row = {'host': job.get('hostname', 'local'), 'job': job.get('jobname')}
+        for direction in ('read', 'write'):
+            stats = job.get(direction, {})
+            percentiles, _ = latency_percentiles([stats], (50, 99))
+            row.update({
+                f'{direction}_iops': stats.get('iops', 0),
+                f'{direction}_bw': stats.get('bw', 0) / 1024,
+                f'{direction}_lat_mean': stats.get('lat_ns', {}).get('mean', 0) / 1000,
+                f'{direction}_p50': percentiles[50],
+                f'{direction}_p99': percentiles[99],
+            })
+        rows.append(row)
+    return rows
+
+def percentile_table(fio_data):
+    """The full percentile ladder per direction, from merged histograms"""
+    stats = analyze(fio_data, DEFAULT_PERCENTILES)
+    return {
+        direction: {
+            'percentiles': [[p, v] for p, v in stats[direction]['percentiles'].items()],
+            'exact': stats[direction]['exact'],
+            'ios': stats[direction]['ios'],
+        } for direction in ('read', 'write', 'total')
+    }
+
+def latency_histogram(fio_data):
+    """Merged completion latency histogram per direction: bucket lower bounds (µs) and IO counts"""
+    histograms = {}
+    for direction in ('read', 'write'):
+        merged = merge_histograms([j.get(direction, {}) for j in fio_data.get('jobs', [])])
+        if merged is not None:
+            values, counts = merged
+            histograms[direction] = {'latency_us': (values / 1000).tolist(), 'count': counts.tolist()}
+    return histograms
+
+# Detail sections served lazily, keyed by the name used in URLs and panel ids
+SECTIONS = {
+    'jobs': job_stats,
+    'percentiles': percentile_table,
+    'histogram': latency_histogram,
+}
+
+def register_result_routes(server, get_summary, get_section):
+    """Expose compact run summaries and lazily loaded detail sections as JSON.
+
+    get_summary(run_id) returns the compact record or None; get_section(run_id, name)
+    returns the section payload or None when the run is unknown.
+    """
+
+    @server.route('/api/runs/<run_id>')
+    def run_summary(run_id):
+        summary = get_summary(run_id)
+        if summary is None:
+            abort(404)
+        return jsonify(summary)
+
+    @server.route('/api/runs/<run_id>/<section>')
+    def run_section(run_id, section):
+        if section not in SECTIONS:
+            abort(404)
+        payload = get_section(run_id, section)
+        if payload is None:
+            abort(404)
+        return jsonify(payload)
+
+def register_compression(server, min_bytes=COMPRESS_MIN_BYTES, level=COMPRESS_LEVEL):
+    """gzip JSON responses (callback updates and the result API) for clients that accept it"""
+
+    @server.after_request
+    def compress(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.mimetype != 'application/json'
+                or 'gzip' not in request.headers.get('Accept-Encoding', '').lower()
+                or 'Content-Encoding' in response.headers):
+            return response
+        data = response.get_data()
+        if len(data) < min_bytes:
+            return response
+        response.set_data(gzip.compress(data, compresslevel=level))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Content-Length'] = str(len(response.get_data()))
+        response.vary.add('Accept-Encoding')
+        return response
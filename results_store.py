@@ -0,0 +1,391 @@
+import argparse
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+
+from analysis import direction_stats
+from streaming import normalize_document
+
+DEFAULT_DB_PATH = os.environ.get('FLOWFIO_DB', '/app/test-data/flowfio.db')
+
+SUMMARY_COLUMNS = [
+    'read_iops', 'write_iops', 'read_bw', 'write_bw',
+    'read_lat_mean', 'write_lat_mean', 'read_p99', 'write_p99'
+]
+
+RUN_COLUMNS = [
+    'run_id', 'timestamp', 'workload_preset', 'storage_type', 'scenario',
+    'rw', 'rwmixread', 'bs', 'iodepth', 'numjobs', 'direct', 'runtime',
+    'result_file', 'log_file', 'sweep_id', 'steady_state', 'converged_at', 'hosts',
+    'latency_log', 'baseline_run_id', 'regression', 'telemetry_file', 'fio_cpu_pct', 'cpu_iowait_pct', 'device',
+    'ioengine', 'host_cpu_cores', 'target', 'cpus_allowed', 'numa_cpu_nodes',
+    'precondition_run_id', 'trace', 'replay_speed', 'profile'
+] + SUMMARY_COLUMNS
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id TEXT PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    workload_preset TEXT,
+    storage_type TEXT,
+    scenario TEXT,
+    rw TEXT,
+    rwmixread INTEGER,
+    bs TEXT,
+    iodepth INTEGER,
+    numjobs INTEGER,
+    direct INTEGER,
+    runtime REAL,
+    result_file TEXT,
+    log_file TEXT,
+    read_iops REAL,
+    write_iops REAL,
+    read_bw REAL,
+    write_bw REAL,
+    read_lat_mean REAL,
+    write_lat_mean REAL,
+    read_p99 REAL,
+    write_p99 REAL,
+    sweep_id TEXT,
+    steady_state TEXT,
+    converged_at REAL,
+    hosts TEXT,
+    latency_log TEXT,
+    baseline_run_id TEXT,
+    regression TEXT,
+    telemetry_file TEXT,
+    fio_cpu_pct REAL,
+    cpu_iowait_pct REAL,
+    device TEXT,
+    ioengine TEXT,
+    host_cpu_cores REAL,
+    target TEXT,
+    cpus_allowed TEXT,
+    numa_cpu_nodes TEXT,
+    precondition_run_id TEXT,
+    trace TEXT,
+    replay_speed REAL,
+    profile TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_preset_storage_ts ON runs (workload_preset, storage_type, timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_params ON runs (bs, iodepth, numjobs, timestamp);
+CREATE INDEX IF NOT EXISTS idx_runs_timestamp ON runs (timestamp);
+CREATE TABLE IF NOT EXISTS baselines (
+    workload_preset TEXT NOT NULL,
+    storage_type TEXT NOT NULL,
+    run_id TEXT NOT NULL,
+    pinned_at REAL NOT NULL,
+    PRIMARY KEY (workload_preset, storage_type)
+);
+CREATE TABLE IF NOT EXISTS preconditioning (
+    path TEXT PRIMARY KEY,
+    target TEXT,
+    state TEXT NOT NULL,
+    signature TEXT,
+    size TEXT,
+    run_id TEXT,
+    rounds INTEGER,
+    curve_file TEXT,
+    completed_at REAL
+);
+"""
+
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_runs_sweep ON runs (sweep_id);
+"""
+
+# Columns added after the first release; older databases get them via ALTER TABLE
+MIGRATED_COLUMNS = {
+    'sweep_id': 'TEXT',
+    'steady_state': 'TEXT',
+    'converged_at': 'REAL',
+    'hosts': 'TEXT',
+    'latency_log': 'TEXT',
+    'baseline_run_id': 'TEXT',
+    'regression': 'TEXT',
+    'telemetry_file': 'TEXT',
+    'fio_cpu_pct': 'REAL',
+    'cpu_iowait_pct': 'REAL',
+    'device': 'TEXT',
+    'ioengine': 'TEXT',
+    'host_cpu_cores': 'REAL',
+    'target': 'TEXT',
+    'cpus_allowed': 'TEXT',
+    'numa_cpu_nodes': 'TEXT',
+    'precondition_run_id': 'TEXT',
+    'trace': 'TEXT',
+    'replay_speed': 'REAL',
+    'profile': 'TEXT',
+}
+
+# Fields sent to clients in place of the full fio document
+COMPACT_FIELDS = ['run_id', 'timestamp', 'workload_preset', 'storage_type', 'scenario', 'bs', 'iodepth', 'numjobs',
+                  'steady_state', 'baseline_run_id', 'regression', 'fio_cpu_pct', 'cpu_iowait_pct', 'ioengine',
+                  'host_cpu_cores', 'target', 'precondition_run_id', 'trace', 'replay_speed', 'profile'] + SUMMARY_COLUMNS
+
+# Runs that share these (and a sweep / repeat set) are repeats of one configuration
+REPEAT_COLUMNS = ('workload_preset', 'storage_type', 'scenario', 'rw', 'rwmixread', 'bs', 'iodepth', 'numjobs',
+                  'direct', 'ioengine', 'target', 'device')
+
+FILTER_COLUMNS = ('workload_preset', 'storage_type', 'scenario', 'rw', 'bs', 'iodepth', 'numjobs', 'sweep_id')
+
+def summarize_fio(fio_data):
+    """Reduce a final fio document to the summary metrics kept per run"""
+    summary = {}
+    for direction in ('read', 'write'):
+        stats = direction_stats(fio_data, (direction,), (99,))
+        summary[f'{direction}_iops'] = stats['iops']
+        summary[f'{direction}_bw'] = stats['bw']
+        summary[f'{direction}_lat_mean'] = stats['lat_mean']
+        summary[f'{direction}_p99'] = stats['percentiles'][99]
+    return summary
+
+def compact_record(record):
+    return {field: record.get(field) for field in COMPACT_FIELDS}
+
+def job_parameters(fio_data):
+    """Recover the workload parameters recorded in a fio document's job options"""
+    options = dict(fio_data.get('global options', {}))
+    if fio_data.get('jobs'):
+        options.update(fio_data['jobs'][0].get('job options', {}))
+    return {
+        'rw': options.get('rw'),
+        'rwmixread': _to_int(options.get('rwmixread')),
+        'bs': options.get('bs'),
+        'iodepth': _to_int(options.get('iodepth')),
+        'numjobs': _to_int(options.get('numjobs')),
+        'direct': _to_int(options.get('direct')),
+        'runtime': _to_int(options.get('runtime')),
+    }
+
+def infer_workload_preset(params, workloads):
+    """Match recorded rw/rwmixread/bs against the presets; None unless exactly one fits"""
+    matches = [
+        name for name, workload in workloads.items()
+        if workload.get('rw') == params.get('rw')
+        and workload.get('rwmixread', 100) == (params.get('rwmixread') or 100)
+        and workload.get('bs') == params.get('bs')
+    ]
+    return matches[0] if len(matches) == 1 else None
+
+def read_final_document(path, chunk_size=1 << 20):
+    """Load only the last JSON document of a fio output file, scanning backwards from the end"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        tail = b''
+        while position > 0:
+            step = min(chunk_size, position)
+            position -= step
+            f.seek(position)
+            tail = f.read(step) + tail
+            start = tail.rfind(b'\n{')
+            if start >= 0:
+                tail = tail[start + 1:]
+                break
+    start = tail.find(b'{')
+    end = tail.rfind(b'\n}')
+    if start < 0 or end < 0:
+        raise ValueError(f"No fio document found in {path}")
+    return normalize_document(json.loads(tail[start:end + 2]))
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+class ResultsStore:
+    """SQLite-backed repository of finished runs with an indexed summary table"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(SCHEMA)
+            existing = {row['name'] for row in conn.execute("PRAGMA table_info(runs)")}
+            for column, column_type in MIGRATED_COLUMNS.items():
+                if column not in existing:
+                    conn.execute(f"ALTER TABLE runs ADD COLUMN {column} {column_type}")
+            conn.executescript(INDEXES)
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+
+    def _row(self, run):
+        return tuple(run.get(column) for column in RUN_COLUMNS)
+
+    def ingest(self, run, fio_data):
+        """Record one finished run; run carries the metadata known at launch time"""
+        record = {**job_parameters(fio_data), **{k: v for k, v in run.items() if v is not None}}
+        record.update(summarize_fio(fio_data))
+        self.ingest_many([record])
+        return record
+
+    def ingest_many(self, records):
+        placeholders = ', '.join('?' for _ in RUN_COLUMNS)
+        with self._connect() as conn:
+            conn.executemany(
+                f"INSERT OR REPLACE INTO runs ({', '.join(RUN_COLUMNS)}) VALUES ({placeholders})",
+                (self._row(record) for record in records)
+            )
+
+    def query(self, limit=100, since=None, until=None, **filters):
+        """Return recent runs, newest first, filtered on any indexed column"""
+        clauses, params = [], []
+        for column in FILTER_COLUMNS:
+            value = filters.get(column)
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('timestamp < ?')
+            params.append(until)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM runs {where} ORDER BY timestamp DESC LIMIT ?", params + [limit]
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM runs WHERE run_id = ?", (run_id,)).fetchone()
+        return dict(row) if row else None
+
+    def latest_runs(self):
+        """The most recent run of every workload preset / storage type / device combination"""
+        with self._connect() as conn:
+            # SQLite takes the bare columns of an aggregate query from the row holding the MAX
+            rows = conn.execute(
+                "SELECT *, MAX(timestamp) AS latest FROM runs GROUP BY workload_preset, storage_type, device"
+            ).fetchall()
+        return [{k: v for k, v in dict(row).items() if k != 'latest'} for row in rows]
+
+    def repeats(self, record):
+        """The run followed by the stored repeats of its configuration in the same sweep or repeat set"""
+        if not record.get('sweep_id'):
+            return [record]
+        clauses = ' AND '.join(f'{column} IS ?' for column in REPEAT_COLUMNS)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM runs WHERE sweep_id = ? AND run_id != ? AND {clauses} ORDER BY timestamp",
+                [record['sweep_id'], record['run_id']] + [record.get(column) for column in REPEAT_COLUMNS]
+            ).fetchall()
+        return [record] + [dict(row) for row in rows]
+
+    def pin_baseline(self, run_id):
+        """Make a run the baseline for its workload preset and storage type"""
+        run = self.get(run_id)
+        if run is None:
+            raise ValueError(f"Unknown run {run_id}")
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO baselines (workload_preset, storage_type, run_id, pinned_at) "
+                "VALUES (?, ?, ?, ?)",
+                (run['workload_preset'] or '', run['storage_type'] or '', run_id, time.time())
+            )
+        return run
+
+    def baseline(self, workload_preset, storage_type):
+        """The pinned baseline run record for a preset and storage type, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT runs.* FROM baselines JOIN runs USING (run_id) "
+                "WHERE baselines.workload_preset = ? AND baselines.storage_type = ?",
+                (workload_preset or '', storage_type or '')
+            ).fetchone()
+        return dict(row) if row else None
+
+    def preconditioning(self, paths):
+        """Preconditioning state rows for the given target paths"""
+        placeholders = ', '.join('?' for _ in paths)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM preconditioning WHERE path IN ({placeholders})", list(paths)).fetchall()
+        return [dict(row) for row in rows]
+
+    def record_preconditioning(self, paths, target, state, signature, size, run_id, rounds=None, curve_file=None):
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO preconditioning "
+                "(path, target, state, signature, size, run_id, rounds, curve_file, completed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path, target, state, signature, str(size), run_id, rounds, curve_file, time.time()) for path in paths]
+            )
+
+    def note_writes(self, paths, signature):
+        """A run wrote to these paths with another pattern than they were conditioned with: mark them stale"""
+        placeholders = ', '.join('?' for _ in paths)
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE preconditioning SET state = 'stale' WHERE path IN ({placeholders}) AND signature != ?",
+                list(paths) + [signature]
+            )
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def backfill(self, directory, workloads=None, batch_size=500):
+        """Import existing results_<timestamp>.json files one at a time, committing in batches"""
+        imported, batch = 0, []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not (entry.name.startswith('results_') and entry.name.endswith('.json')):
+                    continue
+                run_id = entry.name[len('results_'):-len('.json')]
+                try:
+                    fio_data = read_final_document(entry.path)
+                except (OSError, ValueError) as e:
+                    print(f"Skipping {entry.path}: {e}", flush=True)
+                    continue
+
+                record = job_parameters(fio_data)
+                record.update(summarize_fio(fio_data))
+                record.update({
+                    'run_id': run_id,
+                    'timestamp': fio_data.get('timestamp') or entry.stat().st_mtime,
+                    'workload_preset': infer_workload_preset(record, workloads or {}),
+                    'result_file': entry.path,
+                    'log_file': os.path.join(directory, f'log_{run_id}.txt'),
+                })
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    self.ingest_many(batch)
+                    imported += len(batch)
+                    batch = []
+        if batch:
+            self.ingest_many(batch)
+            imported += len(batch)
+        return imported
+
+def main():
+    parser = argparse.ArgumentParser(description="FlowFIO results store maintenance")
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--backfill', metavar='DIR', help="import existing results_*.json files")
+    parser.add_argument('--config', default='fio_defaults.yaml')
+    args = parser.parse_args()
+
+    store = ResultsStore(args.db)
+    if args.backfill:
+        import yaml
+        with open(args.config, 'r') as f:
+            workloads = yaml.safe_load(f).get('workloads', {})
+        started = time.perf_counter()
+        imported = store.backfill(args.backfill, workloads)
+        print(f"Imported {imported} runs in {time.perf_counter() - started:.1f}s", flush=True)
+    print(f"{store.count()} runs in {args.db}", flush=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,253 @@
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from results_store import DEFAULT_DB_PATH
+from streaming import SAMPLE_BUFFER_SIZE
+
+POLL_INTERVAL = 0.5
+# Live samples of every run are written together, once per this many seconds
+FLUSH_INTERVAL = 0.5
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS live_runs (
+    run_id TEXT PRIMARY KEY,
+    start_time REAL NOT NULL,
+    runtime REAL,
+    log_file TEXT,
+    output_file TEXT,
+    settled INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    finished_at REAL
+);
+CREATE TABLE IF NOT EXISTS live_samples (
+    run_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    sample TEXT NOT NULL,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS sweep_state (
+    sweep_id TEXT PRIMARY KEY,
+    snapshot TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sweep_requests (
+    sweep_id TEXT PRIMARY KEY,
+    spec TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    claimed REAL
+);
+"""
+
+class RunStateStore:
+    """Live run progress shared between the process that owns fio and any number of web workers.
+
+    The scheduler publishes each run it launches and appends every interval sample as
+    the stream produces it; get() returns a run dict that reads the same state back and
+    quacks like a local one (stream.buffer, stream.wait_for_update, settled, ...), so
+    progress views and the push channel work from whichever worker serves the request.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, poll_interval=POLL_INTERVAL, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flusher = None
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self):
+        """This thread's connection (kept open), inside a transaction"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+        with conn:
+            yield conn
+
+    def _append(self, run_id, samples):
+        """Queue samples for the next flush; stream listeners must not wait on the database"""
+        rows = [(run_id, sample['seq'], json.dumps(sample)) for sample in samples]
+        with self._pending_lock:
+            self._pending.extend(rows)
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Write the queued samples of all runs in one transaction"""
+        with self._pending_lock:
+            rows, self._pending = self._pending, []
+        if rows:
+            with self._connect() as conn:
+                conn.executemany("INSERT OR IGNORE INTO live_samples (run_id, seq, sample) VALUES (?, ?, ?)", rows)
+
+    def publish(self, run_id, run):
+        """Share a launched run and mirror its stream's samples from now on"""
+        stream = run['stream']
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO live_runs (run_id, start_time, runtime, log_file, output_file) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (run_id, run['start_time'].timestamp(), run['runtime'], run['log_file'], run['output_file'])
+            )
+        # The stream is already running: listen first, then copy what it had, so nothing falls in between
+        stream.listeners.append(lambda sample: self._append(run_id, [sample]))
+        self._append(run_id, stream.buffer.snapshot())
+
+    def settle(self, run_id, error=None):
+        """Mark a run's result as recorded (or failed); viewers then load it from the results store"""
+        self.flush()
+        with self._connect() as conn:
+            conn.execute("UPDATE live_runs SET settled = 1, error = ?, finished_at = ? WHERE run_id = ?",
+                         (error, time.time(), run_id))
+
+    def prune(self, cutoff):
+        """Forget runs that finished before cutoff"""
+        with self._connect() as conn:
+            stale = [row[0] for row in conn.execute("SELECT run_id FROM live_runs WHERE finished_at < ?", (cutoff,))]
+            conn.executemany("DELETE FROM live_samples WHERE run_id = ?", [(run_id,) for run_id in stale])
+            conn.executemany("DELETE FROM live_runs WHERE run_id = ?", [(run_id,) for run_id in stale])
+            conn.execute("DELETE FROM sweep_state WHERE updated < ?", (cutoff,))
+            conn.execute("DELETE FROM sweep_requests WHERE submitted < ? AND sweep_id NOT IN "
+                         "(SELECT sweep_id FROM sweep_state)", (cutoff,))
+
+    def _run_row(self, run_id):
+        with self._connect() as conn:
+            return conn.execute("SELECT * FROM live_runs WHERE run_id = ?", (run_id,)).fetchone()
+
+    def get(self, run_id):
+        """A run dict backed by this store, or None if no process has published run_id"""
+        if run_id is None:
+            return None
+        row = self._run_row(run_id)
+        if row is None:
+            return None
+        return {
+            'run_id': run_id,
+            'stream': SharedStream(self, run_id),
+            'settled': SharedSettled(self, run_id),
+            'start_time': datetime.fromtimestamp(row['start_time']),
+            'runtime': row['runtime'],
+            'log_file': row['log_file'],
+            'output_file': row['output_file'],
+            'error': row['error'],
+            'finished_at': row['finished_at'],
+        }
+
+    def samples_since(self, run_id, seq, limit=SAMPLE_BUFFER_SIZE):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT sample FROM live_samples WHERE run_id = ? AND seq > ? ORDER BY seq DESC LIMIT ?",
+                (run_id, seq or 0, limit)
+            ).fetchall()
+        return [json.loads(row[0]) for row in reversed(rows)]
+
+    def last_seq(self, run_id):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM live_samples WHERE run_id = ?",
+                                (run_id,)).fetchone()[0]
+
+    def is_settled(self, run_id):
+        row = self._run_row(run_id)
+        return row is None or bool(row['settled'])
+
+    def wait(self, condition, timeout):
+        """Poll condition() until it holds; False on timeout"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not condition():
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+        return True
+
+    def save_sweep(self, sweep_id, snapshot):
+        with self._connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO sweep_state (sweep_id, snapshot, updated) VALUES (?, ?, ?)",
+                         (sweep_id, json.dumps(snapshot), time.time()))
+
+    def request_sweep(self, sweep_id, spec, snapshot):
+        """Ask the queue owner to start a sweep (see sweep.SweepController); snapshot stands in until it does"""
+        with self._connect() as conn:
+            conn.execute("INSERT INTO sweep_requests (sweep_id, spec, submitted) VALUES (?, ?, ?)",
+                         (sweep_id, json.dumps(spec), time.time()))
+            conn.execute("INSERT OR REPLACE INTO sweep_state (sweep_id, snapshot, updated) VALUES (?, ?, ?)",
+                         (sweep_id, json.dumps(snapshot), time.time()))
+
+    def claim_sweeps(self):
+        """Specs of the sweeps requested since the last call, oldest first"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT sweep_id, spec FROM sweep_requests WHERE claimed IS NULL "
+                                "ORDER BY submitted").fetchall()
+            conn.executemany("UPDATE sweep_requests SET claimed = ? WHERE sweep_id = ?",
+                             [(time.time(), row['sweep_id']) for row in rows])
+        return [json.loads(row['spec']) for row in rows]
+
+    def claimed_sweeps(self):
+        """Ids of sweeps an owner has started, for finding ones left behind by an earlier owner"""
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT sweep_id FROM sweep_requests WHERE claimed IS NOT NULL")]
+
+    def sweep(self, sweep_id):
+        """The snapshot a sweep last published (see SweepRunner.publish), or None"""
+        with self._connect() as conn:
+            row = conn.execute("SELECT snapshot FROM sweep_state WHERE sweep_id = ?", (sweep_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+class SharedBuffer:
+    """SampleBuffer interface over a published run's samples"""
+
+    def __init__(self, state, run_id):
+        self.state = state
+        self.run_id = run_id
+
+    @property
+    def last_seq(self):
+        return self.state.last_seq(self.run_id)
+
+    def since(self, seq):
+        return self.state.samples_since(self.run_id, seq)
+
+    def snapshot(self):
+        return self.state.samples_since(self.run_id, 0)
+
+class SharedStream:
+    """FioStatusStream interface for viewers in other processes; the stream counts as finished once the run settles"""
+
+    def __init__(self, state, run_id):
+        self.state = state
+        self.run_id = run_id
+        self.buffer = SharedBuffer(state, run_id)
+
+    @property
+    def finished(self):
+        return self.state.is_settled(self.run_id)
+
+    def wait_for_update(self, seq, timeout):
+        return self.state.wait(lambda: self.buffer.last_seq > seq or self.finished, timeout)
+
+class SharedSettled:
+    """threading.Event interface over a published run's settled flag"""
+
+    def __init__(self, state, run_id):
+        self.state = state
+        self.run_id = run_id
+
+    def is_set(self):
+        return self.state.is_settled(self.run_id)
+
+    def wait(self, timeout=None):
+        return self.state.wait(self.is_set, timeout)
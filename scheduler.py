@@ -0,0 +1,399 @@
+import fcntl
+import json
+import signal
+import sqlite3
+import threading
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+
+import supervision
+from engine import (attach_run, finish_run, launch_run, new_run_id, path_devices, plan_precondition, plan_run,
+                    precondition_stage)
+from results_store import DEFAULT_DB_PATH
+
+POLL_INTERVAL = 0.5
+RUN_RETENTION_SECONDS = 600
+
+TERMINAL_STATUSES = ('done', 'failed', 'cancelled')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS run_queue (
+    run_id TEXT PRIMARY KEY,
+    device TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    position REAL NOT NULL,
+    status TEXT NOT NULL,
+    params TEXT NOT NULL,
+    submitted REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    error TEXT,
+    depends_on TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    pid INTEGER,
+    pid_created REAL,
+    command TEXT,
+    output_file TEXT,
+    log_file TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_run_queue_status ON run_queue (status, priority, position);
+"""
+
+# Columns added after the first release, with their types for ALTER TABLE
+MIGRATED_COLUMNS = {
+    'depends_on': 'TEXT',
+    'cancel_requested': 'INTEGER NOT NULL DEFAULT 0',
+    'pid': 'INTEGER',
+    'pid_created': 'REAL',
+    'command': 'TEXT',
+    'output_file': 'TEXT',
+    'log_file': 'TEXT',
+}
+
+def claim_supervisor(db_path=DEFAULT_DB_PATH):
+    """Take the lock that makes this process the one dispatching db_path's queue.
+
+    Returns the open lock file (held until it is closed or the process exits), or None
+    if another process (python supervisor.py, or a python app.py) already owns the queue.
+    """
+    lock = open(f'{db_path}.supervisor.lock', 'a')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        return None
+    return lock
+
+class RunScheduler(threading.Thread):
+    """Persistent run queue that dispatches fio runs with a concurrency limit per target device.
+
+    Queue entries live in SQLite so queued work survives a restart; live run state
+    (process, stream) is kept in `runs`, keyed by run_id, for progress views, and
+    published to `shared` (a RunStateStore) for other processes. Any process may submit,
+    reorder or cancel; only the one that starts the thread (see claim_supervisor)
+    launches fio.
+    """
+
+    def __init__(self, config, store, db_path=DEFAULT_DB_PATH, runs=None, max_per_device=1,
+                 poll_interval=POLL_INTERVAL, metrics=None, shared=None):
+        super().__init__(daemon=True)
+        self.config = config
+        self.store = store
+        self.db_path = db_path
+        self.runs = runs if runs is not None else {}
+        self.max_per_device = max_per_device
+        self.poll_interval = poll_interval
+        self.metrics = metrics
+        self.shared = shared
+        self._active = {}
+        self._pruned = 0
+        self._queue_changed = True
+        self._changed = threading.Condition()
+        self._stop_event = threading.Event()
+
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row['name'] for row in conn.execute("PRAGMA table_info(run_queue)")}
+            for column, column_type in MIGRATED_COLUMNS.items():
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE run_queue ADD COLUMN {column} {column_type}")
+
+    @contextmanager
+    def _connect(self):
+        with closing(sqlite3.connect(self.db_path, timeout=30)) as conn:
+            conn.row_factory = sqlite3.Row
+            with conn:
+                yield conn
+
+    def _plan(self, run_id, params):
+        if params.get('stage') == 'precondition':
+            return plan_precondition(self.config, run_id=run_id,
+                                     **{key: value for key, value in params.items() if key != 'stage'})
+        return plan_run(self.config, run_id=run_id, **params)
+
+    def submit(self, params, priority=0, run_id=None):
+        """Queue a run; params are plan_run keyword arguments. Returns the queue entry.
+
+        A 'precondition' criteria dict queues a preconditioning stage ahead of the run
+        (which then waits for it) unless the target's recorded state is still valid.
+        """
+        run_id = run_id or new_run_id()
+        params = dict(params)
+        stages = []
+        criteria = params.pop('precondition', None)
+        if criteria:
+            stage, params['precondition_run_id'] = precondition_stage(self.config, self.store, params, criteria)
+            if stage is not None:
+                stage_id = params['precondition_run_id'] = f'{run_id}_pre'
+                self._plan(stage_id, dict(stage, stage='precondition'))
+                stages.append((stage_id, dict(stage, stage='precondition'), None))
+        plan = self._plan(run_id, params)
+        device = plan['device'] or ','.join(sorted(path_devices(plan['targets'])))
+        stages.append((run_id, params, stages[0][0] if stages else None))
+
+        with self._connect() as conn:
+            position = conn.execute("SELECT COALESCE(MAX(position), 0) + 1 FROM run_queue").fetchone()[0]
+            conn.executemany(
+                "INSERT INTO run_queue (run_id, device, priority, position, status, params, submitted, depends_on) "
+                "VALUES (?, ?, ?, ?, 'queued', ?, ?, ?)",
+                [(stage_id, device, priority, position + index, json.dumps(stage_params), time.time(), depends_on)
+                 for index, (stage_id, stage_params, depends_on) in enumerate(stages)]
+            )
+        self._notify()
+        return dict(self.job(run_id), command=plan['command'], runtime=plan['runtime'])
+
+    def job(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM run_queue WHERE run_id = ?", (run_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def _job(self, row):
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        return job
+
+    def jobs(self, statuses=('queued', 'running')):
+        """Queue entries in dispatch order"""
+        placeholders = ', '.join('?' for _ in statuses)
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT * FROM run_queue WHERE status IN ({placeholders}) "
+                "ORDER BY status = 'queued', priority DESC, position", statuses
+            ).fetchall()
+        return [self._job(row) for row in rows]
+
+    def queue_position(self, run_id):
+        """1-based position among queued runs for the same device, or None"""
+        job = self.job(run_id)
+        if not job or job['status'] != 'queued':
+            return None
+        with self._connect() as conn:
+            ahead = conn.execute(
+                "SELECT COUNT(*) FROM run_queue WHERE status = 'queued' AND device = ? "
+                "AND (priority > ? OR (priority = ? AND position < ?))",
+                (job['device'], job['priority'], job['priority'], job['position'])
+            ).fetchone()[0]
+        return ahead + 1
+
+    def cancel(self, run_id):
+        """Drop a queued run or stop a running one (flagged for the owning process if it is not this one)"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE run_queue SET status = 'cancelled', finished = ? WHERE run_id = ? AND status = 'queued'",
+                (time.time(), run_id)
+            )
+            conn.execute("UPDATE run_queue SET cancel_requested = 1 WHERE run_id = ? AND status = 'running'",
+                         (run_id,))
+        self._stop_run(run_id)
+        self._notify()
+
+    def _stop_run(self, run_id):
+        run = self._active.get(run_id)
+        if run is not None and not run.get('cancelled'):
+            run['cancelled'] = True
+            supervision.interrupt(run)
+
+    def live_run(self, run_id):
+        """Live state of a launched run: this process's own, else as published by the owning process"""
+        run = self.runs.get(run_id)
+        if run is None and self.shared is not None:
+            run = self.shared.get(run_id)
+        return run
+
+    def move(self, run_id, offset):
+        """Move a queued run up (negative offset) or down among queued runs of the same priority"""
+        job = self.job(run_id)
+        if not job or job['status'] != 'queued':
+            return
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT run_id, position FROM run_queue WHERE status = 'queued' AND priority = ? ORDER BY position",
+                (job['priority'],)
+            ).fetchall()
+            order = [row['run_id'] for row in rows]
+            index = order.index(run_id)
+            target = max(0, min(len(order) - 1, index + offset))
+            if target == index:
+                return
+            positions = [row['position'] for row in rows]
+            order.insert(target, order.pop(index))
+            conn.executemany(
+                "UPDATE run_queue SET position = ? WHERE run_id = ?",
+                zip(positions, order)
+            )
+        self._notify()
+
+    def set_priority(self, run_id, priority):
+        with self._connect() as conn:
+            conn.execute("UPDATE run_queue SET priority = ? WHERE run_id = ? AND status = 'queued'",
+                         (priority, run_id))
+        self._notify()
+
+    def wait(self, run_id, timeout=None):
+        """Block until a run reaches a terminal state; return its stored record if it succeeded"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.job(run_id)
+            if job is None:
+                return None
+            if job['status'] in TERMINAL_STATUSES:
+                return self.store.get(run_id) if job['status'] == 'done' else None
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return None
+            with self._changed:
+                self._changed.wait(min(remaining or 1.0, 1.0))
+
+    def queue_counts(self):
+        """{(device, status): count} of queued and running runs"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT device, status, COUNT(*) FROM run_queue WHERE status IN ('queued', 'running') "
+                "GROUP BY device, status"
+            ).fetchall()
+        return {(row[0], row[1]): row[2] for row in rows}
+
+    def _notify(self):
+        self._queue_changed = True
+        with self._changed:
+            self._changed.notify_all()
+
+    def _set_status(self, run_id, status, error=None, **columns):
+        assignments = ['status = ?', 'error = ?'] + [f'{column} = ?' for column in columns]
+        with self._connect() as conn:
+            conn.execute(
+                f"UPDATE run_queue SET {', '.join(assignments)} WHERE run_id = ?",
+                [status, error] + list(columns.values()) + [run_id]
+            )
+        self._notify()
+
+    def _dispatch(self):
+        # A job's device may list several comma-separated devices (e.g. every host of a distributed run)
+        busy = {}
+        for run in self._active.values():
+            for device in run['device'].split(','):
+                busy[device] = busy.get(device, 0) + 1
+
+        for job in self.jobs(('queued',)):
+            if job['depends_on']:
+                dependency = self.job(job['depends_on'])
+                if dependency and dependency['status'] not in TERMINAL_STATUSES:
+                    continue
+                if dependency and dependency['status'] != 'done':
+                    self._set_status(job['run_id'], 'failed', f"Preconditioning {job['depends_on']} did not complete",
+                                     finished=time.time())
+                    continue
+            devices = job['device'].split(',')
+            if any(busy.get(device, 0) >= self.max_per_device for device in devices):
+                continue
+            for device in devices:
+                busy[device] = busy.get(device, 0) + 1
+            try:
+                run = launch_run(self._plan(job['run_id'], job['params']))
+            except Exception as e:
+                self._set_status(job['run_id'], 'failed', str(e), finished=time.time())
+                continue
+            # Enough to find the process and its output again after a restart
+            pid, created = supervision.process_identity(run['process'].pid)
+            self._set_status(job['run_id'], 'running', started=run['start_time'].timestamp(), pid=pid,
+                             pid_created=created, command=run['command'], output_file=run['output_file'],
+                             log_file=run['log_file'])
+            self._track(job, run)
+
+    def _track(self, job, run):
+        run['device'] = run['record']['device'] = job['device']
+        self._active[job['run_id']] = run
+        if self.metrics is not None:
+            self.metrics.run_started(job['run_id'], run)
+        self.runs[job['run_id']] = run
+        if self.shared is not None:
+            self.shared.publish(job['run_id'], run)
+
+    def _recover(self):
+        """Take over the runs a previous owner of the queue left running.
+
+        fio still running (same pid and start time) is reattached; fio that exited in the
+        meantime is harvested from its output file through the same path; runs that never
+        recorded a process go back to the front of their queue, unless they were being cancelled.
+        """
+        for job in self.jobs(('running',)):
+            run_id = job['run_id']
+            if job['pid'] is None:
+                if job['cancel_requested']:
+                    self._set_status(run_id, 'cancelled', finished=time.time())
+                else:
+                    self._set_status(run_id, 'queued', started=None)
+                continue
+            process = supervision.find_process(job['pid'], job['pid_created'])
+            try:
+                run = self._plan(run_id, job['params'])
+                run['output_file'] = run['record']['result_file'] = job['output_file']
+                run['log_file'] = run['record']['log_file'] = job['log_file']
+                run = attach_run(run, supervision.AttachedProcess(job['pid'], process),
+                                 datetime.fromtimestamp(job['started']))
+            except Exception as e:
+                if process is not None:
+                    process.send_signal(signal.SIGINT)
+                self._set_status(run_id, 'failed', f"Could not take over after a restart: {e}", finished=time.time())
+                continue
+            print(f"{'Reattached to' if process else 'Harvesting'} run {run_id} (fio pid {job['pid']})", flush=True)
+            self._track(job, run)
+
+    def _reap(self):
+        if self._active:
+            with self._connect() as conn:
+                requested = [row[0] for row in conn.execute(
+                    "SELECT run_id FROM run_queue WHERE status = 'running' AND cancel_requested = 1")]
+            for run_id in requested:
+                self._stop_run(run_id)
+
+        for run_id, run in list(self._active.items()):
+            if run['process'].poll() is None:
+                supervision.supervise(run, run['supervision'])
+                continue
+            if not run['stream'].finished:
+                continue
+            del self._active[run_id]
+            run['finished_at'] = time.time()
+
+            fio_data = run['stream'].result()
+            try:
+                if fio_data is None:
+                    raise ValueError(f"No results found in {run['output_file']}")
+                run.get('finish', finish_run)(run, fio_data, self.store)
+                status, error = ('cancelled' if run.get('cancelled') else 'done'), None
+            except Exception as e:
+                status, error = ('cancelled' if run.get('cancelled') else 'failed'), str(e)
+            if run.get('timed_out') and not run.get('cancelled'):
+                status, error = 'failed', supervision.timeout_error(run) + (f" ({error})" if error else '')
+            run['error'] = error
+            run['settled'].set()
+            if self.shared is not None:
+                self.shared.settle(run_id, error)
+            self._set_status(run_id, status, error, finished=run['finished_at'])
+            if self.metrics is not None:
+                self.metrics.run_finished(run_id, run, status)
+
+        cutoff = time.time() - RUN_RETENTION_SECONDS
+        for run_id, run in list(self.runs.items()):
+            if run.get('finished_at') and run['finished_at'] < cutoff:
+                self.runs.pop(run_id, None)
+        if self.shared is not None and time.time() - self._pruned > RUN_RETENTION_SECONDS / 10:
+            self._pruned = time.time()
+            self.shared.prune(cutoff)
+
+    def run(self):
+        self._recover()
+        while not self._stop_event.is_set():
+            self._reap()
+            self._dispatch()
+            if self.metrics is not None and self._queue_changed:
+                self._queue_changed = False
+                self.metrics.set_queue(self.queue_counts())
+            with self._changed:
+                self._changed.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self._notify()
@@ -0,0 +1,477 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import psutil
+import yaml
+
+import defaults
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Every metric is lower-is-better; (label, absolute floor below which a change is noise)
+METRICS = {
+    'cpu_pct': ('CPU, % of one core', 1.0),
+    'cpu_ms_per_interval': ('CPU ms per fio status interval', 0.5),
+    'peak_rss_mb': ('Peak RSS (MB)', 10.0),
+    'rss_growth_mb': ('RSS growth during the run (MB)', 5.0),
+    'poll_p95_ms': ('Polling callback p95 (ms)', 0.5),
+    'push_cpu_ms_per_event': ('CPU ms per push event', 0.1),
+    'live_figure_ms': ('Live figure for the whole run (ms)', 2.0),
+    'render_cold_ms': ('Result views, uncached (ms)', 10.0),
+    'render_warm_ms': ('Result views, cached (ms)', 2.0),
+    'doc_kb': ('Status document size (KB)', 16.0),
+    'parse_ms_per_doc': ('Status document parse (ms)', 0.5),
+    'stats_ms': ('Histogram merge and percentiles (ms)', 1.0),
+    'history_p95_ms': ('History table callback p95 (ms)', 1.0),
+    'latest_runs_ms': ('Latest run per configuration (ms)', 1.0),
+    'metrics_render_ms': ('/metrics exposition (ms)', 1.0),
+    'ingest_ms_per_run': ('Store ingest per run (ms)', 0.05),
+}
+
+SPARK = '▁▂▃▄▅▆▇█'
+
+def quick(criteria):
+    """Scaled-down settings for CI: same scenarios, a fraction of the work"""
+    return dict(criteria, idle_seconds=2, long_run_intervals=120, clients=[1, 10], client_run_intervals=40,
+                payload_jobs=16, payload_bins=400, payload_intervals=20, history_sizes=[1000], history_queries=5,
+                server_seconds=5)
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+def timed(fn, *args, **kwargs):
+    """(result, milliseconds) of one call"""
+    started = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - started) * 1000
+
+class Meter:
+    """CPU and memory of this process (FlowFIO's threads, not the fake fio children) over a block.
+
+    Peak RSS is sampled in a background thread, whose own cost is negligible at the
+    default 50 ms but is included in the CPU figure like any other thread.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self.result = {}
+        self._stop = threading.Event()
+        self._peak = 0
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self._peak = max(self._peak, self.process.memory_info().rss)
+
+    def __enter__(self):
+        times = self.process.cpu_times()
+        self._cpu = times.user + times.system
+        self._wall = time.perf_counter()
+        self._rss = self._peak = self.process.memory_info().rss
+        self._thread = threading.Thread(target=self._watch, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        times = self.process.cpu_times()
+        cpu = times.user + times.system - self._cpu
+        wall = time.perf_counter() - self._wall
+        rss = self.process.memory_info().rss
+        self.result = {
+            'cpu_s': cpu,
+            'wall_s': wall,
+            'cpu_pct': cpu / wall * 100 if wall else 0.0,
+            'peak_rss_mb': max(self._peak, rss) / (1 << 20),
+            'rss_growth_mb': (rss - self._rss) / (1 << 20),
+        }
+        return False
+
+def prepare(workdir, criteria):
+    """Put the fake fio first on PATH and point FlowFIO at a scratch data directory, then import the app.
+
+    engine.py and app.py read their paths from the environment at import time, so
+    nothing from FlowFIO may be imported before this runs.
+    """
+    bin_dir = os.path.join(workdir, 'bin')
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(bin_dir, exist_ok=True)
+    os.makedirs(data_dir, exist_ok=True)
+    shim = os.path.join(bin_dir, 'fio')
+    with open(shim, 'w') as f:
+        f.write(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(REPO_DIR, "fake_fio.py")}" "$@"\n')
+    os.chmod(shim, 0o755)
+
+    os.environ['PATH'] = bin_dir + os.pathsep + os.environ.get('PATH', '')
+    os.environ['FLOWFIO_DATA_DIR'] = data_dir
+    os.environ['FLOWFIO_DB'] = os.path.join(data_dir, 'flowfio.db')
+    os.environ['FAKE_FIO_TICK'] = str(criteria['tick'])
+    os.chdir(REPO_DIR)
+
+    import app
+    # A scenario whose runtime is set per benchmark; one status interval is one second of it
+    app.config['scenarios']['selfbench'] = {'runtime': 60, 'size': '1G', 'ramp_time': 0}
+    app.start_background_services()
+    return app
+
+def submit(app, intervals):
+    """Queue a run through the Run button's callback; returns its run_id"""
+    app.config['scenarios']['selfbench']['runtime'] = intervals
+    outputs = app.run_fio_test(
+        n_clicks=1, scenario='selfbench', workload_preset='oltp', storage_type='nvme_ssd', direct='1', bs='4k',
+        numjobs='4', iodepth='32', size='1G', steady=[], hosts=None, latency_log=[], ioengine='libaio',
+        target=None, confirm=[], cpus_allowed=None, numa_nodes=None, precondition=[], trace=None, replay_speed=1,
+        timeout=None, profile=None
+    )
+    if not isinstance(outputs[0], dict):
+        raise RuntimeError(f"Run was not queued: {outputs[5]}")
+    return outputs[0]['run_id']
+
+def push_client(app, run_id, counts):
+    """Consume the /events stream the way a connected browser would"""
+    import push
+    events = 0
+    for message in push.queued_events(run_id, app.running_processes.get, app.scheduler.queue_position):
+        events += message.startswith('id:') or message.startswith('event:')
+        if 'event: done' in message:
+            break
+    counts.append(events)
+
+def drive(app, run_id, polling, pushing, tick):
+    """Run polling and push clients against one run until all of them have seen it finish.
+
+    Polling clients call monitor_test_progress on their own schedule (including its
+    backoff), compressed by the same tick as the fake fio's status intervals.
+    """
+    from dash import no_update
+
+    counts = []
+    pushers = [threading.Thread(target=push_client, args=(app, run_id, counts), daemon=True) for _ in range(pushing)]
+    for thread in pushers:
+        thread.start()
+
+    clients = [{'cursor': None, 'interval': app.POLL_INTERVAL_MS, 'due': 0.0, 'done': False} for _ in range(polling)]
+    latencies = []
+    scale = tick / app.config['common'].get('status_interval', 1)
+    n = 0
+    while not all(client['done'] for client in clients):
+        now = time.perf_counter()
+        for client in clients:
+            if client['done'] or client['due'] > now:
+                continue
+            n += 1
+            outputs, ms = timed(app.monitor_test_progress, n, {'run_id': run_id}, client['cursor'], client['interval'])
+            latencies.append(ms)
+            if outputs[4] is not no_update:
+                client['cursor'] = outputs[4]
+            if outputs[6] is not no_update:
+                client['interval'] = outputs[6]
+            client['done'] = outputs[5] is not no_update
+            client['due'] = now + client['interval'] / 1000 * scale
+        time.sleep(min(0.005, scale))
+    for thread in pushers:
+        thread.join(60)
+    app.scheduler.wait(run_id, 60)
+    return latencies, counts
+
+def render(app, run_id):
+    """(uncached, cached) milliseconds to build a finished run's result views"""
+    _, cold = timed(app.show_test_results, {'run_id': run_id})
+    _, warm = timed(app.show_test_results, {'run_id': run_id})
+    return cold, warm
+
+def scenario_idle(app, criteria):
+    """Scheduler and server state with nothing running"""
+    with Meter() as meter:
+        time.sleep(criteria['idle_seconds'])
+    return {'cpu_pct': meter.result['cpu_pct'], 'peak_rss_mb': meter.result['peak_rss_mb']}
+
+def scenario_run(app, criteria, intervals, polling, pushing):
+    from display import live_figure_extension
+    from streaming import read_samples
+
+    with Meter() as meter:
+        run_id = submit(app, intervals)
+        latencies, events = drive(app, run_id, polling, pushing, criteria['tick'])
+    cold, warm = render(app, run_id)
+    record = app.results_store.get(run_id)
+    samples = read_samples(record['result_file'])
+    _, figure_ms = timed(live_figure_extension, samples, len(samples))
+    result = dict(
+        meter.result,
+        cpu_ms_per_interval=meter.result['cpu_s'] * 1000 / max(len(samples), 1),
+        poll_p95_ms=percentile(latencies, 95),
+        live_figure_ms=figure_ms,
+        render_cold_ms=cold,
+        render_warm_ms=warm,
+    )
+    if pushing:
+        result['push_cpu_ms_per_event'] = meter.result['cpu_s'] * 1000 / max(sum(events), 1)
+    result.pop('cpu_s')
+    result.pop('wall_s')
+    return result
+
+def scenario_payload(app, criteria):
+    """Large status documents: many job entries with full latency histograms"""
+    from analysis import analyze
+    from results_store import read_final_document
+    from streaming import StatusFollower
+
+    os.environ['FAKE_FIO_JOBS'] = str(criteria['payload_jobs'])
+    os.environ['FAKE_FIO_BINS'] = str(criteria['payload_bins'])
+    try:
+        result = scenario_run(app, criteria, criteria['payload_intervals'], 1, 0)
+    finally:
+        os.environ.pop('FAKE_FIO_JOBS')
+        os.environ.pop('FAKE_FIO_BINS')
+
+    run_id = app.results_store.query(limit=1)[0]['run_id']
+    path = app.results_store.get(run_id)['result_file']
+    documents, parse_ms = timed(StatusFollower(path).read)
+    _, stats_ms = timed(analyze, read_final_document(path))
+    result.update(
+        doc_kb=os.path.getsize(path) / max(len(documents), 1) / 1024,
+        parse_ms_per_doc=parse_ms / max(len(documents), 1),
+        stats_ms=stats_ms,
+    )
+    return result
+
+def scenario_history(app, criteria, size):
+    """History table, latest-run summaries and /metrics over a store holding `size` runs"""
+    template = app.results_store.query(limit=1)[0]
+    existing = app.results_store.count()
+    records = [dict(template, run_id=f'history_{index:06d}', timestamp=template['timestamp'] - index,
+                    workload_preset=('oltp', 'webserver', 'fileserver', 'backup')[index % 4],
+                    storage_type=('nvme_ssd', 'sata_ssd', 'network_storage')[index % 3])
+               for index in range(existing, size)]
+    _, ingest_ms = timed(app.results_store.ingest_many, records)
+
+    with Meter() as meter:
+        latencies = [timed(app.update_history, None, None, None)[1] for _ in range(criteria['history_queries'])]
+        latencies += [timed(app.update_history, 'oltp', 'nvme_ssd', None)[1]
+                      for _ in range(criteria['history_queries'])]
+        latest, latest_ms = timed(app.results_store.latest_runs)
+    state = app.metrics.MetricsState()
+    state.load_last_runs(latest)
+    _, metrics_ms = timed(state.render)
+    return {
+        'history_p95_ms': percentile(latencies, 95),
+        'latest_runs_ms': latest_ms,
+        'metrics_render_ms': metrics_ms,
+        'ingest_ms_per_run': ingest_ms / max(len(records), 1),
+        'peak_rss_mb': meter.result['peak_rss_mb'],
+    }
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def scenario_server(criteria, debug):
+    """CPU and memory of an idle `python app.py` process tree (debug mode adds the reloader's file watcher)"""
+    port = free_port()
+    env = dict(os.environ, FLOWFIO_PORT=str(port), FLOWFIO_DEBUG='1' if debug else '0')
+    server = subprocess.Popen([sys.executable, 'app.py'], cwd=REPO_DIR, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + 60
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                break
+            except OSError:
+                time.sleep(0.5)
+        else:
+            raise RuntimeError("app.py did not start listening")
+        root = psutil.Process(server.pid)
+        procs = [root] + root.children(recursive=True)
+        for proc in procs:
+            proc.cpu_percent(None)
+        time.sleep(criteria['server_seconds'])
+        return {
+            'cpu_pct': sum(proc.cpu_percent(None) for proc in procs),
+            'peak_rss_mb': sum(proc.memory_info().rss for proc in procs) / (1 << 20),
+        }
+    finally:
+        for proc in psutil.Process(server.pid).children(recursive=True):
+            proc.terminate()
+        server.terminate()
+        server.wait(10)
+
+def run_suite(app, criteria, scenarios, log=print):
+    results = {}
+
+    def record(name, fn, *args):
+        log(f"selfbench: {name}")
+        results[name] = fn(*args)
+
+    if 'idle' in scenarios:
+        record('idle', scenario_idle, app, criteria)
+    if 'long_run' in scenarios:
+        record('long_run', scenario_run, app, criteria, criteria['long_run_intervals'], 1, 0)
+    if 'clients' in scenarios:
+        for clients in criteria['clients']:
+            record(f'clients_{clients}', scenario_run, app, criteria, criteria['client_run_intervals'], clients, clients)
+    if 'payload' in scenarios:
+        record('payload', scenario_payload, app, criteria)
+    if 'history' in scenarios:
+        if not app.results_store.count():
+            scenario_run(app, criteria, 5, 1, 0)
+        for size in sorted(criteria['history_sizes']):
+            record(f'history_{size}', scenario_history, app, criteria, size)
+    if 'server' in scenarios:
+        record('server_debug', scenario_server, criteria, True)
+        record('server', scenario_server, criteria, False)
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def append_history(path, entry):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(entry) + '\n')
+
+def sparkline(values):
+    low, high = min(values), max(values)
+    if high == low:
+        return SPARK[0] * len(values)
+    return ''.join(SPARK[int((value - low) / (high - low) * (len(SPARK) - 1))] for value in values)
+
+def trend(history, entry, criteria):
+    """Compare an entry with the median of the previous trend_window entries from the same host.
+
+    Returns one row per scenario metric; regressed marks values worse than that median
+    by more than threshold_pct and by more than the metric's noise floor.
+    """
+    earlier = [h for h in history if h['host'] == entry['host'] and h is not entry][-criteria['trend_window']:]
+    rows = []
+    for scenario, values in entry['scenarios'].items():
+        for metric, value in values.items():
+            if metric not in METRICS or value is None:
+                continue
+            past = [h['scenarios'][scenario][metric] for h in earlier
+                    if h['scenarios'].get(scenario, {}).get(metric) is not None]
+            median = statistics.median(past) if past else None
+            delta_pct = (value - median) / median * 100 if median else None
+            rows.append({
+                'scenario': scenario,
+                'metric': metric,
+                'label': METRICS[metric][0],
+                'value': value,
+                'median': median,
+                'delta_pct': delta_pct,
+                'trend': sparkline(past + [value]),
+                'regressed': median is not None and value - median > METRICS[metric][1]
+                             and delta_pct is not None and delta_pct > criteria['threshold_pct'],
+            })
+    return rows
+
+def format_report(entry, rows, criteria):
+    """Markdown trend report for one suite run"""
+    def number(value):
+        return f'{value:,.2f}' if value is not None else '-'
+
+    lines = [
+        f"# FlowFIO self-benchmark {time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['timestamp']))}",
+        '',
+        f"Commit `{entry['commit'] or 'unknown'}` on {entry['host']} ({entry['cpu_count']} CPUs, "
+        f"Python {entry['python']}); compared with the median of up to {criteria['trend_window']} earlier runs "
+        f"on this host, flagged beyond +{criteria['threshold_pct']:g}%.",
+        '',
+        '| Scenario | Metric | Value | Median | Δ % | Trend | |',
+        '|---|---|---:|---:|---:|---|---|',
+    ]
+    for row in rows:
+        delta = f"{row['delta_pct']:+.1f}" if row['delta_pct'] is not None else '-'
+        lines.append(f"| {row['scenario']} | {row['label']} | {number(row['value'])} | {number(row['median'])} "
+                     f"| {delta} | {row['trend']} | {'REGRESSED' if row['regressed'] else ''} |")
+    regressed = [row for row in rows if row['regressed']]
+    lines += ['', f"{len(regressed)} regression(s)." if regressed else 'No regressions.']
+    return '\n'.join(lines) + '\n'
+
+def main(argv=None):
+    default_dir = os.path.join(os.environ.get('FLOWFIO_DATA_DIR', '/app/test-data'), 'selfbench')
+    parser = argparse.ArgumentParser(description="Measure FlowFIO's own CPU, memory and latency against a fake fio")
+    parser.add_argument('--config', default=os.path.join(REPO_DIR, 'fio_defaults.yaml'))
+    parser.add_argument('--scenarios', default='idle,long_run,clients,payload,history',
+                        help="comma-separated: idle, long_run, clients, payload, history, server")
+    parser.add_argument('--quick', action='store_true', help="scaled-down run for CI")
+    parser.add_argument('--history', default=os.path.join(default_dir, 'history.jsonl'),
+                        help="JSON lines file the results are appended to")
+    parser.add_argument('--report', default=os.path.join(default_dir, 'report.md'))
+    parser.add_argument('--json', action='store_true', help="print the entry and trend rows as JSON")
+    parser.add_argument('--fail-on-regression', action='store_true',
+                        help="exit with status 2 if any metric regressed against the trend")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        criteria = defaults.section(yaml.safe_load(f), 'selfbench')
+    if args.quick:
+        criteria = quick(criteria)
+    scenarios = {name.strip() for name in args.scenarios.split(',') if name.strip()}
+
+    workdir = tempfile.mkdtemp(prefix='flowfio-selfbench-')
+    history_path, report_path = os.path.abspath(args.history), os.path.abspath(args.report)
+    app = None
+    try:
+        app = prepare(workdir, criteria)
+        log = (lambda message: print(message, file=sys.stderr, flush=True)) if args.json else print
+        results = run_suite(app, criteria, scenarios, log)
+    finally:
+        if app is not None:
+            app.scheduler.stop()
+            app.scheduler.join(10)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    entry = {
+        'timestamp': time.time(),
+        'commit': git_commit(),
+        'host': socket.gethostname(),
+        'cpu_count': psutil.cpu_count(),
+        'python': platform.python_version(),
+        'quick': args.quick,
+        'scenarios': results,
+    }
+    history = [h for h in load_history(history_path) if h.get('quick') == args.quick]
+    rows = trend(history + [entry], entry, criteria)
+    append_history(history_path, entry)
+    report = format_report(entry, rows, criteria)
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, 'w') as f:
+        f.write(report)
+
+    if args.json:
+        print(json.dumps({'entry': entry, 'trend': rows}, indent=2))
+    else:
+        print(report)
+    if args.fail_on_regression and any(row['regressed'] for row in rows):
+        return 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
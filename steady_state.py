@@ -0,0 +1,89 @@
+import signal
+
+def linear_slope(xs, ys):
+    """Least-squares slope of ys over xs"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+
+def window_stats(xs, ys):
+    """Return (slope as % of mean per second, coefficient of variation %) for one metric"""
+    n = len(ys)
+    mean = sum(ys) / n
+    if mean == 0:
+        return 0.0, 0.0
+    stddev = (sum((y - mean) ** 2 for y in ys) / n) ** 0.5
+    return abs(linear_slope(xs, ys)) / mean * 100, stddev / mean * 100
+
+def metric_series(samples, metric):
+    return [s[f'read_{metric}'] + s[f'write_{metric}'] for s in samples]
+
+def is_steady(samples, window, max_slope_pct, max_cv_pct, metrics=('iops', 'bw')):
+    """True when every watched metric is flat and stable over the trailing window"""
+    if len(samples) < window:
+        return False
+    recent = samples[-window:]
+    xs = [s['t'] for s in recent]
+    for metric in metrics:
+        slope_pct, cv_pct = window_stats(xs, metric_series(recent, metric))
+        if slope_pct > max_slope_pct or cv_pct > max_cv_pct:
+            return False
+    return True
+
+def fio_steadystate_options(criteria, ramp_time):
+    """Translate the criteria into fio's native steadystate job options"""
+    return {
+        'steadystate': f'iops_slope:{criteria["max_slope_pct"]}%',
+        'ss_dur': criteria['window'],
+        'ss_ramp': ramp_time,
+    }
+
+def fio_attained(fio_data):
+    """Read fio's own steady-state verdict from a final document, if it ran one"""
+    verdicts = [job['steadystate'].get('attained') for job in fio_data.get('jobs', []) if 'steadystate' in job]
+    if not verdicts:
+        return None
+    return all(verdicts)
+
+class SteadyStateWatcher:
+    """Stream listener that interrupts fio once interval samples converge.
+
+    fio is sent SIGINT rather than killed so it still writes its final JSON report.
+    """
+
+    def __init__(self, process, criteria, ramp_time=0):
+        self.process = process
+        self.criteria = criteria
+        self.ramp_time = ramp_time
+        self.window = []
+        self.converged_at = None
+
+    def __call__(self, sample):
+        if self.converged_at is not None or sample['t'] < self.ramp_time:
+            return
+        self.window.append(sample)
+        del self.window[:-self.criteria['window']]
+        if is_steady(self.window, self.criteria['window'], self.criteria['max_slope_pct'],
+                     self.criteria['max_cv_pct'], self.criteria['metrics']):
+            self.converged_at = sample['t']
+            if self.process.poll() is None:
+                self.process.send_signal(signal.SIGINT)
+
+def verdict(run, fio_data):
+    """Return ('converged' | 'not_converged' | None, time converged) for a finished run"""
+    watcher = run.get('steady_state_watcher')
+    if watcher is not None:
+        if watcher.converged_at is not None:
+            return 'converged', watcher.converged_at
+        return 'not_converged', None
+
+    attained = fio_attained(fio_data) if fio_data else None
+    if attained is None:
+        return None, None
+    if attained:
+        return 'converged', max((job.get('elapsed', 0) for job in fio_data.get('jobs', [])), default=None)
+    return 'not_converged', None
@@ -0,0 +1,231 @@
+import codecs
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+
+SAMPLE_BUFFER_SIZE = 3600
+POLL_INTERVAL = 0.5
+
+class SampleBuffer:
+    """Bounded ring buffer of interval samples tagged with increasing sequence numbers"""
+
+    def __init__(self, maxlen=SAMPLE_BUFFER_SIZE):
+        self._samples = deque(maxlen=maxlen)
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def append(self, sample):
+        with self._lock:
+            self._seq += 1
+            sample['seq'] = self._seq
+            self._samples.append(sample)
+
+    @property
+    def last_seq(self):
+        return self._seq
+
+    def since(self, seq):
+        """Return samples newer than seq, walking from the right so cost tracks the delta"""
+        with self._lock:
+            count = min(self._seq - (seq or 0), len(self._samples))
+            if count <= 0:
+                return []
+            return [self._samples[-i] for i in range(count, 0, -1)]
+
+    def snapshot(self):
+        with self._lock:
+            return list(self._samples)
+
+class StatusFollower:
+    """Incrementally decode fio's periodic JSON status documents from a growing file.
+
+    fio writes each status dump as a top-level object whose braces sit at column 0,
+    so documents are framed on '{' ... '\\n}' without re-parsing anything already seen.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._offset = 0
+        self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._pending = ''
+        self._scan = 0
+
+    def read(self):
+        """Return the list of complete documents appended since the last call"""
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(self._offset)
+                chunk = f.read()
+                self._offset = f.tell()
+        except FileNotFoundError:
+            return []
+
+        if chunk:
+            self._pending += self._decoder.decode(chunk)
+
+        documents = []
+        while True:
+            start = self._pending.find('{')
+            if start < 0:
+                self._pending, self._scan = '', 0
+                break
+            end = self._pending.find('\n}', max(start, self._scan))
+            if end < 0:
+                self._pending = self._pending[start:]
+                self._scan = max(len(self._pending) - 1, 0)
+                break
+
+            raw = self._pending[start:end + 2]
+            self._pending = self._pending[end + 2:]
+            self._scan = 0
+            try:
+                document = json.loads(raw)
+            except ValueError:
+                continue
+            if isinstance(document, dict) and ('jobs' in document or 'client_stats' in document):
+                documents.append(normalize_document(document))
+        return documents
+
+def normalize_document(document):
+    """Give client/server output the same 'jobs' shape as a local run.
+
+    In client mode fio reports per-host entries under 'client_stats' (tagged with
+    'hostname') plus an 'All clients' roll-up, which is dropped to avoid double counting.
+    """
+    if 'jobs' in document or 'client_stats' not in document:
+        return document
+    jobs = [entry for entry in document['client_stats'] if entry.get('jobname') != 'All clients']
+    return dict(document, jobs=jobs)
+
+def snapshot_totals(snapshot):
+    """Collapse a cumulative fio status document into summed counters across jobs"""
+    totals = {
+        'timestamp_ms': snapshot.get('timestamp_ms') or snapshot.get('timestamp', 0) * 1000,
+        'elapsed': 0,
+    }
+    for direction in ('read', 'write'):
+        ios = io_bytes = lat_sum = 0
+        for job in snapshot.get('jobs', []):
+            stats = job.get(direction, {})
+            job_ios = stats.get('total_ios', 0)
+            ios += job_ios
+            io_bytes += stats.get('io_bytes', 0)
+            lat_sum += stats.get('lat_ns', {}).get('mean', 0) * job_ios
+        totals[f'{direction}_ios'] = ios
+        totals[f'{direction}_bytes'] = io_bytes
+        totals[f'{direction}_lat_sum'] = lat_sum
+
+    totals['elapsed'] = max((job.get('elapsed', 0) for job in snapshot.get('jobs', [])), default=0)
+    return totals
+
+def interval_sample(previous, current):
+    """Derive per-interval rates from two consecutive cumulative snapshots"""
+    span = (current['timestamp_ms'] - previous['timestamp_ms']) / 1000 if previous else 0
+    if span <= 0:
+        span = current['elapsed'] - (previous['elapsed'] if previous else 0) or 1
+
+    sample = {'t': current['elapsed']}
+    for direction in ('read', 'write'):
+        ios = current[f'{direction}_ios']
+        io_bytes = current[f'{direction}_bytes']
+        lat_sum = current[f'{direction}_lat_sum']
+        # Counters restart once ramp_time ends; treat a drop as a fresh baseline
+        if previous and ios >= previous[f'{direction}_ios']:
+            ios -= previous[f'{direction}_ios']
+            io_bytes -= previous[f'{direction}_bytes']
+            lat_sum -= previous[f'{direction}_lat_sum']
+
+        sample[f'{direction}_iops'] = ios / span
+        sample[f'{direction}_bw'] = io_bytes / span / (1024 * 1024)
+        sample[f'{direction}_lat'] = lat_sum / ios / 1000 if ios else 0
+    return sample
+
+class FioStatusStream(threading.Thread):
+    """Follow a running fio job's status output and keep its interval samples in memory"""
+
+    def __init__(self, output_file, process=None, buffer_size=SAMPLE_BUFFER_SIZE, poll_interval=POLL_INTERVAL):
+        super().__init__(daemon=True)
+        self.follower = StatusFollower(output_file)
+        self.process = process
+        self.buffer = SampleBuffer(buffer_size)
+        self.poll_interval = poll_interval
+        self.latest = None
+        self.finished = False
+        self.listeners = []
+        self._previous = None
+        self._stop_event = threading.Event()
+        self._changed = threading.Condition()
+
+    def ingest(self):
+        """Consume any new status documents and return how many arrived"""
+        documents = self.follower.read()
+        for document in documents:
+            totals = snapshot_totals(document)
+            sample = interval_sample(self._previous, totals)
+            self.buffer.append(sample)
+            self._previous = totals
+            self.latest = document
+            for listener in self.listeners:
+                listener(sample)
+        if documents:
+            with self._changed:
+                self._changed.notify_all()
+        return len(documents)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.ingest()
+            if self.process is not None and self.process.poll() is not None:
+                break
+            self._stop_event.wait(self.poll_interval)
+        self.ingest()
+        with self._changed:
+            self.finished = True
+            self._changed.notify_all()
+
+    def wait_for_update(self, seq, timeout):
+        """Block until samples newer than seq exist or the stream ends; False on timeout"""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.buffer.last_seq > seq or self.finished, timeout)
+
+    def stop(self):
+        self._stop_event.set()
+
+    def result(self, timeout=5):
+        """Wait for the final drain and return the last (final) fio document"""
+        self.join(timeout)
+        return self.latest
+
+def read_samples(output_file):
+    """Re-derive the interval samples of a finished run from its status documents"""
+    stream = FioStatusStream(output_file)
+    stream.ingest()
+    return stream.buffer.snapshot()
+
+def run_progress(start_time, runtime):
+    """Percentage of the configured runtime that has elapsed"""
+    elapsed = (datetime.now() - start_time).total_seconds()
+    return min((elapsed / runtime) * 100, 100) if runtime else 100
+
+def log_excerpt(log_content, max_lines=10):
+    """Strip the echoed command line and keep the last few lines of fio output"""
+    lines = [line for line in log_content.split('\n') if not line.startswith("Command: ")]
+    return '\n'.join(lines[-max_lines:])
+
+def tail_file(path, max_lines=15, max_bytes=8192):
+    """Return the last lines of a file by seeking near its end instead of reading it all"""
+    try:
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(size - max_bytes, 0))
+            data = f.read()
+    except OSError:
+        return None
+
+    lines = data.decode('utf-8', errors='replace').splitlines(keepends=True)
+    if size > max_bytes and lines:
+        lines = lines[1:]
+    return ''.join(lines[-max_lines:])
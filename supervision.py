@@ -0,0 +1,94 @@
+import signal
+import time
+from datetime import datetime
+
+import psutil
+
+def run_timeout(run, criteria):
+    """Seconds a run may take before it is interrupted, or None for no limit.
+
+    An explicit per-run timeout wins. Preconditioning stages get no automatic limit:
+    their sequential fill takes as long as the device needs.
+    """
+    if run.get('timeout'):
+        return float(run['timeout'])
+    if run.get('stage') == 'precondition':
+        return None
+    expected = run['runtime'] + run['scenario_config'].get('ramp_time', 0)
+    return expected * criteria['timeout_factor'] + criteria['timeout_grace_seconds']
+
+def interrupt(run):
+    """Ask fio to stop; on SIGINT it still writes its final report for the part it ran"""
+    if run.get('interrupted_at') is None and run['process'].poll() is None:
+        run['interrupted_at'] = time.time()
+        run['process'].send_signal(signal.SIGINT)
+
+def supervise(run, criteria):
+    """Interrupt a run that outlived its timeout and kill one that ignored SIGINT; call periodically"""
+    if run['process'].poll() is not None:
+        return
+    limit = run.get('timeout_seconds')
+    if limit is not None and not run.get('timed_out') \
+            and (datetime.now() - run['start_time']).total_seconds() > limit:
+        run['timed_out'] = True
+        print(f"Run {run['run_id']} exceeded its {limit:.0f} s timeout; interrupting fio", flush=True)
+        interrupt(run)
+    if run.get('interrupted_at') is not None and not run.get('killed') \
+            and time.time() - run['interrupted_at'] > criteria['kill_after_seconds']:
+        run['killed'] = True
+        print(f"Run {run['run_id']} ignored SIGINT for {criteria['kill_after_seconds']} s; killing fio", flush=True)
+        run['process'].kill()
+
+def timeout_error(run):
+    """Error message for a run that was stopped by its timeout, else None"""
+    if not run.get('timed_out'):
+        return None
+    return f"Timed out after {run['timeout_seconds']:.0f} s; fio was interrupted"
+
+def process_identity(pid):
+    """(pid, start time) of a process; together they survive pid reuse"""
+    return pid, psutil.Process(pid).create_time()
+
+def find_process(pid, created):
+    """The process recorded as (pid, created) if it is still running, else None"""
+    try:
+        process = psutil.Process(pid)
+        if abs(process.create_time() - created) > 1 or process.status() == psutil.STATUS_ZOMBIE:
+            return None
+        return process
+    except psutil.Error:
+        return None
+
+class AttachedProcess:
+    """subprocess.Popen interface for a fio process started by an earlier supervisor.
+
+    Its exit status cannot be collected by a non-parent, so returncode is 0 once it is
+    gone; whether it produced results is read from its output file like any run's.
+    """
+
+    def __init__(self, pid, process=None):
+        self.pid = pid
+        self.returncode = None if process is not None else 0
+        self._process = process
+
+    def poll(self):
+        if self.returncode is None:
+            try:
+                if not self._process.is_running() or self._process.status() == psutil.STATUS_ZOMBIE:
+                    self.returncode = 0
+            except psutil.NoSuchProcess:
+                self.returncode = 0
+        return self.returncode
+
+    def send_signal(self, sig):
+        if self.poll() is None:
+            try:
+                self._process.send_signal(sig)
+            except psutil.NoSuchProcess:
+                pass
+
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
@@ -0,0 +1,75 @@
+import argparse
+import signal
+import sys
+import threading
+
+import yaml
+from flask import Flask
+from werkzeug.serving import make_server
+
+import defaults
+import metrics
+from results_store import DEFAULT_DB_PATH, ResultsStore
+from run_state import RunStateStore
+from scheduler import RunScheduler, claim_supervisor
+from sweep import SweepController
+
+def serve_metrics(state, port):
+    """Serve /metrics from a background thread; returns the server (call shutdown() to stop it)"""
+    exporter = Flask(__name__)
+    metrics.register_metrics_route(exporter, state)
+    server = make_server('0.0.0.0', port, exporter, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Own the run queue, sweeps and every fio process for web workers that only read shared state"
+    )
+    parser.add_argument('--config', default='fio_defaults.yaml')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH)
+    parser.add_argument('--metrics-port', type=int, help="serve /metrics on this port (0 = off)")
+    args = parser.parse_args(argv)
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    server_settings = defaults.section(config, 'server', {'metrics_port': args.metrics_port} if args.metrics_port is not None else None)
+
+    lock = claim_supervisor(args.db)
+    if lock is None:
+        print(f"Another process already owns the run queue in {args.db}", file=sys.stderr)
+        return 1
+
+    store = ResultsStore(args.db)
+    metrics_settings = defaults.section(config, 'metrics')
+    metrics_state = None
+    if metrics_settings['enabled'] and server_settings['metrics_port']:
+        metrics_state = metrics.MetricsState(metrics_settings['quantiles'])
+        metrics_state.load_last_runs(store.latest_runs())
+    scheduler = RunScheduler(
+        config, store, store.path, max_per_device=defaults.section(config, 'scheduler')['max_runs_per_device'],
+        metrics=metrics_state, shared=RunStateStore(store.path)
+    )
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+
+    exporter = serve_metrics(metrics_state, server_settings['metrics_port']) if metrics_state else None
+    sweeps = SweepController(scheduler)
+    scheduler.start()
+    sweeps.start()
+    print(f"Supervising runs and sweeps in {store.path}", flush=True)
+    while not stop.wait(1) and scheduler.is_alive():
+        pass
+
+    sweeps.stop()
+    scheduler.stop()
+    scheduler.join(10)
+    if exporter is not None:
+        exporter.shutdown()
+    lock.close()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,427 @@
+import itertools
+import threading
+import uuid
+
+import repeatability
+from engine import new_run_id
+
+
+def new_sweep_id(kind):
+    """Millisecond timestamp plus a random suffix, so sweeps started together (even from
+    different web workers) never share the run ids derived from it"""
+    return f'{kind}_{new_run_id()}_{uuid.uuid4().hex[:6]}'
+
+def expand_sweep(block_sizes, queue_depths, job_counts):
+    """Expand the chosen block size × queue depth × job count subset into an ordered job plan"""
+    return [
+        {'bs': bs, 'iodepth': int(iodepth), 'numjobs': int(numjobs)}
+        for bs, numjobs, iodepth in itertools.product(block_sizes, job_counts, queue_depths)
+    ]
+
+def latest_sample(run):
+    """Most recent interval sample of a live run, or None"""
+    if run is None or 'stream' not in run:
+        return None
+    buffer = run['stream'].buffer
+    samples = buffer.since(buffer.last_seq - 1)
+    return samples[-1] if samples else None
+
+class SweepRunner(threading.Thread):
+    """Submit every point of a sweep plan to the scheduler in turn and collect the per-point summaries"""
+
+    kind = 'sweep'
+
+    def __init__(self, plan, base, scheduler, sweep_id=None):
+        super().__init__(daemon=True)
+        self.plan = plan
+        self.base = base
+        self.scheduler = scheduler
+        self.sweep_id = sweep_id or new_sweep_id('sweep')
+        self.status = 'pending'
+        self.current_run_id = None
+        self.current_point = None
+        self.results = []
+        self.failures = []
+        self._cancel = threading.Event()
+
+    def run_point(self, index, point):
+        """Run one plan point and return its stored summary record, or None if fio produced nothing"""
+        job = self.scheduler.submit(
+            dict(self.base, **point, sweep_id=self.sweep_id), run_id=f'{self.sweep_id}_{index:03d}'
+        )
+        self.current_run_id = job['run_id']
+        self.publish()
+        try:
+            return self.scheduler.wait(job['run_id'])
+        finally:
+            self.current_run_id = None
+
+    def run(self):
+        self.status = 'running'
+        for index, point in enumerate(self.plan):
+            if self._cancel.is_set():
+                break
+            self.current_point = point
+            try:
+                record = self.run_point(index, point)
+            except Exception as e:
+                record = None
+                print(f"Sweep {self.sweep_id} point {point} failed: {e}", flush=True)
+            if record is None:
+                self.failures.append(point)
+            else:
+                self.results.append(record)
+        self.current_point = None
+        self.status = 'cancelled' if self._cancel.is_set() else 'done'
+        self.publish()
+
+    def cancel(self):
+        self._cancel.set()
+        if self.current_run_id is not None:
+            self.scheduler.cancel(self.current_run_id)
+
+    def total_points(self):
+        return len(self.plan)
+
+    def report(self):
+        return None
+
+    def publish(self):
+        """Share progress through the scheduler's run state store, for the server workers showing it"""
+        if getattr(self.scheduler, 'shared', None) is None:
+            return
+        self.scheduler.shared.save_sweep(self.sweep_id, {
+            'sweep_id': self.sweep_id,
+            'kind': self.kind,
+            'progress': dict(self.progress(), current_sample=None),
+            'current_run_id': self.current_run_id,
+            'run_ids': [record['run_id'] for record in self.results],
+            'report': self.report(),
+        })
+
+    def progress(self):
+        """Snapshot of sweep state for the combined progress view"""
+        current_sample = latest_sample(self.scheduler.live_run(self.current_run_id)) if self.current_run_id else None
+        return {
+            'sweep_id': self.sweep_id,
+            'status': self.status,
+            'total': self.total_points(),
+            'completed': len(self.results) + len(self.failures),
+            'failed': len(self.failures),
+            'current_point': self.current_point,
+            'current_sample': current_sample,
+        }
+
+class PublishedSweep:
+    """A sweep running in the process that owns the run queue, read back from the snapshot it last published"""
+
+    def __init__(self, snapshot, scheduler):
+        self.snapshot = snapshot
+        self.scheduler = scheduler
+        self.sweep_id = snapshot['sweep_id']
+        self.kind = snapshot['kind']
+        self.results = [record for record in map(scheduler.store.get, snapshot['run_ids']) if record is not None]
+
+    def progress(self):
+        run_id = self.snapshot['current_run_id']
+        return dict(self.snapshot['progress'],
+                    current_sample=latest_sample(self.scheduler.live_run(run_id)) if run_id else None)
+
+    def report(self):
+        return self.snapshot['report']
+
+class EngineComparisonRunner(SweepRunner):
+    """Run the same workload once per I/O engine so throughput per CPU core can be compared"""
+
+    kind = 'engines'
+
+    def __init__(self, engines, base, scheduler, sweep_id=None):
+        super().__init__([{'ioengine': engine} for engine in engines], base, scheduler,
+                         sweep_id or new_sweep_id('engines'))
+        self.engines = list(engines)
+
+def describe_point(point):
+    return ' '.join(f"{key}={value}" for key, value in point.items()) or 'as configured'
+
+class RepeatRunner(SweepRunner):
+    """Repeat each configuration until its confidence intervals are narrow enough.
+
+    With interleave, every round runs each unfinished configuration once (rotating the
+    order between rounds) so slow drifts such as time-of-day load on shared storage are
+    spread over all configurations instead of landing on one. A configuration is done
+    after criteria['max_runs'] attempts or once repeatability.summarize() reports it
+    converged after outlier rejection.
+    """
+
+    kind = 'repeat'
+
+    def __init__(self, configs, base, scheduler, criteria, sweep_id=None):
+        super().__init__([], base, scheduler, sweep_id or new_sweep_id('repeat'))
+        self.configs = list(configs) or [{}]
+        self.criteria = criteria
+        self.records = [[] for _ in self.configs]
+        self.metrics = [[] for _ in self.configs]
+        self.attempts = [0] * len(self.configs)
+        self.summaries = [None] * len(self.configs)
+
+    def total_points(self):
+        if self.status in ('done', 'cancelled'):
+            return len(self.plan)
+        return len(self.plan) + sum(self.criteria['max_runs'] - self.attempts[index]
+                                    for index in range(len(self.configs)) if not self.finished(index))
+
+    def finished(self, index):
+        summary = self.summaries[index]
+        return self.attempts[index] >= self.criteria['max_runs'] or bool(summary and summary['converged'])
+
+    def repeat(self, index):
+        point = self.configs[index]
+        self.current_point = point
+        self.plan.append(point)
+        self.attempts[index] += 1
+        try:
+            record = self.run_point(len(self.plan) - 1, point)
+            metrics = repeatability.record_metrics(record) if record is not None else None
+        except Exception as e:
+            record = None
+            print(f"Repeat {self.sweep_id} point {point} failed: {e}", flush=True)
+        if record is None:
+            self.failures.append(point)
+            return
+        self.records[index].append(record)
+        self.metrics[index].append(metrics)
+        self.summaries[index] = repeatability.summarize(
+            [r['run_id'] for r in self.records[index]], self.metrics[index], self.criteria)
+        self.results.append(record)
+
+    def run(self):
+        self.status = 'running'
+        rounds = 0
+        while not self._cancel.is_set():
+            pending = [index for index in range(len(self.configs)) if not self.finished(index)]
+            if not pending:
+                break
+            if self.criteria['interleave']:
+                shift = rounds % len(pending)
+                batch = pending[shift:] + pending[:shift]
+            else:
+                batch = pending[:1]
+            for index in batch:
+                if self._cancel.is_set():
+                    break
+                self.repeat(index)
+            rounds += 1
+        self.current_point = None
+        self.status = 'cancelled' if self._cancel.is_set() else 'done'
+        self.publish()
+
+    def report(self):
+        """One entry per configuration: its runs, outliers and per-metric statistics"""
+        return [
+            dict(summary or {'runs': 0, 'kept': 0, 'outliers': [], 'metrics': {}, 'converged': False},
+                 config=describe_point(point), point=point, attempts=self.attempts[index],
+                 run_ids=[r['run_id'] for r in self.records[index]],
+                 iops=[m['iops'] for m in self.metrics[index]])
+            for index, (point, summary) in enumerate(zip(self.configs, self.summaries))
+        ]
+
+def total_iops(record):
+    return (record['read_iops'] or 0) + (record['write_iops'] or 0)
+
+def tail_latency(record):
+    return max(record['read_p99'] or 0, record['write_p99'] or 0)
+
+class AdaptiveSweepRunner(SweepRunner):
+    """Climb queue depth and job count until throughput saturates or p99 breaks the SLO.
+
+    For each block size, queue depth is raised along the configured ladder until the
+    marginal IOPS gain drops below min_gain (the knee) or p99 exceeds p99_slo_us, in
+    which case the gap between the last passing and first failing depth is bisected.
+    Job counts are raised the same way and the search stops once more jobs stop helping.
+    """
+
+    kind = 'adaptive'
+
+    def __init__(self, block_sizes, queue_depths, job_counts, base, scheduler,
+                 min_gain=0.05, p99_slo_us=None, bisect_steps=2, sweep_id=None):
+        super().__init__([], base, scheduler, sweep_id)
+        self.block_sizes = list(block_sizes)
+        self.queue_depths = sorted(int(qd) for qd in queue_depths)
+        self.job_counts = sorted(int(nj) for nj in job_counts)
+        self.min_gain = min_gain
+        self.p99_slo_us = p99_slo_us
+        self.bisect_steps = bisect_steps
+        self.knees = []
+        self._measured = {}
+
+    def total_points(self):
+        if self.status in ('done', 'cancelled'):
+            return len(self.plan)
+        return len(self.block_sizes) * len(self.queue_depths) * len(self.job_counts)
+
+    def within_slo(self, record):
+        return self.p99_slo_us is None or tail_latency(record) <= self.p99_slo_us
+
+    def measure(self, bs, iodepth, numjobs):
+        key = (bs, iodepth, numjobs)
+        if key in self._measured:
+            return self._measured[key]
+        if self._cancel.is_set():
+            return None
+
+        point = {'bs': bs, 'iodepth': iodepth, 'numjobs': numjobs}
+        self.current_point = point
+        self.plan.append(point)
+        try:
+            record = self.run_point(len(self.plan) - 1, point)
+        except Exception as e:
+            record = None
+            print(f"Sweep {self.sweep_id} point {point} failed: {e}", flush=True)
+        if record is None:
+            self.failures.append(point)
+        else:
+            self.results.append(record)
+        self._measured[key] = record
+        return record
+
+    def bisect(self, bs, numjobs, passing, failing):
+        """Narrow the gap between a passing and a failing queue depth"""
+        lo, hi = passing['iodepth'], failing['iodepth']
+        for _ in range(self.bisect_steps):
+            mid = (lo + hi) // 2
+            if mid in (lo, hi):
+                break
+            record = self.measure(bs, mid, numjobs)
+            if record is None:
+                break
+            if self.within_slo(record):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    def climb_queue_depth(self, bs, numjobs):
+        """Raise queue depth for one job count and return the last worthwhile point"""
+        previous = None
+        for iodepth in self.queue_depths:
+            record = self.measure(bs, iodepth, numjobs)
+            if record is None:
+                break
+
+            if not self.within_slo(record):
+                knee_qd = self.bisect(bs, numjobs, previous, record) if previous else None
+                self.knees.append({'bs': bs, 'numjobs': numjobs, 'iodepth': knee_qd, 'reason': 'p99 SLO'})
+                break
+
+            if previous and total_iops(previous) > 0:
+                gain = total_iops(record) / total_iops(previous) - 1
+                if gain < self.min_gain:
+                    self.knees.append({'bs': bs, 'numjobs': numjobs, 'iodepth': previous['iodepth'],
+                                       'reason': f'IOPS gain {gain * 100:.1f}%'})
+                    return previous
+            previous = record
+        return previous
+
+    def run(self):
+        self.status = 'running'
+        for bs in self.block_sizes:
+            best_for_jobs = None
+            for numjobs in self.job_counts:
+                if self._cancel.is_set():
+                    break
+                self.climb_queue_depth(bs, numjobs)
+                level = self.best(bs=bs, numjobs=numjobs)
+                if level is None:
+                    break
+                if best_for_jobs and total_iops(level) < total_iops(best_for_jobs) * (1 + self.min_gain):
+                    break
+                best_for_jobs = level
+        self.current_point = None
+        self.status = 'cancelled' if self._cancel.is_set() else 'done'
+        self.publish()
+
+    def best(self, **filters):
+        """Highest-throughput measured configuration that meets the latency SLO"""
+        candidates = [
+            r for r in self.results
+            if self.within_slo(r) and all(r[k] == v for k, v in filters.items())
+        ]
+        return max(candidates, key=total_iops, default=None)
+
+    def progress(self):
+        progress = super().progress()
+        best = self.best()
+        progress['best'] = {
+            'bs': best['bs'], 'iodepth': best['iodepth'], 'numjobs': best['numjobs'],
+            'iops': total_iops(best), 'p99': tail_latency(best)
+        } if best else None
+        progress['knees'] = list(self.knees)
+        return progress
+
+RUNNERS = {runner.kind: runner for runner in (SweepRunner, AdaptiveSweepRunner, EngineComparisonRunner, RepeatRunner)}
+FINISHED_STATUSES = ('done', 'cancelled', 'interrupted', 'failed')
+
+def status_snapshot(sweep_id, kind, status):
+    """A sweep_state snapshot for a sweep with no runner behind it (requested, lost or failed to start)"""
+    return {
+        'sweep_id': sweep_id,
+        'kind': kind,
+        'progress': {'sweep_id': sweep_id, 'status': status, 'total': 0, 'completed': 0, 'failed': 0,
+                     'current_point': None, 'current_sample': None},
+        'current_run_id': None,
+        'run_ids': [],
+        'report': None,
+    }
+
+def request_sweep(shared, kind, **args):
+    """Queue a sweep of the given kind for the process that owns the run queue; returns its id.
+
+    args are the runner's constructor arguments minus the scheduler, and must be JSON-safe.
+    """
+    sweep_id = new_sweep_id(kind if kind in ('engines', 'repeat') else 'sweep')
+    shared.request_sweep(sweep_id, dict(args, kind=kind, sweep_id=sweep_id),
+                         status_snapshot(sweep_id, kind, 'pending'))
+    return sweep_id
+
+class SweepController(threading.Thread):
+    """Run requested sweeps in the process that owns the run queue.
+
+    Web workers only request sweeps and read their published snapshots, so a sweep
+    survives the worker that started it being recycled. Sweeps an earlier owner started
+    and never finished are marked interrupted.
+    """
+
+    def __init__(self, scheduler, poll_interval=1):
+        super().__init__(daemon=True)
+        self.scheduler = scheduler
+        self.poll_interval = poll_interval
+        self.runners = {}
+        self._stop = threading.Event()
+
+    def run(self):
+        shared = self.scheduler.shared
+        for sweep_id in shared.claimed_sweeps():
+            snapshot = shared.sweep(sweep_id)
+            if snapshot and snapshot['progress']['status'] not in FINISHED_STATUSES:
+                snapshot['progress']['status'] = 'interrupted'
+                shared.save_sweep(sweep_id, snapshot)
+        while not self._stop.wait(self.poll_interval):
+            for spec in shared.claim_sweeps():
+                self.start_sweep(spec)
+            self.runners = {sweep_id: runner for sweep_id, runner in self.runners.items() if runner.is_alive()}
+
+    def start_sweep(self, spec):
+        args = dict(spec)
+        kind = args.pop('kind')
+        try:
+            runner = RUNNERS[kind](scheduler=self.scheduler, **args)
+        except Exception as e:
+            print(f"Sweep {spec['sweep_id']} could not start: {e}", flush=True)
+            self.scheduler.shared.save_sweep(spec['sweep_id'], status_snapshot(spec['sweep_id'], kind, 'failed'))
+            return
+        runner.publish()
+        runner.start()
+        self.runners[runner.sweep_id] = runner
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,127 @@
+import os
+import stat
+
+import psutil
+
+# rw modes that never modify the target
+READ_ONLY_RW = ('read', 'randread')
+
+def configured_targets(config):
+    return config.get('targets', {})
+
+def is_block_device(path):
+    try:
+        return stat.S_ISBLK(os.stat(path).st_mode)
+    except OSError:
+        return path.startswith('/dev/')
+
+def escape_filename(path):
+    """fio separates several files in filename= with ':', so literal colons are escaped"""
+    return path.replace(':', '\\:')
+
+def resolve(config, target, data_dir, run_id):
+    """Paths and per-path fio options for a named target.
+
+    Without a target each run writes a fresh file of its own. Target entries are
+    either a path or a mapping with 'path' plus pinning options (cpus_allowed,
+    numa_cpu_nodes) for the job that drives it; relative paths live in the data
+    directory. File targets keep their name across runs, so a preconditioned file is
+    reused (fio only lays a file out when it is missing or smaller than size).
+    """
+    if not target:
+        return [{'path': f'{data_dir}/testfile_{run_id}', 'options': {}}]
+    targets = configured_targets(config)
+    if target not in targets:
+        raise ValueError(f"Unknown target {target!r}; add it under targets: in the config")
+
+    resolved = []
+    for entry in targets[target].get('paths', []):
+        entry = {'path': entry} if isinstance(entry, str) else dict(entry)
+        path = entry.pop('path')
+        resolved.append({'path': path if os.path.isabs(path) else os.path.join(data_dir, path), 'options': entry})
+    if not resolved:
+        raise ValueError(f"Target {target!r} has no paths")
+    return resolved
+
+# Kernel view of block devices: partitions are subdirectories of their disk, and devices
+# built on top of one (device-mapper, LVM, md) are listed under its holders/
+SYS_BLOCK = '/sys/class/block'
+
+def mounted_devices():
+    return {os.path.realpath(partition.device) for partition in psutil.disk_partitions(all=False)
+            if partition.device.startswith('/dev/')}
+
+def partitions(name):
+    base = os.path.join(SYS_BLOCK, name)
+    try:
+        entries = os.listdir(base)
+    except OSError:
+        return []
+    return [entry for entry in entries if os.path.exists(os.path.join(base, entry, 'partition'))]
+
+def holders(name):
+    try:
+        return os.listdir(os.path.join(SYS_BLOCK, name, 'holders'))
+    except OSError:
+        return []
+
+def stacked_devices(name):
+    """Kernel names of a device's partitions and of everything held on it or them, recursively"""
+    found, pending = set(), [name]
+    while pending:
+        current = pending.pop()
+        for child in partitions(current) + holders(current):
+            if child not in found:
+                found.add(child)
+                pending.append(child)
+    return found
+
+def device_in_use(path, mounted):
+    """Why writing to a local block device would destroy data in use, or None.
+
+    A device is in use when it, one of its partitions or a device stacked on either is
+    mounted, or when something holds it or a partition (a device-mapper/LVM volume, an
+    md array), mounted or not.
+    """
+    name = os.path.basename(os.path.realpath(path))
+    mounted_names = {os.path.basename(device) for device in mounted}
+    stacked = stacked_devices(name)
+    busy_mounts = sorted(({name} | stacked) & mounted_names)
+    if busy_mounts:
+        return f"{path} is mounted ({', '.join(busy_mounts)})"
+    held = sorted(holder for device in [name] + partitions(name) for holder in holders(device))
+    if held:
+        return f"{path} is held by {', '.join(held)}"
+    return None
+
+def check_destructive(paths, rw, confirmed=False, local=True):
+    """Refuse writes to raw block devices unless confirmed, and to devices in use at all.
+
+    For remote (client mode) paths only the confirmation applies, since their mounts
+    and holders cannot be inspected from here.
+    """
+    if rw in READ_ONLY_RW:
+        return
+    devices = [path for path in paths if (is_block_device(path) if local else path.startswith('/dev/'))]
+    if not devices:
+        return
+    if local:
+        mounted = mounted_devices()
+        busy = [reason for reason in (device_in_use(path, mounted) for path in devices) if reason]
+        if busy:
+            raise ValueError(f"Refusing to write to device(s) in use: {'; '.join(busy)}")
+    if not confirmed:
+        raise ValueError(f"{rw} overwrites data on {', '.join(devices)}; confirm the destructive write to run it")
+
+def job_sections(name, resolved):
+    """(global filename, job sections) for the resolved targets.
+
+    One target keeps the single-job layout; several get one job section each, so
+    every device is driven by its own numjobs × iodepth and can be pinned separately.
+    """
+    if len(resolved) == 1:
+        return escape_filename(resolved[0]['path']), [(name, dict(resolved[0]['options']))]
+    return None, [
+        (f'{name}_{index}', {'filename': escape_filename(target['path']), **target['options']})
+        for index, target in enumerate(resolved)
+    ]
@@ -0,0 +1,172 @@
+import json
+import threading
+import time
+
+import psutil
+
+import defaults
+
+# fio forks its job processes at startup, so the (costly) /proc walk for children is only
+# repeated every few samples
+TREE_REFRESH_SAMPLES = 10
+# Already counted in user / nice on Linux
+GUEST_CPU_FIELDS = ('guest', 'guest_nice')
+
+def settings(config, overrides=None):
+    """The telemetry section; the interval defaults to fio's status interval so samples line up"""
+    merged = defaults.section(config, 'telemetry', overrides)
+    if merged['interval'] is None:
+        merged['interval'] = config.get('common', {}).get('status_interval', 1)
+    return merged
+
+class TelemetrySampler(threading.Thread):
+    """Sample host CPU, per-disk IO, memory and the fio process tree's CPU while fio runs.
+
+    Each sample is a flat dict keyed by time since the sampler started. The sampler
+    times its own work with thread CPU time so its overhead is reported with the data.
+    """
+
+    def __init__(self, process, interval=1):
+        super().__init__(daemon=True)
+        self.process = process
+        self.interval = interval
+        self.samples = []
+        self.overhead = {}
+        self._procs = {}
+        self._tree_age = TREE_REFRESH_SAMPLES
+        self._disks = None
+        self._cpu = None
+        self._stop_event = threading.Event()
+
+    def _fio_cpu(self):
+        """CPU % (100 = one core) of fio and its job processes"""
+        self._tree_age += 1
+        if self._tree_age >= TREE_REFRESH_SAMPLES:
+            self._tree_age = 0
+            try:
+                root = psutil.Process(self.process.pid)
+                procs = [root] + root.children(recursive=True)
+            except psutil.NoSuchProcess:
+                procs = []
+            # Keep existing Process objects: cpu_percent() measures since the previous call on the same object
+            self._procs = {proc.pid: self._procs.get(proc.pid, proc) for proc in procs}
+
+        total = 0.0
+        for pid, proc in list(self._procs.items()):
+            try:
+                total += proc.cpu_percent(None)
+            except psutil.NoSuchProcess:
+                del self._procs[pid]
+        return total
+
+    def _cpu_times_percent(self):
+        """Host CPU % per state since this sampler's previous call.
+
+        Computed from the sampler's own cpu_times() snapshot: cpu_times_percent(None)
+        measures from one process-wide last call, which concurrent runs' samplers would
+        keep resetting for each other.
+        """
+        now = psutil.cpu_times()
+        previous, self._cpu = self._cpu, now
+        if previous is None:
+            return {}
+        deltas = {field: max(getattr(now, field) - getattr(previous, field), 0.0) for field in now._fields
+                  if field not in GUEST_CPU_FIELDS}
+        total = sum(deltas.values())
+        return {field: delta / total * 100 if total else 0.0 for field, delta in deltas.items()}
+
+    def _disk_rates(self, span):
+        counters = psutil.disk_io_counters(perdisk=True) or {}
+        previous, self._disks = self._disks, counters
+        if previous is None:
+            return {}
+        rates = {}
+        for disk, now in counters.items():
+            before = previous.get(disk)
+            if before is None:
+                continue
+            rates[disk] = {
+                'read_iops': (now.read_count - before.read_count) / span,
+                'write_iops': (now.write_count - before.write_count) / span,
+                'read_mb': (now.read_bytes - before.read_bytes) / span / (1024 * 1024),
+                'write_mb': (now.write_bytes - before.write_bytes) / span / (1024 * 1024),
+                # busy_time is Linux-only; utilisation as % of the interval
+                'busy_pct': min(100.0, (getattr(now, 'busy_time', 0) - getattr(before, 'busy_time', 0)) / span / 10),
+            }
+        return rates
+
+    def sample(self, t, span):
+        cpu = self._cpu_times_percent()
+        memory = psutil.virtual_memory()
+        return {
+            't': t,
+            'cpu_user': cpu.get('user', 0.0),
+            'cpu_system': cpu.get('system', 0.0),
+            'cpu_iowait': cpu.get('iowait', 0.0),
+            'mem_used_pct': memory.percent,
+            'mem_available_mb': memory.available / (1024 * 1024),
+            'swap_used_pct': psutil.swap_memory().percent,
+            'fio_cpu_pct': self._fio_cpu(),
+            'disks': self._disk_rates(span),
+        }
+
+    def run(self):
+        start = last = time.monotonic()
+        busy = 0.0
+        # Prime the since-last-call counters so the first real sample covers one interval
+        thread_start = time.thread_time()
+        self._cpu_times_percent()
+        self._disk_rates(1)
+        self._fio_cpu()
+        busy += time.thread_time() - thread_start
+
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            thread_start = time.thread_time()
+            self.samples.append(self.sample(now - start, now - last))
+            busy += time.thread_time() - thread_start
+            last = now
+            if self.process.poll() is not None:
+                break
+
+        wall = time.monotonic() - start
+        self.overhead = {
+            'cpu_seconds': busy,
+            'wall_seconds': wall,
+            'pct_of_one_core': busy / wall * 100 if wall else 0.0,
+            'mean_sample_ms': busy / max(len(self.samples), 1) * 1000,
+        }
+
+    def stop(self):
+        self._stop_event.set()
+
+    def active_disks(self):
+        """Disks that saw any IO during the run"""
+        return sorted({
+            disk for sample in self.samples for disk, rates in sample['disks'].items()
+            if rates['read_iops'] or rates['write_iops']
+        })
+
+    def save(self, path):
+        """Write the samples (idle disks dropped) and overhead figures as one JSON document"""
+        disks = set(self.active_disks())
+        samples = [dict(s, disks={d: r for d, r in s['disks'].items() if d in disks}) for s in self.samples]
+        with open(path, 'w') as f:
+            json.dump({'interval': self.interval, 'overhead': self.overhead, 'samples': samples}, f)
+        return path
+
+def summarize(samples):
+    """Run-level means stored with the run record"""
+    if not samples:
+        return {'fio_cpu_pct': None, 'cpu_iowait_pct': None, 'host_cpu_cores': None}
+    return {
+        'fio_cpu_pct': sum(s['fio_cpu_pct'] for s in samples) / len(samples),
+        'cpu_iowait_pct': sum(s['cpu_iowait'] for s in samples) / len(samples),
+        # Busy cores host-wide, including kernel threads (e.g. io_uring SQ polling) outside fio's tree
+        'host_cpu_cores': sum(s['cpu_user'] + s['cpu_system'] for s in samples) / len(samples) / 100
+                          * (psutil.cpu_count() or 1),
+    }
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,22 @@
+import numpy as np
+
+from analysis import histogram_percentiles, merge_histograms
+
+def test_merge_histograms_sums_counts_per_bin():
+    stats = [{'clat_ns': {'bins': {'100': 2, '200': 1}}},
+             {'clat_ns': {'bins': {'200': 3, '300': 4}}},
+             {}]
+    values, counts = merge_histograms(stats)
+    assert values.tolist() == [100, 200, 300]
+    assert counts.tolist() == [2, 4, 4]
+
+def test_merge_histograms_without_bins():
+    assert merge_histograms([{'clat_ns': {'mean': 10}}]) is None
+
+def test_histogram_percentiles_rank_rule():
+    # Cumulative counts 2, 6, 10: a percentile lands on the first bin whose count reaches its rank
+    values, counts = np.array([100, 200, 300]), np.array([2.0, 4.0, 4.0])
+    assert histogram_percentiles(values, counts, [20, 21, 50, 60, 61, 100]).tolist() == [100, 200, 200, 200, 300, 300]
+
+def test_histogram_percentiles_empty():
+    assert histogram_percentiles(np.array([100]), np.array([0.0]), [50, 99]).tolist() == [0, 0]
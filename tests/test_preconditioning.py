@@ -0,0 +1,35 @@
+from preconditioning import window_verdict
+
+CRITERIA = {'window_rounds': 5, 'max_range_pct': 20, 'max_slope_pct': 10}
+
+def test_needs_a_full_window():
+    assert window_verdict([100] * 4, CRITERIA) is None
+
+def test_zero_mean():
+    assert window_verdict([0] * 5, CRITERIA) is None
+
+def test_range_at_the_limit_is_steady():
+    verdict = window_verdict([90, 110, 100, 100, 100], CRITERIA)
+    assert verdict['range_pct'] == 20
+    assert verdict['slope_pct'] == 4
+    assert verdict['steady']
+
+def test_range_over_the_limit():
+    verdict = window_verdict([89, 111, 100, 100, 100], CRITERIA)
+    assert verdict['range_pct'] == 22
+    assert not verdict['steady']
+
+def test_excursion_at_the_limit_is_steady():
+    # Best-fit line rises 10% of the mean across the window
+    verdict = window_verdict([95, 97.5, 100, 102.5, 105], CRITERIA)
+    assert verdict['slope_pct'] == 10
+    assert verdict['steady']
+
+def test_excursion_over_the_limit():
+    verdict = window_verdict([92, 96, 100, 104, 108], CRITERIA)
+    assert verdict['range_pct'] == 16
+    assert verdict['slope_pct'] == 16
+    assert not verdict['steady']
+
+def test_only_the_trailing_window_counts():
+    assert window_verdict([10, 50] + [100] * 5, CRITERIA)['steady']
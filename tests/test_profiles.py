@@ -0,0 +1,36 @@
+from profiles import compile_jobs, expected_runtime, summary_rw
+
+CONFIG = {'workloads': {'oltp': {'rw': 'randrw', 'rwmixread': 70, 'bs': '8k', 'iodepth': 16, 'name': 'OLTP'}}}
+
+PROFILE = {'groups': [
+    {'name': 'fill', 'runtime': 10, 'jobs': [{'name': 'seq', 'rw': 'write', 'bs': '1M'}]},
+    {'name': 'mixed', 'jobs': [{'name': 'db', 'workload': 'oltp'}, {'name': 'scan', 'rw': 'read', 'bs': '128k'}]},
+    {'name': 'backup', 'concurrent': True, 'runtime': 90, 'jobs': [{'name': 'copy', 'rw': 'read', 'bs': '1M'}]},
+]}
+
+def test_compile_jobs_sections_and_barriers():
+    sections = compile_jobs(CONFIG, PROFILE)
+    assert [name for name, _ in sections] == ['fill.seq', 'mixed.db', 'mixed.scan', 'backup.copy']
+    options = dict(sections)
+    assert options['fill.seq'] == {'rw': 'write', 'bs': '1M', 'runtime': 10, 'description': 'fill'}
+    # A new stage waits for the one before; later jobs of a stage and concurrent groups only report apart
+    assert options['mixed.db'] == {'rw': 'randrw', 'rwmixread': 70, 'bs': '8k', 'iodepth': 16,
+                                   'description': 'mixed', 'stonewall': True}
+    assert options['mixed.scan'] == {'rw': 'read', 'bs': '128k', 'description': 'mixed', 'new_group': True}
+    assert options['backup.copy'] == {'rw': 'read', 'bs': '1M', 'runtime': 90, 'description': 'backup',
+                                      'new_group': True}
+
+def test_expected_runtime():
+    # fill 10s, then mixed (60s) alongside backup (90s); one ramp after the stonewall
+    assert expected_runtime(PROFILE, runtime=60, ramp_time=5) == 10 + 90 + 5
+
+def test_expected_runtime_job_runtime_wins():
+    profile = {'groups': [{'name': 'a', 'runtime': 10, 'jobs': [{'name': 'x'}, {'name': 'y', 'runtime': 30}]}]}
+    assert expected_runtime(profile, runtime=60, ramp_time=5) == 30
+
+def test_summary_rw():
+    assert summary_rw(['randrw', 'randrw']) == 'randrw'
+    assert summary_rw(['read', 'randread']) == 'randread'
+    assert summary_rw(['write', 'write', 'read']) == 'rw'
+    assert summary_rw(['write', 'randwrite']) == 'randwrite'
+    assert summary_rw(['randread', 'write']) == 'randrw'
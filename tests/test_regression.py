@@ -0,0 +1,72 @@
+import zlib
+
+import numpy as np
+import pytest
+
+import fake_fio
+from regression import autocorrelation_time, block_means, compare, permutation_test
+
+CRITERIA = {'threshold_pct': 5.0, 'alpha': 0.05, 'permutations': 2000, 'min_repeats': 4}
+
+@pytest.fixture
+def fio_run(tmp_path, monkeypatch):
+    """Write a fake fio result file (status documents plus the final one); returns a run record"""
+    monkeypatch.setenv('FAKE_FIO_TICK', '0')
+
+    def run(run_id, iops, intervals=30):
+        path = tmp_path / f'results_{run_id}.json'
+        monkeypatch.setenv('FAKE_FIO_IOPS', str(iops))
+        monkeypatch.setenv('FAKE_FIO_SEED', str(zlib.crc32(run_id.encode())))
+        fake_fio.main(['--rw=randread', '--bs=4k', f'--runtime={intervals}', '--status-interval=1',
+                       f'--output={path}', f'--name={run_id}'])
+        return {'run_id': run_id, 'result_file': str(path)}
+    return run
+
+def test_permutation_test_needs_two_samples_per_side():
+    assert permutation_test([1.0], [1.0, 2.0]) is None
+
+def test_permutation_test_separated_samples():
+    # 4 + 4 samples: the exact two-sided p-value is 2 / 70
+    assert permutation_test([100, 101, 102, 103], [110, 111, 112, 113]) == pytest.approx(2 / 70, abs=0.01)
+
+def test_permutation_test_same_distribution():
+    rng = np.random.default_rng(1)
+    assert permutation_test(rng.normal(100, 5, 30), rng.normal(100, 5, 30)) > 0.05
+
+def test_autocorrelation_time():
+    rng = np.random.default_rng(2)
+    assert autocorrelation_time([5.0] * 10) == 1.0
+    assert autocorrelation_time(rng.normal(0, 1, 500)) < 1.5
+    # AR(1) with coefficient 0.9: (1 + 0.9) / (1 - 0.9) = 19
+    noise, series = rng.normal(0, 1, 2000), [0.0]
+    for value in noise:
+        series.append(0.9 * series[-1] + value)
+    assert 10 < autocorrelation_time(series) < 30
+
+def test_block_means_stay_within_a_run():
+    assert block_means([[1, 2, 3, 4, 5], [10, 20]], 2) == [1.5, 3.5, 15.0]
+
+def test_compare_same_performance(fio_run):
+    result = compare([fio_run('base', 20000)], [fio_run('same', 20000)], CRITERIA)
+    assert result['basis'] == 'intervals' and result['block'] >= 1
+    assert not result['significant']
+    # fake_fio's latency tails are noise, so only throughput is checked
+    assert not any(row['regressed'] for row in result['metrics'] if row['metric'] in ('iops', 'bw'))
+
+def test_compare_flags_an_iops_drop(fio_run):
+    result = compare([fio_run('base', 20000)], [fio_run('slow', 16000)], CRITERIA)
+    iops = next(row for row in result['metrics'] if row['metric'] == 'iops')
+    # The final IOPS is the last interval's, within 2% of the set rate
+    assert iops['delta_pct'] == pytest.approx(-20, abs=4)
+    assert result['significant'] and result['regressed']
+
+def test_compare_uses_runs_once_both_sides_repeat(fio_run):
+    baseline = [fio_run(f'base{index}', 20000) for index in range(4)]
+    candidate = [fio_run(f'slow{index}', 18000) for index in range(4)]
+    result = compare(baseline, candidate, CRITERIA)
+    assert (result['basis'], result['block']) == ('runs', None)
+    # The smallest p-value 4 + 4 runs can reach
+    assert result['p_value'] == pytest.approx(2 / 70, abs=0.01)
+    assert result['regressed']
+
+    assert compare(baseline[:3], candidate[:3], CRITERIA)['basis'] == 'intervals'
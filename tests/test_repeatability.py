@@ -0,0 +1,29 @@
+from repeatability import bootstrap_ci, outliers
+
+def test_bootstrap_ci_needs_two_values():
+    assert bootstrap_ci([5.0]) == (None, None)
+
+def test_bootstrap_ci_of_constant_values():
+    assert bootstrap_ci([7.0, 7.0, 7.0]) == (7.0, 7.0)
+
+def test_bootstrap_ci_brackets_the_mean():
+    values = [98, 101, 99, 103, 100, 97, 102]
+    low, high = bootstrap_ci(values)
+    assert min(values) <= low < sum(values) / len(values) < high <= max(values)
+    assert bootstrap_ci(values) == (low, high)
+    assert bootstrap_ci(values, confidence=0.5)[1] - bootstrap_ci(values, confidence=0.5)[0] < high - low
+
+def test_outliers_flags_the_far_run():
+    # median 100, MAD 1: modified z-score of 150 is 0.6745 * 50
+    assert outliers([100, 101, 99, 100, 150]) == [4]
+
+def test_outliers_threshold():
+    # Scores 0.6745 * 5 and 0.6745 * 6 either side of 3.5
+    assert outliers([100, 101, 99, 100, 105]) == []
+    assert outliers([100, 101, 99, 100, 106]) == [4]
+    assert outliers([100, 101, 99, 100, 106], threshold=5) == []
+
+def test_outliers_degenerate_inputs():
+    assert outliers([1, 100]) == []
+    # MAD of zero: no scale to judge by
+    assert outliers([100, 100, 100, 200]) == []
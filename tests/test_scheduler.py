@@ -0,0 +1,136 @@
+import os
+import sys
+import time
+
+import pytest
+import yaml
+
+import engine
+import scheduler
+from results_store import ResultsStore
+from scheduler import RunScheduler
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Shipped config with a short scenario, run against fake_fio.py in a scratch data directory"""
+    bin_dir = tmp_path / 'bin'
+    bin_dir.mkdir()
+    shim = bin_dir / 'fio'
+    shim.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{os.path.join(REPO_DIR, "fake_fio.py")}" "$@"\n')
+    shim.chmod(0o755)
+    monkeypatch.setenv('PATH', f'{bin_dir}{os.pathsep}{os.environ.get("PATH", "")}')
+    monkeypatch.setenv('FAKE_FIO_TICK', '0.05')
+    monkeypatch.setattr(engine, 'DATA_DIR', str(tmp_path / 'data'))
+    # Paths under a/ and b/ stand for two disks
+    monkeypatch.setattr(scheduler, 'path_devices', lambda paths: {os.path.basename(os.path.dirname(path))
+                                                                  for path in paths})
+    with open(os.path.join(REPO_DIR, 'fio_defaults.yaml')) as f:
+        config = yaml.safe_load(f)
+    config['scenarios']['test'] = {'runtime': 4, 'size': '1M', 'ramp_time': 0}
+    config['targets'] = {disk: {'paths': [str(tmp_path / disk / 'testfile')]} for disk in ('a', 'b')}
+    config['telemetry'] = {'enabled': False}
+    return config
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultsStore(str(tmp_path / 'flowfio.db'))
+
+def params(target='a'):
+    return {'scenario': 'test', 'workload_preset': 'oltp', 'storage_type': 'nvme_ssd', 'direct': 1, 'bs': '4k',
+            'numjobs': 1, 'iodepth': 1, 'size': '1M', 'target': target}
+
+def statuses(queue, run_ids):
+    return [queue.job(run_id)['status'] for run_id in run_ids]
+
+def settle(queue, run_ids, timeout=30):
+    """Reap until every run reached a terminal status"""
+    deadline = time.monotonic() + timeout
+    while any(status not in scheduler.TERMINAL_STATUSES for status in statuses(queue, run_ids)):
+        assert time.monotonic() < deadline, statuses(queue, run_ids)
+        queue._reap()
+        time.sleep(0.05)
+
+def test_one_run_per_device(config, store):
+    queue = RunScheduler(config, store, store.path)
+    first, second, other = (queue.submit(params(target))['run_id'] for target in ('a', 'a', 'b'))
+    queue._dispatch()
+    # The second run on disk a waits; disk b runs alongside
+    assert statuses(queue, [first, second, other]) == ['running', 'queued', 'running']
+    assert queue.queue_position(second) == 1
+
+    settle(queue, [first, other])
+    queue._dispatch()
+    assert queue.job(second)['status'] == 'running'
+    settle(queue, [second])
+    assert statuses(queue, [first, second, other]) == ['done'] * 3
+    assert store.get(second) is not None
+
+def test_max_runs_per_device(config, store):
+    queue = RunScheduler(config, store, store.path, max_per_device=2)
+    run_ids = [queue.submit(params())['run_id'] for _ in range(3)]
+    queue._dispatch()
+    assert statuses(queue, run_ids) == ['running', 'running', 'queued']
+    for run_id in run_ids:
+        queue.cancel(run_id)
+    settle(queue, run_ids)
+
+def test_reorder_and_cancel(config, store):
+    queue = RunScheduler(config, store, store.path)
+    first, second, third = (queue.submit(params())['run_id'] for _ in range(3))
+    queue.move(third, -1)
+    assert [job['run_id'] for job in queue.jobs()] == [first, third, second]
+    queue.move(first, 5)
+    assert [job['run_id'] for job in queue.jobs()] == [third, second, first]
+    queue.set_priority(first, 1)
+    assert [job['run_id'] for job in queue.jobs()] == [first, third, second]
+
+    queue.cancel(third)
+    assert queue.job(third)['status'] == 'cancelled'
+    assert queue.queue_position(second) == 2
+    queue._dispatch()
+    assert statuses(queue, [first, second, third]) == ['running', 'queued', 'cancelled']
+
+    # A running run is interrupted (fio still writes its results) and ends cancelled
+    queue.cancel(first)
+    settle(queue, [first])
+    assert queue.job(first)['status'] == 'cancelled'
+    queue.cancel(second)
+
+def test_recover_requeues_runs_that_never_started(config, store):
+    queue = RunScheduler(config, store, store.path)
+    started, cancelling = (queue.submit(params())['run_id'] for _ in range(2))
+    # A previous owner marked them running but died before fio was launched
+    queue._set_status(started, 'running')
+    queue._set_status(cancelling, 'running', cancel_requested=1)
+
+    RunScheduler(config, store, store.path)._recover()
+    assert statuses(queue, [started, cancelling]) == ['queued', 'cancelled']
+
+def test_recover_reattaches_to_running_fio(config, store):
+    previous = RunScheduler(config, store, store.path)
+    run_id = previous.submit(params())['run_id']
+    previous._dispatch()
+    process = previous._active[run_id]['process']
+
+    # A new queue owner takes over while fio is still running
+    queue = RunScheduler(config, store, store.path)
+    queue._recover()
+    assert queue._active[run_id]['process'].pid == process.pid
+    assert process.poll() is None
+    settle(queue, [run_id])
+    assert queue.job(run_id)['status'] == 'done'
+    assert store.get(run_id)['read_iops'] > 0
+
+def test_recover_harvests_fio_that_exited(config, store):
+    previous = RunScheduler(config, store, store.path)
+    run_id = previous.submit(params())['run_id']
+    previous._dispatch()
+    previous._active[run_id]['process'].wait(30)
+
+    queue = RunScheduler(config, store, store.path)
+    queue._recover()
+    settle(queue, [run_id])
+    assert queue.job(run_id)['status'] == 'done'
+    assert store.get(run_id) is not None
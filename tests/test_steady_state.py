@@ -0,0 +1,25 @@
+from steady_state import is_steady, linear_slope
+
+def samples(iops):
+    return [{'t': t, 'read_iops': value, 'write_iops': 0, 'read_bw': value / 256, 'write_bw': 0}
+            for t, value in enumerate(iops)]
+
+def test_linear_slope():
+    assert linear_slope([0, 1, 2], [1, 3, 5]) == 2
+    assert linear_slope([1, 1, 1], [1, 2, 3]) == 0.0
+
+def test_flat_window_is_steady():
+    assert is_steady(samples([1000] * 5), window=5, max_slope_pct=1, max_cv_pct=5)
+
+def test_short_history_is_not_steady():
+    assert not is_steady(samples([1000] * 4), window=5, max_slope_pct=1, max_cv_pct=5)
+
+def test_only_the_trailing_window_counts():
+    assert is_steady(samples([10, 500] + [1000] * 5), window=5, max_slope_pct=1, max_cv_pct=5)
+
+def test_trend_is_not_steady():
+    # 2% of the mean per second
+    assert not is_steady(samples([960, 980, 1000, 1020, 1040]), window=5, max_slope_pct=1, max_cv_pct=5)
+
+def test_noise_is_not_steady():
+    assert not is_steady(samples([900, 1100, 900, 1100, 1000]), window=5, max_slope_pct=5, max_cv_pct=5)
@@ -0,0 +1,62 @@
+import json
+
+from streaming import StatusFollower, interval_sample
+
+def document(elapsed):
+    return json.dumps({'timestamp_ms': elapsed * 1000, 'jobs': [{'jobname': 'é', 'elapsed': elapsed}]}, indent=2,
+                      ensure_ascii=False) + '\n'
+
+def test_status_follower_frames_partial_reads(tmp_path):
+    path = tmp_path / 'status.json'
+    follower = StatusFollower(str(path))
+    assert follower.read() == []
+
+    data = (document(1) + document(2)).encode()
+    # Cut inside the first closing '\n}' and inside the second document's two-byte 'é'
+    first = data.index(b'\n}') + 1
+    second = data.index('é'.encode(), first) + 1
+    with open(path, 'wb') as f:
+        f.write(data[:first])
+        f.flush()
+        assert follower.read() == []
+        f.write(data[first:second])
+        f.flush()
+        assert [d['jobs'][0]['elapsed'] for d in follower.read()] == [1]
+        f.write(data[second:])
+        f.flush()
+        documents = follower.read()
+    assert [d['jobs'][0]['elapsed'] for d in documents] == [2]
+    assert documents[0]['jobs'][0]['jobname'] == 'é'
+
+def test_status_follower_skips_other_output(tmp_path):
+    path = tmp_path / 'status.json'
+    path.write_text('fio: some warning\n{\n  "note": 1\n}\n' + document(3))
+    assert [d['jobs'][0]['elapsed'] for d in StatusFollower(str(path)).read()] == [3]
+
+def test_status_follower_normalizes_client_output(tmp_path):
+    path = tmp_path / 'status.json'
+    path.write_text(json.dumps({'client_stats': [{'jobname': 'a', 'hostname': 'h1'}, {'jobname': 'All clients'}]},
+                               indent=2) + '\n')
+    assert StatusFollower(str(path)).read()[0]['jobs'] == [{'jobname': 'a', 'hostname': 'h1'}]
+
+def totals(timestamp_ms, elapsed, read_ios, read_lat_sum):
+    return {'timestamp_ms': timestamp_ms, 'elapsed': elapsed,
+            'read_ios': read_ios, 'read_bytes': read_ios * 4096, 'read_lat_sum': read_lat_sum,
+            'write_ios': 0, 'write_bytes': 0, 'write_lat_sum': 0}
+
+def test_interval_sample_deltas():
+    previous = totals(1000, 1, 100, 100 * 50_000)
+    current = totals(3000, 3, 500, 100 * 50_000 + 400 * 100_000)
+    sample = interval_sample(previous, current)
+    assert sample == {'t': 3, 'read_iops': 200, 'read_bw': 400 * 4096 / 2 / (1024 * 1024), 'read_lat': 100,
+                      'write_iops': 0, 'write_bw': 0, 'write_lat': 0}
+
+def test_interval_sample_first_snapshot_uses_elapsed():
+    sample = interval_sample(None, totals(0, 2, 300, 300 * 20_000))
+    assert sample['read_iops'] == 150
+    assert sample['read_lat'] == 20
+
+def test_interval_sample_counter_reset_after_ramp():
+    sample = interval_sample(totals(1000, 1, 100, 100 * 50_000), totals(2000, 2, 40, 40 * 10_000))
+    assert sample['read_iops'] == 40
+    assert sample['read_lat'] == 10
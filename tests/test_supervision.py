@@ -0,0 +1,75 @@
+import signal
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import supervision
+
+CRITERIA = {'timeout_factor': 1.5, 'timeout_grace_seconds': 300, 'kill_after_seconds': 60}
+
+@pytest.fixture
+def child():
+    """Start a stand-in fio that either exits on SIGINT or ignores it"""
+    processes = []
+
+    def start(ignore_sigint):
+        handler = 'signal.SIG_IGN' if ignore_sigint else 'signal.default_int_handler'
+        process = subprocess.Popen(
+            [sys.executable, '-c', f'import signal, time\nsignal.signal(signal.SIGINT, {handler})\n'
+                                   'print(flush=True)\ntime.sleep(60)'],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        process.stdout.readline()
+        processes.append(process)
+        return process
+    yield start
+    for process in processes:
+        process.kill()
+        process.wait()
+
+def run_for(process, timeout_seconds, started_ago):
+    return {'run_id': 'r1', 'process': process, 'timeout_seconds': timeout_seconds,
+            'start_time': datetime.now() - timedelta(seconds=started_ago)}
+
+def test_run_timeout():
+    run = {'runtime': 60, 'scenario_config': {'ramp_time': 10}}
+    assert supervision.run_timeout(run, CRITERIA) == 70 * 1.5 + 300
+    assert supervision.run_timeout(dict(run, timeout=20), CRITERIA) == 20
+    assert supervision.run_timeout(dict(run, stage='precondition'), CRITERIA) is None
+
+def test_within_timeout_is_left_alone(child):
+    run = run_for(child(ignore_sigint=False), 100, started_ago=10)
+    supervision.supervise(run, CRITERIA)
+    assert not run.get('timed_out') and run['process'].poll() is None
+    assert supervision.timeout_error(run) is None
+
+def test_timeout_interrupts_with_sigint(child):
+    run = run_for(child(ignore_sigint=False), 100, started_ago=101)
+    supervision.supervise(run, CRITERIA)
+    assert run['timed_out'] and run['interrupted_at'] is not None
+    # SIGINT, not a kill: fio gets to write its final report
+    assert run['process'].wait(10) == -signal.SIGINT
+    assert not run.get('killed')
+    assert supervision.timeout_error(run) == "Timed out after 100 s; fio was interrupted"
+
+def test_kill_after_sigint_is_ignored(child):
+    run = run_for(child(ignore_sigint=True), 100, started_ago=101)
+    supervision.supervise(run, CRITERIA)
+    time.sleep(0.2)
+    assert run['process'].poll() is None
+    supervision.supervise(run, CRITERIA)
+    assert not run.get('killed')
+
+    run['interrupted_at'] -= CRITERIA['kill_after_seconds'] + 1
+    supervision.supervise(run, CRITERIA)
+    assert run['killed']
+    assert run['process'].wait(10) == -signal.SIGKILL
+
+def test_interrupt_is_sent_once(child):
+    run = run_for(child(ignore_sigint=True), None, started_ago=0)
+    supervision.interrupt(run)
+    first = run['interrupted_at']
+    supervision.interrupt(run)
+    assert run['interrupted_at'] == first
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import targets
+from targets import check_destructive, device_in_use, job_sections, resolve, stacked_devices
+
+@pytest.fixture
+def sys_block(tmp_path, monkeypatch):
+    """A /sys/class/block tree: sda with partition sda1 under an LVM volume (dm-0), sdb in an md array, sdc unused"""
+    root = tmp_path / 'block'
+    for name in ('sda', 'sdb', 'sdc', 'dm-0', 'md0'):
+        (root / name / 'holders').mkdir(parents=True)
+    (root / 'sda' / 'sda1' / 'holders').mkdir(parents=True)
+    (root / 'sda' / 'sda1' / 'partition').write_text('1\n')
+    os.symlink(root / 'sda' / 'sda1', root / 'sda1')
+    os.symlink(root / 'dm-0', root / 'sda' / 'sda1' / 'holders' / 'dm-0')
+    os.symlink(root / 'md0', root / 'sdb' / 'holders' / 'md0')
+    monkeypatch.setattr(targets, 'SYS_BLOCK', str(root))
+    monkeypatch.setattr(targets, 'is_block_device', lambda path: path.startswith('/dev/'))
+    return root
+
+def test_stacked_devices(sys_block):
+    assert stacked_devices('sda') == {'sda1', 'dm-0'}
+    assert stacked_devices('sdb') == {'md0'}
+    assert stacked_devices('sdc') == set()
+
+def test_device_in_use(sys_block):
+    # Mounted through the LVM volume on its partition
+    assert device_in_use('/dev/sda', {'/dev/dm-0'}) == '/dev/sda is mounted (dm-0)'
+    assert device_in_use('/dev/sda', {'/dev/sda1'}) == '/dev/sda is mounted (sda1)'
+    # Held without a mount: the volume group or array would be destroyed
+    assert device_in_use('/dev/sda', set()) == '/dev/sda is held by dm-0'
+    assert device_in_use('/dev/sdb', set()) == '/dev/sdb is held by md0'
+    assert device_in_use('/dev/sdc', {'/dev/sda1'}) is None
+
+def test_check_destructive(sys_block, monkeypatch):
+    monkeypatch.setattr(targets, 'mounted_devices', lambda: set())
+    check_destructive(['/dev/sdb'], 'randread')
+    check_destructive(['/data/testfile'], 'randwrite')
+    with pytest.raises(ValueError, match='confirm'):
+        check_destructive(['/dev/sdc'], 'randwrite')
+    check_destructive(['/dev/sdc'], 'randwrite', confirmed=True)
+    # Devices in use are refused even when confirmed
+    with pytest.raises(ValueError, match='in use.*held by md0'):
+        check_destructive(['/dev/sdc', '/dev/sdb'], 'write', confirmed=True)
+
+def test_check_destructive_remote_paths_only_need_confirmation(sys_block):
+    with pytest.raises(ValueError, match='confirm'):
+        check_destructive(['/dev/sdb'], 'write', local=False)
+    check_destructive(['/dev/sdb'], 'write', confirmed=True, local=False)
+
+def test_resolve_and_job_sections():
+    config = {'targets': {'pair': {'paths': ['shared', {'path': '/dev/nvme1n1', 'numa_cpu_nodes': 1}]},
+                          'empty': {'paths': []}}}
+    assert resolve(config, None, '/data', 'r1') == [{'path': '/data/testfile_r1', 'options': {}}]
+    resolved = resolve(config, 'pair', '/data', 'r1')
+    assert resolved == [{'path': '/data/shared', 'options': {}},
+                        {'path': '/dev/nvme1n1', 'options': {'numa_cpu_nodes': 1}}]
+    assert job_sections('test', resolved) == (None, [('test_0', {'filename': '/data/shared'}),
+                                                     ('test_1', {'filename': '/dev/nvme1n1', 'numa_cpu_nodes': 1})])
+    with pytest.raises(ValueError, match='no paths'):
+        resolve(config, 'empty', '/data', 'r1')
+    with pytest.raises(ValueError, match='Unknown target'):
+        resolve(config, 'missing', '/data', 'r1')
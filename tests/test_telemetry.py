@@ -0,0 +1,17 @@
+from collections import namedtuple
+
+import telemetry
+from telemetry import TelemetrySampler
+
+CpuTimes = namedtuple('CpuTimes', 'user system idle iowait guest')
+
+def test_samplers_measure_their_own_intervals(monkeypatch):
+    readings = iter([CpuTimes(0, 0, 0, 0, 0), CpuTimes(10, 10, 80, 0, 5),
+                     CpuTimes(10, 10, 80, 0, 5), CpuTimes(40, 10, 130, 20, 5)])
+    monkeypatch.setattr(telemetry.psutil, 'cpu_times', lambda: next(readings))
+    first, second = TelemetrySampler(None), TelemetrySampler(None)
+    assert first._cpu_times_percent() == {}
+    assert second._cpu_times_percent() == {}
+    # Each sampler compares with its own previous reading, not with the other sampler's
+    assert first._cpu_times_percent() == {'user': 10.0, 'system': 10.0, 'idle': 80.0, 'iowait': 0.0}
+    assert second._cpu_times_percent() == {'user': 30.0, 'system': 0.0, 'idle': 50.0, 'iowait': 20.0}
@@ -0,0 +1,66 @@
+import traces
+from traces import TraceProfile, bssplit, blkparse_events, iolog_events
+
+BLKPARSE = """\
+  8,0    3        1     0.000000000  1234  Q   R 2048 + 8 [fio]
+  8,0    3        2     0.000010000  1234  D   R 2048 + 8 [fio]
+  8,0    3        3     0.000020000  1234  D  WS 4096 + 16 [fio]
+  8,0    3        4     0.000100000     0  C   R 2048 + 8 [0]
+  8,0    3        5     0.000200000  1234  D  DS 8192 + 8 [fio]
+  8,0    3        6     0.000300000  1234  D FWS 0 + 0 [fio]
+CPU3 (8,0):
+ Reads Queued:           1,        4KiB
+"""
+
+def test_blkparse_issues_and_completions():
+    assert list(blkparse_events(BLKPARSE.splitlines())) == [
+        (0.00001, 'read', 2048 * 512, 4096, False),
+        (0.00002, 'write', 4096 * 512, 8192, False),
+        (0.0001, 'read', 2048 * 512, 4096, True),
+    ]
+
+def test_blkparse_action():
+    assert [event[:2] for event in blkparse_events(BLKPARSE.splitlines(), action='Q')] == [
+        (0.0, 'read'), (0.0001, 'read')]
+
+def test_iolog_v3():
+    lines = ['fio version 3 iolog', '0 /dev/sdb add', '0 /dev/sdb open', '1500 /dev/sdb read 4096 8192',
+             '2000 /dev/sdb write 0 4096', '2500 /dev/sdb trim 0 4096', '3000 /dev/sdb close']
+    assert list(iolog_events(lines)) == [(1.5, 'read', 4096, 8192, False), (2.0, 'write', 0, 4096, False)]
+
+def test_iolog_v2_has_no_timestamps():
+    lines = ['fio version 2 iolog', '/dev/sdb add', '/dev/sdb open', '/dev/sdb write 8192 4096']
+    assert list(iolog_events(lines)) == [(0.0, 'write', 8192, 4096, False)]
+
+def test_bssplit_shares():
+    assert bssplit({'4096': 75, '8192': 25}) == '4k/75:8k/25'
+
+def test_bssplit_rounding_sums_to_100():
+    assert bssplit({4096: 1, 8192: 1, 16384: 1}) == '4k/34:8k/33:16k/33'
+
+def test_bssplit_keeps_the_most_common_sizes():
+    sizes = {4096 * (index + 1): 100 - index for index in range(10)}
+    split = bssplit(sizes)
+    assert len(split.split(':')) == 8
+    assert '36k' not in split and '40k' not in split
+    assert sum(int(entry.split('/')[1]) for entry in split.split(':')) == 100
+
+def test_profile_without_completions_stops_tracking(monkeypatch):
+    monkeypatch.setattr(traces, 'MAX_INFLIGHT', 4)
+    profile = TraceProfile()
+    for index in range(10):
+        profile.add(index // 2 / 1000, 'read', index * 4096, 4096)
+    assert profile._inflight is None
+    summary = profile.summary()
+    # Two IOs share each issue timestamp
+    assert (summary['queue_depth'], summary['queue_depth_measured']) == (2, False)
+
+def test_profile_evicts_ios_whose_completion_was_lost(monkeypatch):
+    monkeypatch.setattr(traces, 'MAX_INFLIGHT', 4)
+    profile = TraceProfile()
+    profile.add(0.0, 'read', 0, 4096)
+    profile.add(0.0, 'read', 0, 4096, completed=True)
+    for index in range(1, 10):
+        profile.add(index / 1000, 'write', index * 4096, 4096)
+    assert len(profile._inflight) == 4
+    assert profile.summary()['queue_depth_measured']
@@ -0,0 +1,461 @@
+import argparse
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+from collections import OrderedDict
+
+import yaml
+
+# Every IO of an imported trace names this file; replay_redirect points it at the run's target
+TRACE_FILE = 'trace_target'
+SECTOR_BYTES = 512
+# Binary blktrace records start with this magic (the low byte is the format version)
+BLKTRACE_MAGIC = 0x65617400
+
+# blkparse's default output: dev cpu seq time pid action rwbs sector + sectors [process]
+BLKPARSE_LINE = re.compile(r'^\s*\d+,\d+\s+\d+\s+\d+\s+([\d.]+)\s+\d+\s+([A-Z])\s+([A-Z]+)\s+(\d+)\s+\+\s+(\d+)')
+
+SIZE_UNITS = {'': 1, 'k': 1 << 10, 'm': 1 << 20, 'g': 1 << 30, 't': 1 << 40}
+
+# bssplit keeps the most common block sizes; the rest are folded into them
+MAX_BSSPLIT_SIZES = 8
+
+# Issued IOs kept for pairing with their completions, far above any real queue depth. A trace
+# without completions (fio iologs, D-only blkparse) would never drain them, so past this many
+# the oldest is evicted, and with no completion seen at all pairing is given up
+MAX_INFLIGHT = 65536
+
+def parse_size(value):
+    """Bytes for a fio-style size such as 4k, 1M or 10G (base 2, as fio's default kb_base)"""
+    match = re.fullmatch(r'\s*(\d+)\s*([kmgt]?)i?b?\s*', str(value).lower())
+    if not match:
+        raise ValueError(f"Not a size: {value!r}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2)]
+
+def format_size(size):
+    for unit in ('t', 'g', 'm', 'k'):
+        if size >= SIZE_UNITS[unit] and size % SIZE_UNITS[unit] == 0:
+            return f'{size // SIZE_UNITS[unit]}{unit}'
+    return str(size)
+
+def trace_dir(data_dir):
+    return os.path.join(data_dir, 'traces')
+
+def trace_paths(data_dir, name):
+    """(replayable fio iolog, profile JSON) for an imported trace"""
+    base = os.path.join(trace_dir(data_dir), name)
+    return f'{base}.iolog', f'{base}.json'
+
+def detect_format(path):
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    if len(head) >= 4 and int.from_bytes(head[:4], 'little') & 0xffffff00 == BLKTRACE_MAGIC:
+        return 'blktrace'
+    if head.startswith(b'fio version'):
+        return 'iolog'
+    return 'blkparse'
+
+def blkparse_events(lines, action='D'):
+    """(seconds, 'read'|'write', offset, length, completed) from blkparse text.
+
+    Issues are the `action` events (D: dispatched to the driver); completions (C) are
+    passed through with completed=True so queue depth can be measured. Flushes without
+    data, discards and other actions are skipped.
+    """
+    for line in lines:
+        match = BLKPARSE_LINE.match(line)
+        if not match:
+            continue
+        seconds, event, rwbs, sector, sectors = match.groups()
+        if event not in (action, 'C') or sectors == '0' or 'D' in rwbs:
+            continue
+        if 'R' in rwbs:
+            direction = 'read'
+        elif 'W' in rwbs:
+            direction = 'write'
+        else:
+            continue
+        yield float(seconds), direction, int(sector) * SECTOR_BYTES, int(sectors) * SECTOR_BYTES, event == 'C'
+
+def iolog_events(lines):
+    """Events from a fio iolog (version 2 has no timestamps, so its IOs all start at 0)"""
+    version = None
+    for line in lines:
+        fields = line.split()
+        if version is None:
+            version = 3 if line.startswith('fio version 3') else 2
+            continue
+        if version == 3:
+            if len(fields) != 5:
+                continue
+            timestamp, fields = int(fields[0]) / 1000, fields[1:]
+        else:
+            if len(fields) != 4:
+                continue
+            timestamp = 0.0
+        if fields[1] in ('read', 'write'):
+            yield timestamp, fields[1], int(fields[2]), int(fields[3]), False
+
+def open_events(path, trace_format='auto', action='D'):
+    """Stream the IO events of a trace file without loading it; returns (events, cleanup)"""
+    if trace_format == 'auto':
+        trace_format = detect_format(path)
+    if trace_format == 'blktrace':
+        try:
+            process = subprocess.Popen(['blkparse', '-i', path, '-o', '-'], stdout=subprocess.PIPE, text=True)
+        except OSError as e:
+            raise ValueError(f"Binary blktrace files need blkparse: {e}") from e
+        return blkparse_events(process.stdout, action), process.wait
+    f = open(path)
+    if trace_format == 'iolog':
+        return iolog_events(f), f.close
+    if trace_format == 'blkparse':
+        return blkparse_events(f, action), f.close
+    f.close()
+    raise ValueError(f"Unknown trace format {trace_format!r}")
+
+class TraceProfile:
+    """Running statistics of a trace, folded one event at a time.
+
+    Memory stays bounded by the number of distinct block sizes and MAX_INFLIGHT issued
+    IOs. Queue depth comes from issue/completion pairs when the trace has completions, and
+    otherwise from how many IOs share an issue timestamp (a lower bound).
+    """
+
+    def __init__(self):
+        self.ios = {'read': 0, 'write': 0}
+        self.bytes = {'read': 0, 'write': 0}
+        self.sizes = {'read': {}, 'write': {}}
+        self.sequential = 0
+        self.span = 0
+        self.first = None
+        self.last = 0.0
+        self._next_offset = {'read': None, 'write': None}
+        self._inflight = OrderedDict()
+        self._depth_total = 0
+        self._completions = 0
+        self._burst_time = None
+        self._burst = 0
+        self._burst_total = 0
+        self._bursts = 0
+
+    def add(self, seconds, direction, offset, length, completed=False):
+        if completed:
+            self._completions += 1
+            if self._inflight is not None:
+                self._inflight.pop((direction, offset), None)
+            return
+        if self.first is None:
+            self.first = seconds
+        self.last = seconds
+        self.ios[direction] += 1
+        self.bytes[direction] += length
+        self.sizes[direction][length] = self.sizes[direction].get(length, 0) + 1
+        if self._next_offset[direction] == offset:
+            self.sequential += 1
+        self._next_offset[direction] = offset + length
+        self.span = max(self.span, offset + length)
+
+        if self._inflight is not None:
+            self._inflight[(direction, offset)] = None
+            if len(self._inflight) > MAX_INFLIGHT:
+                if self._completions:
+                    self._inflight.popitem(last=False)
+                else:
+                    self._inflight = None
+            if self._inflight is not None:
+                self._depth_total += len(self._inflight)
+        if seconds == self._burst_time:
+            self._burst += 1
+        else:
+            self._close_burst()
+            self._burst_time, self._burst = seconds, 1
+
+    def _close_burst(self):
+        if self._burst:
+            self._burst_total += self._burst
+            self._bursts += 1
+
+    def summary(self):
+        self._close_burst()
+        self._burst = 0
+        total = self.ios['read'] + self.ios['write']
+        if not total:
+            raise ValueError("The trace has no read or write IOs")
+        measured = bool(self._completions) and self._inflight is not None
+        if measured:
+            queue_depth = self._depth_total / total
+        else:
+            queue_depth = self._burst_total / max(self._bursts, 1)
+        return {
+            'ios': total,
+            'read_ios': self.ios['read'],
+            'write_ios': self.ios['write'],
+            'read_bytes': self.bytes['read'],
+            'write_bytes': self.bytes['write'],
+            'duration': (self.last - self.first) if self.first is not None else 0.0,
+            'span': self.span,
+            'read_pct': self.ios['read'] / total * 100,
+            'sequential_pct': self.sequential / total * 100,
+            'queue_depth': queue_depth,
+            'queue_depth_measured': measured,
+            'sizes': {direction: {str(size): count for size, count in sorted(sizes.items())}
+                      for direction, sizes in self.sizes.items()},
+        }
+
+def import_trace(path, name, data_dir, trace_format='auto', action='D', wrap=None):
+    """Convert a trace into a fio version 3 iolog under <data dir>/traces and profile it in the same pass.
+
+    The trace is streamed: events are written out as they are read. wrap folds offsets
+    into the first `wrap` bytes (4k aligned) so device-sized traces replay on a test file.
+    """
+    os.makedirs(trace_dir(data_dir), exist_ok=True)
+    iolog_path, profile_path = trace_paths(data_dir, name)
+    wrap = parse_size(wrap) if wrap else None
+    events, cleanup = open_events(path, trace_format, action)
+    profile = TraceProfile()
+    start = None
+    last_ms = 0
+    try:
+        with open(iolog_path, 'w') as out:
+            out.write(f'fio version 3 iolog\n0 {TRACE_FILE} add\n0 {TRACE_FILE} open\n')
+            for seconds, direction, offset, length, completed in events:
+                if wrap:
+                    offset = offset % wrap // 4096 * 4096
+                    if offset + length > wrap:
+                        offset = 0
+                profile.add(seconds, direction, offset, length, completed)
+                if completed:
+                    continue
+                if start is None:
+                    start = seconds
+                last_ms = int(round((seconds - start) * 1000))
+                out.write(f'{last_ms} {TRACE_FILE} {direction} {offset} {length}\n')
+            out.write(f'{last_ms} {TRACE_FILE} close\n')
+    finally:
+        cleanup()
+
+    info = dict(profile.summary(), name=name, source=os.path.abspath(path), iolog=iolog_path, wrap=wrap)
+    with open(profile_path, 'w') as f:
+        json.dump(info, f, indent=2)
+    return info
+
+def load(data_dir, name):
+    """Profile of an imported trace (including its iolog path)"""
+    try:
+        with open(trace_paths(data_dir, name)[1]) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"Unknown trace {name!r}; import it with `python traces.py import`") from None
+
+def list_traces(data_dir):
+    directory = trace_dir(data_dir)
+    if not os.path.isdir(directory):
+        return []
+    return sorted(entry[:-len('.json')] for entry in os.listdir(directory) if entry.endswith('.json'))
+
+def replay_options(info, speed=1.0):
+    """fio options that replay an imported trace.
+
+    speed scales the trace's timing (2 = twice the original IO rate); 0 replays as fast
+    as the target allows. read_iolog_chunked makes fio read the log incrementally
+    instead of loading all of it before starting.
+    """
+    options = {'read_iolog': info['iolog'], 'read_iolog_chunked': True}
+    if not speed:
+        options['replay_no_stall'] = True
+    elif speed != 1:
+        options['replay_time_scale'] = max(1, int(round(speed * 100)))
+    return options
+
+def replay_job_options(options, info, speed=1.0):
+    """Turn resolved job options into a replay of the trace onto the same target.
+
+    The trace decides pattern, block sizes, offsets and timing; iodepth caps how many of
+    its IOs may be in flight. A file target is sized to cover the trace's offsets.
+    """
+    replay = {key: value for key, value in options.items()
+              if key not in ('rw', 'rwmixread', 'bs', 'bssplit', 'percentage_random', 'numjobs', 'time_based',
+                             'runtime', 'ramp_time', 'steadystate', 'steadystate_duration',
+                             'steadystate_ramp_time')}
+    replay['replay_redirect'] = replay.pop('filename')
+    if 'size' in replay:
+        replay['size'] = format_size(max(parse_size(replay['size']), info['span']))
+    replay.update(replay_options(info, speed))
+    return replay
+
+def expected_duration(info, speed=1.0):
+    """Seconds a replay should take at the given speed (None when replayed as fast as possible)"""
+    return info['duration'] / speed if speed else None
+
+def bssplit(sizes):
+    """fio bssplit for one direction's {size: count}: up to MAX_BSSPLIT_SIZES sizes whose shares sum to 100"""
+    top = sorted(((int(size), count) for size, count in sizes.items()), key=lambda item: -item[1])
+    top = top[:MAX_BSSPLIT_SIZES]
+    total = sum(count for _, count in top)
+    shares = [count * 100 / total for _, count in top]
+    percents = [int(share) for share in shares]
+    # Largest remainders take the points lost to rounding down
+    for index in sorted(range(len(shares)), key=lambda i: shares[i] - percents[i], reverse=True)[:100 - sum(percents)]:
+        percents[index] += 1
+    return ':'.join(f'{format_size(size)}/{percent}' for (size, _), percent in sorted(zip(top, percents))
+                    if percent)
+
+def derive_preset(info, name=None):
+    """A synthetic workload preset approximating a trace's mix, block sizes, queue depth and randomness"""
+    reads, writes = info['read_ios'], info['write_ios']
+    random_pct = int(round(100 - info['sequential_pct']))
+    if reads and writes:
+        rw = 'randrw' if random_pct else 'rw'
+    elif reads:
+        rw = 'randread' if random_pct else 'read'
+    else:
+        rw = 'randwrite' if random_pct else 'write'
+
+    all_sizes = {}
+    for sizes in info['sizes'].values():
+        for size, count in sizes.items():
+            all_sizes[size] = all_sizes.get(size, 0) + count
+    preset = {
+        'name': name or f"Trace {info['name']}",
+        'rw': rw,
+        'bs': format_size(int(max(all_sizes, key=all_sizes.get))),
+        'iodepth': max(1, int(round(info['queue_depth']))),
+        'numjobs': 1,
+    }
+    if reads and writes:
+        preset['rwmixread'] = int(round(info['read_pct']))
+        # fio's bssplit takes read,write splits separated by a comma
+        preset['bssplit'] = f"{bssplit(info['sizes']['read'])},{bssplit(info['sizes']['write'])}"
+    else:
+        preset['bssplit'] = bssplit(info['sizes']['read' if reads else 'write'])
+    if 0 < random_pct < 100:
+        preset['percentage_random'] = random_pct
+    preset['trace'] = info['name']
+    return preset
+
+def render_preset(key, preset):
+    """YAML lines for one entry of the workloads: section, in the file's own layout"""
+    lines = [f'  {key}:']
+    for field, value in preset.items():
+        lines.append(f'    {field}: {json.dumps(value) if isinstance(value, str) else value}')
+    return lines
+
+def write_preset(config_path, key, preset, replace=False):
+    """Insert a preset at the end of the workloads: section, keeping the rest of the file (and its comments) as is"""
+    with open(config_path) as f:
+        lines = f.read().split('\n')
+    start = lines.index('workloads:')
+    end = next((i for i in range(start + 1, len(lines)) if lines[i][:1] not in ('', ' ', '#')), len(lines))
+
+    existing = next((i for i in range(start + 1, end) if lines[i] == f'  {key}:'), None)
+    if existing is not None:
+        if not replace:
+            raise ValueError(f"Workload preset {key!r} already exists; pass --replace to overwrite it")
+        stop = next((i for i in range(existing + 1, end) if lines[i].strip() and not lines[i].startswith('    ')), end)
+        del lines[existing:stop]
+        end -= stop - existing
+    insert = end
+    # Blank lines and comments heading the next section stay with it
+    while insert > start + 1 and (not lines[insert - 1].strip() or lines[insert - 1].startswith('#')):
+        insert -= 1
+    lines[insert:insert] = [''] * (insert > start + 1) + render_preset(key, preset)
+
+    text = '\n'.join(lines)
+    if yaml.safe_load(text)['workloads'].get(key) != preset:
+        raise ValueError(f"Could not write preset {key!r} into {config_path}")
+    with open(config_path, 'w') as f:
+        f.write(text)
+    return preset
+
+def generate(path, ios=10000, iops=2000, read_pct=70, sizes=('4k', '8k', '64k'), sequential_pct=20, queue_depth=8,
+             span='1G', seed=0):
+    """Write a synthetic blkparse-format trace (dispatches and completions) for local testing"""
+    rng = random.Random(seed)
+    span = parse_size(span)
+    sizes = [parse_size(size) for size in sizes]
+    service = queue_depth / iops
+    offsets = {'read': 0, 'write': 0}
+    inflight = []
+    sequence = 0
+    with open(path, 'w') as f:
+        for index in range(ios):
+            now = index / iops
+            while inflight and inflight[0][0] <= now:
+                done, direction, offset, length = inflight.pop(0)
+                sequence += 1
+                f.write(f'  8,0    0 {sequence:8d} {done:14.9f}     0  C  {direction[0].upper()} '
+                        f'{offset // SECTOR_BYTES} + {length // SECTOR_BYTES} [0]\n')
+            direction = 'read' if rng.random() * 100 < read_pct else 'write'
+            length = rng.choice(sizes)
+            if rng.random() * 100 >= sequential_pct:
+                offsets[direction] = rng.randrange(0, span - length, 4096)
+            offset = offsets[direction]
+            offsets[direction] = (offset + length) % (span - length)
+            sequence += 1
+            f.write(f'  8,0    0 {sequence:8d} {now:14.9f}  4242  D  {direction[0].upper()} '
+                    f'{offset // SECTOR_BYTES} + {length // SECTOR_BYTES} [app]\n')
+            inflight.append((now + service, direction, offset, length))
+        for done, direction, offset, length in inflight:
+            sequence += 1
+            f.write(f'  8,0    0 {sequence:8d} {done:14.9f}     0  C  {direction[0].upper()} '
+                    f'{offset // SECTOR_BYTES} + {length // SECTOR_BYTES} [0]\n')
+    return path
+
+def main(argv=None):
+    from engine import DATA_DIR
+
+    parser = argparse.ArgumentParser(description="Import block traces for replay and derive workload presets from them")
+    parser.add_argument('--data-dir', default=DATA_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    importer = commands.add_parser('import', help="convert a blktrace/blkparse/iolog file into a replayable iolog")
+    importer.add_argument('name')
+    importer.add_argument('path')
+    importer.add_argument('--format', default='auto', choices=('auto', 'blktrace', 'blkparse', 'iolog'))
+    importer.add_argument('--action', default='D', help="blktrace action that marks an issue (default D)")
+    importer.add_argument('--wrap', help="fold offsets into this many bytes, e.g. 1G")
+
+    derive = commands.add_parser('derive', help="write a synthetic preset approximating a trace into the config")
+    derive.add_argument('name')
+    derive.add_argument('--preset', help="workload key (default trace_<name>)")
+    derive.add_argument('--config', default='fio_defaults.yaml')
+    derive.add_argument('--replace', action='store_true')
+
+    commands.add_parser('list', help="list imported traces")
+
+    generator = commands.add_parser('generate', help="write a synthetic blkparse trace for testing")
+    generator.add_argument('path')
+    generator.add_argument('--ios', type=int, default=10000)
+    generator.add_argument('--iops', type=int, default=2000)
+    generator.add_argument('--read-pct', type=float, default=70)
+    generator.add_argument('--sizes', default='4k,8k,64k')
+    generator.add_argument('--sequential-pct', type=float, default=20)
+    generator.add_argument('--queue-depth', type=int, default=8)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == 'import':
+            info = import_trace(args.path, args.name, args.data_dir, args.format, args.action, args.wrap)
+            print(f"{args.name}: {info['ios']} IOs over {info['duration']:.1f}s, {info['read_pct']:.0f}% reads, "
+                  f"{info['sequential_pct']:.0f}% sequential, QD {info['queue_depth']:.1f} -> {info['iolog']}")
+        elif args.command == 'derive':
+            preset = write_preset(args.config, args.preset or f'trace_{args.name}',
+                                  derive_preset(load(args.data_dir, args.name)), args.replace)
+            print(yaml.safe_dump({args.preset or f'trace_{args.name}': preset}, sort_keys=False), end='')
+        elif args.command == 'list':
+            for name in list_traces(args.data_dir):
+                info = load(args.data_dir, name)
+                print(f"{name}: {info['ios']} IOs, {info['duration']:.1f}s, span {format_size(info['span'])}")
+        else:
+            generate(args.path, args.ios, args.iops, args.read_pct, args.sizes.split(','), args.sequential_pct,
+                     args.queue_depth)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())